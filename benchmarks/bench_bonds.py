@@ -0,0 +1,64 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Time the bond search on rock-salt supercells: the cell list over every site, the symmetry-aware search which only
+searches the asymmetric unit and spreads the bonds with the generators, and a brute-force O(N^2) search on the small
+supercells. All three must agree.
+
+    python benchmarks/bench_bonds.py
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import time
+
+import numpy as np
+
+from crysvue.logic.atoms import AtomsLogic
+from crysvue.logic.bonds import BOND_TOLERANCE, BondsLogic, find_bonds
+
+# F m -3 m, 192 operators
+HALL_NUMBER = 523
+LATTICE = np.eye(3) * 5.64
+
+
+def brute_force_bonds(positions, radii, frac_to_abc, tolerance=BOND_TOLERANCE):
+    cartesian = positions @ frac_to_abc
+    distance = np.linalg.norm(cartesian[:, np.newaxis] - cartesian[np.newaxis], axis=2)
+    i, j = np.nonzero(np.triu(distance <= radii[:, np.newaxis] + radii[np.newaxis] + tolerance, 1))
+    return np.stack([i, j], axis=1)
+
+
+def main():
+    print(f"{'extent':>12} {'sites':>8} {'bonds':>9} {'cell list [s]':>14} {'symmetry [s]':>13} "
+          f"{'brute force [s]':>16}")
+    for n in (2, 4, 8, 16, 28):
+        atoms = AtomsLogic.from_atom_name([[0, 0, 0], [0.5, 0.5, 0.5]], ['Na', 'Cl'], HALL_NUMBER, extent=(n, n, n))
+        positions = atoms.positions.astype(float)
+        radii = atoms.sizes.astype(float)
+
+        start = time.perf_counter()
+        bonds = find_bonds(positions, radii, LATTICE)
+        cell_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        symmetric = BondsLogic([[0, 0, 0], [0.5, 0.5, 0.5]], radii[[0, -1]], HALL_NUMBER, extent=(n, n, n),
+                               frac_to_abc=LATTICE)
+        symmetry_time = time.perf_counter() - start
+        assert np.array_equal(symmetric.bonds, bonds)
+
+        brute_time = float('nan')
+        if len(positions) <= 5000:
+            start = time.perf_counter()
+            reference = brute_force_bonds(positions, radii, LATTICE)
+            brute_time = time.perf_counter() - start
+            assert np.array_equal(bonds, reference)
+        print(f"{str((n, n, n)):>12} {len(positions):>8} {len(bonds):>9} {cell_time:>14.3f} {symmetry_time:>13.3f} "
+              f"{brute_time:>16.3f}")
+
+
+if __name__ == '__main__':
+    main()
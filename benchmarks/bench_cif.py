@@ -0,0 +1,117 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Throughput and peak memory of scanning a CIF file of many structures with `crysvue.io.cif`: finding the blocks with
+`index_blocks`, parsing them with `iter_blocks` and reading their structures with `iter_structures`, against reading
+the whole file into memory.
+
+    python benchmarks/bench_cif.py [blocks] [sites per block]
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from crysvue.io.cif import index_blocks, iter_blocks, iter_structures
+
+_HEADER = """data_structure_{index}
+_chemical_name_common 'synthetic structure {index}'
+_cell_length_a {a:.4f}(3)
+_cell_length_b {b:.4f}(3)
+_cell_length_c {c:.4f}(4)
+_cell_angle_alpha 90
+_cell_angle_beta {beta:.3f}(2)
+_cell_angle_gamma 90
+_symmetry_space_group_name_H-M 'P 1 21/c 1'
+_symmetry_Int_Tables_number 14
+loop_
+_symmetry_equiv_pos_site_id
+_symmetry_equiv_pos_as_xyz
+1 x,y,z
+2 -x,1/2+y,1/2-z
+3 -x,-y,-z
+4 x,1/2-y,1/2+z
+loop_
+_atom_site_label
+_atom_site_type_symbol
+_atom_site_fract_x
+_atom_site_fract_y
+_atom_site_fract_z
+_atom_site_occupancy
+"""
+_ELEMENTS = np.array(['C', 'N', 'O', 'Fe', 'Cu', 'Cl', 'H'])
+
+
+def write_file(path, n_blocks, n_sites, seed=0):
+    rng = np.random.default_rng(seed)
+    with open(path, 'w') as f:
+        for index in range(n_blocks):
+            a, b, c = rng.uniform(4, 20, 3)
+            f.write(_HEADER.format(index=index, a=a, b=b, c=c, beta=rng.uniform(90, 120)))
+            symbols = rng.choice(_ELEMENTS, n_sites)
+            positions = rng.random((n_sites, 3))
+            f.writelines(f"{symbol}{i} {symbol} {x:.5f}({i % 9 + 1}) {y:.5f} {z:.5f} 1.0\n"
+                         for i, (symbol, (x, y, z)) in enumerate(zip(symbols, positions)))
+            f.write('\n')
+
+
+def measure(function):
+    """
+    Time a function, then run it again to trace its peak memory, as tracing slows it down
+    """
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    n_blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_sites = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    def read_all(path):
+        with open(path) as f:
+            return len(f.read())
+
+    def count_blocks(path):
+        return sum(1 for _ in iter_blocks(path))
+
+    def count_sites(path):
+        return sum(len(structure.positions) for structure in iter_structures(path))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'structures.cif')
+        write_file(path, n_blocks, n_sites)
+        size = os.path.getsize(path) / 1024 ** 2
+        print(f"{n_blocks} blocks of {n_sites} sites, {size:.1f} MB")
+        print(f"{'':>16} {'time [s]':>9} {'MB/s':>7} {'peak memory [MB]':>17}")
+        for name, function in (('read whole file', read_all), ('index_blocks', index_blocks),
+                               ('iter_blocks', count_blocks), ('iter_structures', count_sites)):
+            result, elapsed, peak = measure(lambda: function(path))
+            print(f"{name:>16} {elapsed:9.3f} {size / elapsed:7.1f} {peak / 1024 ** 2:17.2f}")
+        assert result == n_blocks * n_sites
+
+        # A block in the middle of the file, found from the index without parsing the blocks before it
+        blocks = index_blocks(path)
+        name, offset = blocks[len(blocks) // 2]
+        start = time.perf_counter()
+        block = next(iter_blocks(path, offset))
+        assert block.name == name
+        print(f"block {name} read from its offset in {1000 * (time.perf_counter() - start):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
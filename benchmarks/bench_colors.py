@@ -0,0 +1,68 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Time converting colors for a million sites: per-site `to_rgba` and vispy `Color` objects against the batch
+conversions of `crysvue.misc.color`, and recoloring a supercell through the palette of `AtomsLogic`.
+
+    python benchmarks/bench_colors.py [n_sites]
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import sys
+import time
+
+import numpy as np
+
+from crysvue.logic.atoms import AtomsLogic
+from crysvue.logic.elements import COLOR_DATA
+from crysvue.misc.color import colormap, hex_to_rgba, rgba_to_hex, to_rgba, to_rgba_array
+
+# Sites converted one at a time, the time is scaled to all the sites
+PER_SITE_SAMPLE = 20_000
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    n_sites = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    hex_strings = np.array(['#' + color for color in COLOR_DATA])[rng.integers(0, len(COLOR_DATA), n_sites)]
+    sample = hex_strings[:PER_SITE_SAMPLE].tolist()
+    scale = n_sites / len(sample)
+
+    from vispy.color import Color
+    _, color_time = timed(lambda: [Color(color).rgba for color in sample])
+    expected, rgba_time = timed(lambda: np.array([to_rgba(color) for color in sample]))
+    rgba, batch_time = timed(lambda: hex_to_rgba(hex_strings))
+    assert np.array_equal(rgba[:PER_SITE_SAMPLE], expected)
+    _, list_time = timed(lambda: to_rgba_array(hex_strings.tolist()))
+    back, hex_time = timed(lambda: rgba_to_hex(rgba))
+    assert np.array_equal(back, np.char.lower(hex_strings))
+    _, map_time = timed(lambda: colormap(rng.random(n_sites), ['blue', 'white', 'red']))
+
+    print(f"{n_sites} sites")
+    print(f"  vispy Color per site        {scale * color_time:8.3f} s (from {PER_SITE_SAMPLE})")
+    print(f"  to_rgba per site            {scale * rgba_time:8.3f} s (from {PER_SITE_SAMPLE})")
+    print(f"  hex_to_rgba                 {batch_time:8.3f} s")
+    print(f"  to_rgba_array of a list     {list_time:8.3f} s")
+    print(f"  rgba_to_hex                 {hex_time:8.3f} s")
+    print(f"  colormap                    {map_time:8.3f} s")
+
+    # Rock salt with about n_sites sites, recolored through the palette
+    n = max(int(round((n_sites / 8) ** (1 / 3))), 1)
+    atoms = AtomsLogic([[0, 0, 0], [0.5, 0.5, 0.5]], [1, 1], ['red', 'blue'], 523, extent=(n, n, n))
+    _, set_time = timed(lambda: atoms.set_colors(colormap([0, 1], ['green', 'white'])))
+    assert np.array_equal(atoms.colors, atoms.palette[atoms.color_index[atoms.parents]])
+    print(f"  set_colors, {len(atoms.positions)} sites  {set_time:8.3f} s (palette of {len(atoms.palette)})")
+
+
+if __name__ == '__main__':
+    main()
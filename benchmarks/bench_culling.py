@@ -0,0 +1,77 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Frame time of a large supercell of marker atoms inspected close up, drawing every atom, culling the grid cells outside
+the camera frustum, and additionally clipping to a slab one unit cell thick. Also times the in-place update of the
+spatial grid after an atom moves. Rendering uses the headless backend of `Canvas(display='offscreen')`:
+
+    python benchmarks/bench_culling.py [extent]
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import sys
+import time
+
+import numpy as np
+
+from crysvue.logic.spatial import SpatialGrid
+from crysvue.visual.generic import Atoms
+
+
+def frame_time(canvas, repeat):
+    canvas.render()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        canvas.render()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    from crysvue import _offscreen_app
+    from crysvue.canvases.vispy import CrystalCanvas
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    canvas = CrystalCanvas(app=_offscreen_app(), size=(800, 600), show=False)
+    generic = Atoms(positions=np.array([[0.1, 0.2, 0.3], [0.5, 0.5, 0.5]]), sizes=[0.5, 0.7],
+                    colors=['#ff0000', '#0000ff'], symmetry_str='x,y,z;-x,-y,-z;-x,y+1/2,-z+1/2;x,-y+1/2,z+1/2',
+                    lattice_matrix=5 * np.eye(3), extent=(n, n, n))
+    visual = generic._generate_visual(canvas.components['Atoms'])
+    canvas.add_visual('atoms', visual)
+    n_atoms = len(visual._data)
+    start = time.perf_counter()
+    SpatialGrid(visual._data['a_position'], visual._data['a_size'] / 2)
+    print(f"{n_atoms} atoms, spatial grid built in {1000 * (time.perf_counter() - start):.1f} ms")
+
+    # Close up on a corner of the supercell
+    canvas.view.camera.set_range()
+    canvas.view.camera.scale_factor *= 0.1
+    canvas.view.camera.center = (2.0 * n, -1.0 * n, 1.0 * n)
+
+    print(f"{'mode':>8} {'drawn':>9} {'culled':>9} {'frame [ms]':>11} {'fps':>7}")
+    elapsed = frame_time(canvas, repeat=5)
+    print(f"{'all':>8} {n_atoms:>9} {0:>9} {1000 * elapsed:>11.1f} {1 / elapsed:>7.1f}")
+    # Every visible atom is drawn as a sphere, so only culling changes what is drawn
+    lod, = canvas.enable_lod(full_pixels=0, min_pixels=None)
+    for name, planes in (('frustum', None), ('slab', True)):
+        if planes is not None:
+            lod.set_slab([0, 0, 1], [0, 0, 0], 5.0)
+        elapsed = frame_time(canvas, repeat=5)
+        drawn, _, culled = lod.counts()
+        print(f"{name:>8} {drawn:>9} {culled:>9} {1000 * elapsed:>11.1f} {1 / elapsed:>7.1f}")
+    lod.set_clip_planes(None)
+
+    # Moving an atom re-expands its orbit, only the update of the spatial grid is timed
+    sites = visual.set_atom_position(0, [0.15, 0.2, 0.3])
+    start = time.perf_counter()
+    repeat = 20
+    for _ in range(repeat):
+        lod.sites_changed(sites)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"grid update for {sites.stop - sites.start} moved sites: {1000 * elapsed:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Time looking up the sizes and colors of atoms from their element symbols and atomic numbers, against the previous
+per-atom `list.index` scan, and check that both give the same values.
+
+    python benchmarks/bench_elements.py [n_atoms]
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import sys
+import time
+
+import numpy as np
+
+from crysvue.logic.atoms import AtomsLogic
+from crysvue.logic.elements import COLOR_DATA, ELEMENT_DATA, RADIUS_DATA
+from crysvue.misc.color import to_rgba
+
+
+def legacy_from_atom_name(atom_label):
+    sizes = []
+    colors = []
+    for atom_str in atom_label:
+        if atom_str in ELEMENT_DATA:
+            idx = ELEMENT_DATA.index(atom_str)
+            sizes.append(RADIUS_DATA[idx])
+            colors.append('#' + COLOR_DATA[idx])
+        else:
+            raise ValueError(f"Atom {atom_str} not found in ELEMENT_DATA")
+    return sizes, colors
+
+
+def best_of(function, repeats: int = 5) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(0)
+    # Elements with radii in RADIUS_DATA, so that the legacy lookup can be compared
+    numbers = rng.integers(1, len(RADIUS_DATA) + 1, n_atoms)
+    labels = [ELEMENT_DATA[z - 1] for z in numbers]
+    positions = np.zeros((n_atoms, 3))
+
+    legacy_sizes, legacy_colors = legacy_from_atom_name(labels)
+    _, sizes, colors, _ = AtomsLogic._from_atom_name(positions, labels, 1)
+    assert np.allclose(sizes, legacy_sizes)
+    assert np.array_equal(colors, [to_rgba(color) for color in legacy_colors])
+    _, sizes, colors, _ = AtomsLogic._from_atom_number(positions, numbers, 1)
+    assert np.allclose(sizes, legacy_sizes)
+
+    legacy = best_of(lambda: legacy_from_atom_name(labels))
+    legacy_rgba = best_of(lambda: [to_rgba('#' + COLOR_DATA[ELEMENT_DATA.index(label)]) for label in labels], 1)
+    by_name = best_of(lambda: AtomsLogic._from_atom_name(positions, labels, 1))
+    by_number = best_of(lambda: AtomsLogic._from_atom_number(positions, numbers, 1))
+    print(f"{n_atoms} atoms")
+    print(f"  list.index lookup       {1000 * legacy:8.2f} ms (hex strings)")
+    print(f"  list.index + to_rgba    {1000 * legacy_rgba:8.2f} ms")
+    print(f"  table by symbol         {1000 * by_name:8.2f} ms")
+    print(f"  table by atomic number  {1000 * by_number:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Compare the tiled symmetry expansion against the original per-operator loop, checking the sites against a brute-force
+expansion.
+
+    python benchmarks/bench_expansion.py
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import time
+
+import brille
+import numpy as np
+
+from crysvue.logic.expansion import expand_positions
+
+
+def legacy_generate_positions(symmetry, atom, extent):
+    """
+    The original implementation of `AtomLogic.generate_positions`, kept as a reference.
+    """
+    all_positions = np.array(atom).reshape(-1, 3)
+    generators = [[np.eye(3), np.array(atom), np.zeros(3)]]
+    for z in np.arange(-1, extent[2] + 1):
+        for y in np.arange(-1, extent[1] + 1):
+            for x in np.arange(-1, extent[0] + 1):
+                for rot, trans in zip(symmetry.W, symmetry.w):
+                    this_position = np.matmul(rot, atom + [x, y, z]) + trans
+                    if not np.any(np.all(all_positions == this_position, axis=1)) and \
+                            np.all(this_position >= 0) and \
+                            np.all(this_position <= extent):
+                        all_positions = np.concatenate((all_positions, this_position.reshape(-1, 3)))
+                        generators.append([rot, np.array([x, y, z]), trans])
+    return all_positions, generators
+
+
+def brute_force_sites(symmetry, atom, extent, tolerance=1e-6):
+    """
+    Every image W (atom + t) + w in [0, extent] for translations t well beyond the supercell, rounded for comparison.
+    """
+    reach = max(extent) + 2
+    t = np.stack(np.meshgrid(*[np.arange(-reach, reach + 1)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+    sites = (np.einsum('oij,tj->toi', symmetry.W, atom + t) + symmetry.w).reshape(-1, 3)
+    sites = sites[np.all((sites >= -tolerance) & (sites <= np.asarray(extent) + tolerance), axis=1)]
+    return set(map(tuple, np.round(sites, 6).tolist()))
+
+
+def timed(func, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    # The legacy loop is only timed for the small cases
+    cases = [
+        ('P -1', 2, (1, 1, 1), True),
+        ('P 21/c', 81, (3, 3, 3), True),
+        ('F m -3 m', 523, (2, 2, 2), True),
+        ('F m -3 m', 523, (4, 4, 4), True),
+        ('F m -3 m', 523, (16, 16, 16), False),
+        ('P 6', 'x,y,z;x-y,x,z;-y,x-y,z;-x,-y,z;-x+y,-x,z;y,-x+y,z', (8, 8, 4), False),
+    ]
+    atom = np.array([0.1, 0.2, 0.3])
+    print(f"{'group':>10} {'extent':>12} {'sites':>8} {'legacy sites':>13} {'legacy [s]':>11} {'tiled [s]':>10} "
+          f"{'speed-up':>9}")
+    for name, symbol, extent, legacy in cases:
+        symmetry = brille.Symmetry(symbol)
+        tiled_time, (positions, operators, cells) = timed(expand_positions, symmetry.W, symmetry.w, atom, extent,
+                                                          repeat=5)
+        # Every site is reproduced by its generator, and no image in the supercell is missed
+        generated = np.einsum('nij,nj->ni', symmetry.W[operators], atom + cells) + symmetry.w[operators]
+        assert np.allclose(generated[1:], positions[1:]) and np.allclose(positions[0], atom)
+        found = set(map(tuple, np.round(positions, 6).tolist()))
+        assert len(found) == len(positions) and found == brute_force_sites(symmetry, atom, extent)
+        if legacy:
+            legacy_time, (legacy_positions, _) = timed(legacy_generate_positions, symmetry, atom, extent)
+            # The legacy loop misses images whose translation lies outside [-1, extent] before the rotation
+            assert set(map(tuple, np.round(legacy_positions, 6).tolist())) <= found
+            print(f"{name:>10} {str(extent):>12} {len(positions):>8} {len(legacy_positions):>13} {legacy_time:>11.4f} "
+                  f"{tiled_time:>10.4f} {legacy_time / tiled_time:>8.0f}x")
+        else:
+            print(f"{name:>10} {str(extent):>12} {len(positions):>8} {'-':>13} {'-':>11} {tiled_time:>10.4f} {'-':>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Time importing the crysvue modules in fresh interpreters, compared with importing numpy alone, and check which of
+the heavy dependencies each of them pulls in.
+
+    python benchmarks/bench_import.py [--repeats 7]
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODULES = ['numpy', 'crysvue', 'crysvue.logic.atoms', 'crysvue.logic.bonds', 'crysvue.visual.generic',
+           'crysvue.visual.vispy', 'crysvue.canvases.vispy']
+# Dependencies which should only be imported when they are used
+HEAVY = ['vispy', 'brille', 'concurrent.futures.process']
+
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(__import__('json').dumps([elapsed, [name for name in {heavy!r} if name in sys.modules]]))
+"""
+
+
+def time_import(module: str):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get('PYTHONPATH', '')]))
+    output = subprocess.run([sys.executable, '-c', _SCRIPT.format(module=module, heavy=HEAVY)], env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().split('\n')[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeats', type=int, default=7)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        results = [time_import(module) for _ in range(args.repeats)]
+        times = sorted(1000 * elapsed for elapsed, _ in results)
+        loaded = results[0][1]
+        print(f"{module:<26} median {times[len(times) // 2]:7.1f} ms  best {times[0]:7.1f} ms  "
+              f"imports {', '.join(loaded) if loaded else 'none of ' + ', '.join(HEAVY)}")
+
+    # Visuals are created on first access, which imports vispy
+    elapsed, loaded = time_import('crysvue.visual.vispy; crysvue.visual.vispy.Atoms')
+    print(f"{'first visual node':<26} {1000 * elapsed:7.1f} ms  imports {', '.join(loaded)}")
+
+
+if __name__ == '__main__':
+    main()
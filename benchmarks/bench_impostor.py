@@ -0,0 +1,58 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Compare GPU upload size and draw time of marker atoms against instanced impostor atoms, rendering offscreen with the
+headless backend of `Canvas(display='offscreen')`, which selects the PyOpenGL backend needed for instancing:
+
+    python benchmarks/bench_impostor.py
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import time
+
+import numpy as np
+
+from crysvue.visual.generic import Atoms, AtomsImpostor
+
+
+def bench(cls, extent, repeat=5):
+    from crysvue import _offscreen_app
+    from crysvue.canvases.vispy import CrystalCanvas
+
+    canvas = CrystalCanvas(app=_offscreen_app(), size=(400, 400), show=False)
+    lattice_matrix = 5 * np.eye(3)
+    generic = cls(positions=np.array([[0.1, 0.2, 0.3], [0.5, 0.5, 0.5]]), sizes=[0.5, 0.7],
+                  colors=['#ff0000', '#0000ff'], symmetry_str='x,y,z;-x,-y,-z;-x,y+1/2,-z+1/2;x,-y+1/2,z+1/2',
+                  lattice_matrix=lattice_matrix, extent=extent)
+    start = time.perf_counter()
+    visual = generic._generate_visual(canvas.components[cls._LABEL])
+    canvas.add_visual(cls._LABEL.lower(), visual)
+    canvas.view.camera.set_range()
+    canvas.render()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeat):
+        canvas.render()
+    draw = (time.perf_counter() - start) / repeat
+    if cls is AtomsImpostor:
+        nbytes = visual.upload_nbytes
+    else:
+        nbytes = visual._data.nbytes
+    canvas.close()
+    return first, draw, nbytes
+
+
+def main():
+    print(f"{'visual':>14} {'extent':>14} {'first frame [s]':>16} {'frame [s]':>10} {'upload [kB]':>12}")
+    for extent in [(5, 5, 5), (20, 20, 20), (50, 50, 50)]:
+        for cls in (Atoms, AtomsImpostor):
+            first, draw, nbytes = bench(cls, extent)
+            print(f"{cls.__name__:>14} {str(extent):>14} {first:>16.3f} {draw:>10.4f} {nbytes / 1024:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Time to the first frame, time to the complete supercell and peak memory of rock salt drawn with marker atoms, either
+generated up front or lazily one block of unit cells at a time. Memory is measured with tracemalloc, which sees the
+numpy arrays but not the GL driver. Rendering uses the headless backend of `Canvas(display='offscreen')`:
+
+    python benchmarks/bench_lazy_supercell.py [extent] [chunk_cells]
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from crysvue.logic.cache import clear_caches
+from crysvue.visual.generic import Atoms
+
+
+def build(canvas, n, **kwargs):
+    clear_caches()
+    generic = Atoms(positions=np.array([[0.0, 0.0, 0.0], [0.5, 0.5, 0.5]]), sizes=[0.5, 0.7],
+                    colors=['#ff0000', '#0000ff'], symmetry_str=523, lattice_matrix=5 * np.eye(3), extent=(n, n, n),
+                    **kwargs)
+    tracemalloc.start()
+    start = time.perf_counter()
+    visual = generic._generate_visual(canvas.components['Atoms'])
+    canvas.add_visual('atoms', visual)
+    canvas.view.camera.set_range(*[(-2.5 * n, 2.5 * n)] * 3)
+    canvas.render()
+    first = time.perf_counter() - start
+    frames = 1
+    while visual.loading:
+        canvas.render()
+        frames += 1
+    complete = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n_sites = len(visual.positions)
+    canvas.clear()
+    return first, complete, frames, peak, n_sites
+
+
+def main():
+    from crysvue import _offscreen_app
+    from crysvue.canvases.vispy import CrystalCanvas
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    chunk_cells = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    canvas = CrystalCanvas(app=_offscreen_app(), size=(400, 400), show=False)
+
+    print(f"{'mode':>6} {'sites':>9} {'first frame [s]':>16} {'complete [s]':>13} {'frames':>7} {'peak [MB]':>10}")
+    for name, kwargs in (('eager', {}), ('lazy', {'lazy': True, 'chunk_cells': chunk_cells})):
+        first, complete, frames, peak, n_sites = build(canvas, n, **kwargs)
+        print(f"{name:>6} {n_sites:>9} {first:>16.2f} {complete:>13.2f} {frames:>7} {peak / 1024 ** 2:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
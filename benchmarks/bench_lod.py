@@ -0,0 +1,64 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Frame time of a large supercell of marker atoms with and without level of detail, rendering offscreen with the camera
+close up, at the default distance and far away, with the headless backend of `Canvas(display='offscreen')`:
+
+    python benchmarks/bench_lod.py [extent]
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import sys
+import time
+
+import numpy as np
+
+from crysvue.visual.generic import Atoms
+
+# Camera distances relative to the one which fits the whole supercell
+ZOOMS = {'close': 0.1, 'fit': 1.0, 'far': 5.0}
+
+
+def frame_time(canvas, repeat):
+    canvas.render()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        canvas.render()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    from crysvue import _offscreen_app
+    from crysvue.canvases.vispy import CrystalCanvas
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    canvas = CrystalCanvas(app=_offscreen_app(), size=(800, 600), show=False)
+    generic = Atoms(positions=np.array([[0.1, 0.2, 0.3], [0.5, 0.5, 0.5]]), sizes=[0.5, 0.7],
+                    colors=['#ff0000', '#0000ff'], symmetry_str='x,y,z;-x,-y,-z;-x,y+1/2,-z+1/2;x,-y+1/2,z+1/2',
+                    lattice_matrix=5 * np.eye(3), extent=(n, n, n))
+    start = time.perf_counter()
+    visual = generic._generate_visual(canvas.components['Atoms'])
+    canvas.add_visual('atoms', visual)
+    print(f"{len(visual._data)} atoms built in {time.perf_counter() - start:.1f} s")
+    canvas.view.camera.set_range()
+    fit = canvas.view.camera.scale_factor
+
+    print(f"{'camera':>8} {'LOD':>5} {'spheres':>9} {'flat':>9} {'hidden':>9} {'frame [ms]':>11} {'fps':>7}")
+    for lod in (False, True):
+        controllers = canvas.enable_lod() if lod else []
+        for name, zoom in ZOOMS.items():
+            canvas.view.camera.scale_factor = fit * zoom
+            elapsed = frame_time(canvas, repeat=5)
+            counts = controllers[0].counts() if controllers else (len(visual._data), 0, 0)
+            print(f"{name:>8} {str(lod):>5} {counts[0]:>9} {counts[1]:>9} {counts[2]:>9} {1000 * elapsed:>11.1f} "
+                  f"{1 / elapsed:>7.1f}")
+        for controller in controllers:
+            controller.detach()
+
+
+if __name__ == '__main__':
+    main()
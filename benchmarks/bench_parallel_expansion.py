@@ -0,0 +1,63 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Scaling of the per-atom symmetry expansion of `AtomsLogic` with the number of workers, for a structure with many
+independent sites in a high-symmetry group.
+
+    python benchmarks/bench_parallel_expansion.py [n_atoms] [extent]
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from crysvue.logic.atoms import AtomsLogic
+from crysvue.logic.cache import clear_caches
+
+# F m -3 m, 192 operators
+HALL_NUMBER = 523
+
+
+def build(positions, extent, executor=None):
+    clear_caches()
+    start = time.perf_counter()
+    atoms = AtomsLogic(positions, [1] * len(positions), ['red'] * len(positions), HALL_NUMBER, extent=extent,
+                       executor=executor)
+    return time.perf_counter() - start, atoms
+
+
+def main():
+    n_atoms = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    extent = (int(sys.argv[2]),) * 3 if len(sys.argv) > 2 else (2, 2, 2)
+    positions = np.random.default_rng(0).random((n_atoms, 3))
+
+    serial_time, reference = build(positions, extent)
+    print(f"{n_atoms} atoms, extent {extent}, {len(reference.positions)} sites")
+    print(f"{'executor':>10} {'workers':>8} {'time [s]':>10} {'speed-up':>9}")
+    print(f"{'serial':>10} {1:>8} {serial_time:>10.3f} {1:>8.1f}x")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        for name, pool in (('threads', ThreadPoolExecutor), ('processes', ProcessPoolExecutor)):
+            # Forked workers would otherwise inherit the orbits cached by the previous run
+            clear_caches()
+            with pool(workers) as executor:
+                # Start the workers before timing
+                list(executor.map(abs, range(workers)))
+                elapsed, atoms = build(positions, extent, executor)
+            for column in ('positions', 'operators', 'translations', 'parents'):
+                assert np.array_equal(getattr(atoms, column), getattr(reference, column))
+            print(f"{name:>10} {workers:>8} {elapsed:>10.3f} {serial_time / elapsed:>8.1f}x")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
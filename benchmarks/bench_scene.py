@@ -0,0 +1,81 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Time to build the visuals of a rock salt supercell by symmetry expansion, against reopening them from a scene saved
+with `save_scene`, whose arrays are memory-mapped, and the time to draw the first frame in each case. Also reports
+the size of the scene and the time to save it. Rendering uses the headless backend of `Canvas(display='offscreen')`:
+
+    python benchmarks/bench_scene.py [extent]
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from crysvue.logic.cache import clear_caches
+from crysvue.visual.generic import Atoms, UnitCell
+
+
+def first_frame(canvas, n, build):
+    """
+    Time to build the visuals, and then to draw them once, which uploads them to the GPU
+    """
+    clear_caches()
+    start = time.perf_counter()
+    visuals = build()
+    built = time.perf_counter() - start
+    canvas.view.camera.set_range(*[(-2.5 * n, 2.5 * n)] * 3)
+    image = canvas.render()
+    return built, time.perf_counter() - start - built, visuals, image
+
+
+def main():
+    from crysvue import _offscreen_app
+    from crysvue.canvases.vispy import CrystalCanvas
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    canvas = CrystalCanvas(app=_offscreen_app(), size=(400, 400), show=False)
+    lattice = 5 * np.eye(3)
+
+    def expand():
+        visuals = []
+        for generic in (UnitCell(lattice_matrix=lattice, extent=(n, n, n)),
+                        Atoms(positions=np.array([[0.0, 0.0, 0.0], [0.5, 0.5, 0.5]]), sizes=[0.5, 0.7],
+                              colors=['#ff0000', '#0000ff'], symmetry_str=523, lattice_matrix=lattice,
+                              extent=(n, n, n))):
+            visual = generic._generate_visual(canvas.components[generic._LABEL])
+            canvas.add_visual(generic._LABEL.lower(), visual)
+            visuals.append(visual)
+        return visuals
+
+    expanded, expanded_draw, visuals, expanded_image = first_frame(canvas, n, expand)
+    n_sites = len(visuals[1].positions)
+
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        canvas.save_scene(path)
+        saved = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        canvas.clear()
+
+        loaded, loaded_draw, loaded_visuals, loaded_image = first_frame(canvas, n, lambda: canvas.load_scene(path))
+        assert np.array_equal(loaded_image, expanded_image)
+        assert np.array_equal(loaded_visuals[1].positions, visuals[1].positions)
+        canvas.clear()
+
+    print(f"rock salt {n}x{n}x{n}, {n_sites} sites, scene of {size / 1024 ** 2:.1f} MB saved in {saved:.2f} s")
+    print(f"{'':>10} {'build [s]':>10} {'first draw [s]':>15}")
+    print(f"{'expanded':>10} {expanded:10.3f} {expanded_draw:15.3f}")
+    print(f"{'reopened':>10} {loaded:10.3f} {loaded_draw:15.3f}")
+
+
+if __name__ == '__main__':
+    main()
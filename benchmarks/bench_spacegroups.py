@@ -0,0 +1,58 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Time building the symmetry of every Hall setting from the space-group tables and with brille, checking that the
+operators agree. Also times the first access, which maps the tables.
+
+    python benchmarks/bench_spacegroups.py
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import time
+
+import numpy as np
+
+from crysvue.logic.spacegroups import N_HALL_NUMBERS, SpaceGroupSymmetry, find_hall_number
+
+
+def main():
+    start = time.perf_counter()
+    SpaceGroupSymmetry(1)
+    print(f"tables mapped in {1000 * (time.perf_counter() - start):.2f} ms")
+
+    hall_numbers = range(1, N_HALL_NUMBERS + 1)
+    start = time.perf_counter()
+    tabulated = [SpaceGroupSymmetry(hall_number) for hall_number in hall_numbers]
+    table_time = (time.perf_counter() - start) / N_HALL_NUMBERS
+
+    start = time.perf_counter()
+    import brille
+    import_time = time.perf_counter() - start
+    start = time.perf_counter()
+    parsed = [brille.Symmetry(hall_number) for hall_number in hall_numbers]
+    brille_time = (time.perf_counter() - start) / N_HALL_NUMBERS
+
+    for table, symmetry in zip(tabulated, parsed):
+        assert np.array_equal(table.W, symmetry.W) and np.allclose(table.w, symmetry.w)
+
+    # The symbol index is built on the first lookup
+    start = time.perf_counter()
+    find_hall_number(hm='P 1')
+    index_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for symbol in ('P 21/c', 'F m -3 m', 'P 63/m m c', 'I a -3 d'):
+        find_hall_number(hm=symbol)
+    lookup_time = (time.perf_counter() - start) / 4
+
+    print(f"{'table [us]':>11} {'brille [us]':>12} {'brille import [ms]':>19} {'HM index [ms]':>14} "
+          f"{'HM lookup [us]':>15}")
+    print(f"{1e6 * table_time:>11.1f} {1e6 * brille_time:>12.1f} {1000 * import_time:>19.1f} "
+          f"{1000 * index_time:>14.1f} {1e6 * lookup_time:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Compare the indexed unit-cell grid against the original NaN separated line strip.
+
+    python benchmarks/bench_unit_cell.py
+"""
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import time
+
+import numpy as np
+
+from crysvue.logic.unit_cell import UnitCellLogic
+
+
+def legacy_generate_unit_cell(extent, center):
+    """
+    The original implementation of `UnitCellLogic.generate_unit_cell`, kept as a reference.
+    """
+    points = []
+    for z in np.arange(extent[2]):
+        for y in np.arange(extent[1]):
+            for x in np.arange(extent[0]):
+                for start, stop in [([x, y, z], [x + 1, y, z]),
+                                    ([x, y, z], [x, y + 1, z]),
+                                    ([x, y, z], [x, y, z + 1]),
+                                    ([x + 1, y + 1, z + 1], [x + 1, y, z + 1]),
+                                    ([x + 1, y + 1, z + 1], [x + 1, y + 1, z]),
+                                    ([x + 1, y + 1, z + 1], [x, y + 1, z + 1])]:
+                    points += [start, stop, [None, None, None]]
+    for x in np.arange(extent[0]):
+        points += [[x, extent[1], 0], [x + 1, extent[1], 0], [None, None, None],
+                   [x, 0, extent[2]], [x + 1, 0, extent[2]], [None, None, None]]
+    for y in np.arange(extent[1]):
+        points += [[0, y, extent[2]], [0, y + 1, extent[2]], [None, None, None],
+                   [extent[0], y, 0], [extent[0], y + 1, 0], [None, None, None]]
+    for z in np.arange(extent[2]):
+        points += [[0, extent[1], z], [0, extent[1], z + 1], [None, None, None],
+                   [extent[0], 0, z], [extent[0], 0, z + 1], [None, None, None]]
+    return np.array(points, dtype=np.float32) - np.array(center, dtype=np.float32)
+
+
+def edge_set(starts, stops):
+    return {tuple(sorted((tuple(a), tuple(b)))) for a, b in zip(starts.tolist(), stops.tolist())}
+
+
+def main():
+    logic = UnitCellLogic.__new__(UnitCellLogic)
+    print(f"{'extent':>14} {'legacy [s]':>11} {'indexed [s]':>12} {'legacy vertices':>16} {'indexed vertices':>17}")
+    for extent in [(1, 1, 1), (5, 5, 5), (20, 20, 20)]:
+        center = np.array(extent) / 2
+
+        start = time.perf_counter()
+        legacy = legacy_generate_unit_cell(extent, center)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        points, edges = logic.generate_unit_cell(extent, center)
+        indexed_time = time.perf_counter() - start
+
+        # Both must draw the same set of edges
+        segments = legacy.reshape(-1, 3, 3)
+        assert edge_set(segments[:, 0], segments[:, 1]) == edge_set(points[edges[:, 0]], points[edges[:, 1]])
+        print(f"{str(extent):>14} {legacy_time:>11.4f} {indexed_time:>12.4f} {len(legacy):>16} {len(points):>17}")
+
+
+if __name__ == '__main__':
+    main()
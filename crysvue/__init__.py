@@ -7,9 +7,12 @@ from __future__ import annotations
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-from typing import Literal, Optional, Dict, TYPE_CHECKING, NoReturn, List
+import os
+from typing import Literal, Optional, Dict, TYPE_CHECKING, NoReturn, List, Tuple
 
 if TYPE_CHECKING:
+    import numpy as np
+    from vispy.app import Application
     from crysvue.visual import V, VC
     from crysvue.canvases import VisualCanvas
 
@@ -26,20 +29,80 @@ _CANVAS_DEFAULTS = {
         'resizable': True
     },
     'qml': {
+    },
+    'offscreen': {
+        'bgcolor': 'white',
+        'size': (500, 400),
+        'show': False,
     }
 }
 
+# Headless vispy backends, in order of preference
+_OFFSCREEN_BACKENDS = ('egl', 'osmesa')
+_OFFSCREEN_APP: Optional[Application] = None
+
+
+def _offscreen_app(backend: Optional[str] = None) -> Application:
+    """
+    Return the vispy application used for offscreen rendering. The application, and so the GL context, is created once
+    and shared by every offscreen canvas. The GL backend of the instanced visuals is selected with `_use_instanced_gl`.
+
+    :param backend: Headless backend to use, 'egl' or 'osmesa'. If None the first available backend is used.
+    """
+    global _OFFSCREEN_APP
+    if _OFFSCREEN_APP is not None and (backend is None or _OFFSCREEN_APP.backend_name.lower() == backend.lower()):
+        return _OFFSCREEN_APP
+
+    from vispy import app
+    errors = []
+    for name in ([backend] if backend is not None else _OFFSCREEN_BACKENDS):
+        # Without a display server, EGL needs the surfaceless platform, and PyOpenGL (used by the gl+ backend) must
+        # load the same library as the canvas. The variables of a failed attempt are restored before the next one.
+        variables = {'PYOPENGL_PLATFORM': name.lower()}
+        if name.lower() == 'egl':
+            variables['EGL_PLATFORM'] = os.environ.get('EGL_PLATFORM', 'surfaceless')
+        previous = {key: os.environ.get(key) for key in variables}
+        os.environ.update(variables)
+        try:
+            _OFFSCREEN_APP = app.Application(name)
+            _use_instanced_gl()
+            return _OFFSCREEN_APP
+        except Exception as e:
+            _OFFSCREEN_APP = None
+            errors.append(f"{name}: {e}")
+            for key, value in previous.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+    raise RuntimeError("No headless backend is available for offscreen rendering:\n" + "\n".join(errors))
+
+
+def _use_instanced_gl():
+    """
+    Select the PyOpenGL backend of vispy, 'gl+'. The instanced visuals (AtomsImpostorVisual, BondsVisual and
+    SpinFieldVisual) draw with `glDrawArraysInstanced`, which the default backend does not have. Offscreen canvases
+    select it when they are created; in other displays select it with `vispy.use(gl='gl+')` before creating a canvas.
+    """
+    from vispy.gloo import gl
+    try:
+        gl.use_gl('gl+')
+    except Exception as e:
+        raise RuntimeError(f"Offscreen rendering needs the 'gl+' backend of vispy, which uses PyOpenGL: {e}") from e
+
 
 class Canvas:
     """
     This class is a wrapper around the various canvases that can be used to display the crystal.
     """
-    def __init__(self, display: Optional[Literal['app', 'jupyter', 'qml']] = None, **kwargs):
+    def __init__(self, display: Optional[Literal['app', 'jupyter', 'qml', 'offscreen']] = None, **kwargs):
         """
         Initialise the canvas and set the display mode. The display mode can be one of:
         - app: A standalone application
         - jupyter: A jupyter notebook
         - qml: A qml application
+        - offscreen: A headless canvas (EGL or OSMesa) which is drawn with `render`. The headless backend can be
+          chosen with the `backend` keyword.
 
         :param display: The display mode
         :param kwargs: Additional arguments to pass to the canvas
@@ -61,6 +124,12 @@ class Canvas:
             opts = _CANVAS_DEFAULTS[display].copy()
             opts.update(kwargs)
             self._canvas = CrystalCanvas(**opts)
+        elif display == 'offscreen':
+            from crysvue.canvases.vispy import CrystalCanvas
+            opts = _CANVAS_DEFAULTS[display].copy()
+            opts.update(kwargs)
+            self.app = _offscreen_app(opts.pop('backend', None))
+            self._canvas = CrystalCanvas(app=self.app, **opts)
         elif display == 'qml':
             raise NotImplementedError(f"Display mode {display} not implemented")
         self.mode = display
@@ -77,16 +146,70 @@ class Canvas:
         else:
             raise NotImplementedError(f"Display mode {self.mode} not implemented")
 
-    def add_visual(self, element: V) -> NoReturn:
+    def add_visual(self, element: V):
         """
-        Adds a visual element to the canvas
+        Adds a visual element to the canvas and returns the backend visual which was created for it
         """
         if self._canvas is not None:
             visual_element = element._LABEL
             if visual_element not in self._canvas.components:
                 raise ValueError(f"Element {visual_element} not in canvas")
             visual_cls = self._canvas.components[visual_element]
-            self._canvas.add_visual(visual_element.lower(), element._generate_visual(visual_cls))
+            visual = element._generate_visual(visual_cls)
+            self._canvas.add_visual(visual_element.lower(), visual)
+            return visual
+        else:
+            raise NotImplementedError(f"Display mode {self.mode} not implemented")
+
+    def clear(self) -> NoReturn:
+        """
+        Removes all visual elements from the canvas, so that it can be reused for another scene
+        """
+        if self._canvas is not None:
+            self._canvas.clear()
+        else:
+            raise NotImplementedError(f"Display mode {self.mode} not implemented")
+
+    def reset_camera(self) -> NoReturn:
+        """
+        Sets the camera range to fit all visual elements
+        """
+        if self._canvas is not None:
+            self._canvas.view.camera.set_range()
+        else:
+            raise NotImplementedError(f"Display mode {self.mode} not implemented")
+
+    def enable_lod(self, **kwargs) -> list:
+        """
+        Draw distant or sub-pixel atoms as flat points, or not at all, depending on their size on screen. Atoms outside
+        the view, or outside the `clip_planes` keyword, are not drawn.
+        """
+        if self._canvas is not None:
+            return self._canvas.enable_lod(**kwargs)
+        else:
+            raise NotImplementedError(f"Display mode {self.mode} not implemented")
+
+    def save_scene(self, path: str) -> NoReturn:
+        """
+        Save the expanded atoms and the unit cells of the canvas to a scene directory, which `load_scene` draws
+        again without expanding the symmetry. The arrays are stored as .npy files with a JSON header.
+
+        :param path: Directory of the scene
+        """
+        if self._canvas is not None:
+            self._canvas.save_scene(path)
+        else:
+            raise NotImplementedError(f"Display mode {self.mode} not implemented")
+
+    def load_scene(self, path: str) -> list:
+        """
+        Add the visuals of a scene directory written by `save_scene`. The arrays are memory-mapped.
+
+        :param path: Directory of the scene
+        :return: The created backend visuals
+        """
+        if self._canvas is not None:
+            return self._canvas.load_scene(path)
         else:
             raise NotImplementedError(f"Display mode {self.mode} not implemented")
 
@@ -94,16 +217,31 @@ class Canvas:
     def available_backends(self) -> List[str]:
         return list(_CANVAS_DEFAULTS.keys())
 
+    def render(self, size: Optional[Tuple[int, int]] = None, bgcolor=None) -> np.ndarray:
+        """
+        Draw the scene into an image.
+
+        :param size: Size of the image as (width, height). If None the size of the canvas is used.
+        :param bgcolor: Background color. If None the background of the canvas is used.
+        :return: (height, width, 4) uint8 RGBA array
+        """
+        if self._canvas is not None:
+            return self._canvas.render(size=size, bgcolor=bgcolor)
+        else:
+            raise NotImplementedError(f"Display mode {self.mode} not implemented")
+
     def run(self) -> Optional[VisualCanvas]:
         """
         Run the canvas. This will either start the application or return the canvas object
         Returns:
-            The canvas object if in jupyter mode
+            The canvas object if in jupyter mode, or the rendered image if in offscreen mode
         """
 
         if self.mode == 'app':
             self.app.run()
         elif self.mode == 'jupyter':
             return self._canvas
+        elif self.mode == 'offscreen':
+            return self.render()
         else:
             raise NotImplementedError(f"Display mode {self.mode} not implemented")
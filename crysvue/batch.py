@@ -0,0 +1,138 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import os
+from collections import deque
+from typing import Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union, TYPE_CHECKING
+
+import numpy as np
+
+from crysvue import Canvas
+from crysvue.logic.atoms import AtomsLogic
+from crysvue.logic.cache import expand_positions_cached, orbit_key, store_orbit
+from crysvue.visual.generic import Atoms, UnitCell
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    import numpy.typing as npt
+
+
+class Structure(NamedTuple):
+    """
+    Description of a structure to render
+    """
+    lattice_matrix: npt.ArrayLike
+    positions: npt.ArrayLike
+    species: Sequence[str]
+    symmetry_str: Union[str, int]
+    name: Optional[str] = None
+
+
+def _as_structure(structure: Union[Structure, Mapping]) -> Structure:
+    if isinstance(structure, Structure):
+        return structure
+    return Structure(**structure)
+
+
+def _expand_structure(structure: Structure, extent: Tuple[int, int, int]) -> list:
+    """
+    Expand the orbit of every atom in a structure. This runs in a worker process and returns the orbits with their
+    cache keys, so that they can be stored in the orbit cache of the rendering process.
+    """
+    return [(orbit_key(structure.symmetry_str, position, extent),
+             expand_positions_cached(structure.symmetry_str, position, extent))
+            for position in np.asarray(structure.positions, dtype=float).reshape(-1, 3)]
+
+
+def render_structures(structures: Iterable[Union[Structure, Mapping]], size: Tuple[int, int] = (256, 256),
+                      extent: Tuple[int, int, int] = (1, 1, 1), unit_cell: bool = True,
+                      executor: Optional[Executor] = None, processes: Optional[int] = None,
+                      prefetch: Optional[int] = None, **canvas_kwargs) -> Iterator[Tuple[Structure, np.ndarray]]:
+    """
+    Render a stream of structures with a single offscreen canvas. Symmetry expansion runs ahead of rendering in a
+    pool of worker processes, and the expanded orbits are handed to the orbit cache so that building the visuals in
+    this process does not repeat it. The visuals of each structure are swapped into the same canvas and GL context.
+
+    :param structures: Structures, or mappings with the fields of `Structure`
+    :param size: Size of the images as (width, height)
+    :param extent: Number of unit cells to draw along each axis
+    :param unit_cell: Whether to draw the unit cell
+    :param executor: Executor to run the symmetry expansion in. If None a process pool is created.
+    :param processes: Number of worker processes of the created pool. If 0, expansion runs in this process.
+    :param prefetch: Number of structures to expand ahead of rendering. Defaults to twice the number of workers.
+    :param canvas_kwargs: Additional arguments for the offscreen `Canvas`
+    :return: Iterator over (structure, (height, width, 4) uint8 RGBA image) pairs, in input order
+    """
+    extent = tuple(int(e) for e in extent)
+    structures = (_as_structure(structure) for structure in structures)
+
+    own_executor = executor is None and processes != 0
+    if own_executor:
+        from concurrent.futures import ProcessPoolExecutor
+        # The pool is started before the GL context is created, so that no worker inherits it
+        executor = ProcessPoolExecutor(processes)
+    if prefetch is None:
+        prefetch = 2 * (processes or os.cpu_count() or 1)
+
+    canvas = Canvas(display='offscreen', size=size, **canvas_kwargs)
+    pending = deque()
+    try:
+        for structure in structures:
+            if executor is not None:
+                pending.append((structure, executor.submit(_expand_structure, structure, extent)))
+            else:
+                pending.append((structure, None))
+            if len(pending) > prefetch:
+                yield _render_structure(canvas, *pending.popleft(), extent=extent, unit_cell=unit_cell)
+        while pending:
+            yield _render_structure(canvas, *pending.popleft(), extent=extent, unit_cell=unit_cell)
+    finally:
+        for _, future in pending:
+            if future is not None:
+                future.cancel()
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+def _render_structure(canvas: Canvas, structure: Structure, future, extent: Tuple[int, int, int],
+                      unit_cell: bool) -> Tuple[Structure, np.ndarray]:
+    if future is not None:
+        for key, orbit in future.result():
+            store_orbit(key, orbit)
+    positions, sizes, colors, symmetry_str = AtomsLogic._from_atom_name(structure.positions, structure.species,
+                                                                        structure.symmetry_str)
+    canvas.clear()
+    if unit_cell:
+        canvas.add_visual(UnitCell(lattice_matrix=structure.lattice_matrix, extent=extent))
+    canvas.add_visual(Atoms(positions=positions, sizes=sizes, colors=colors, symmetry_str=symmetry_str,
+                            lattice_matrix=structure.lattice_matrix, extent=extent))
+    canvas.reset_camera()
+    return structure, canvas.render()
+
+
+def save_thumbnails(structures: Iterable[Union[Structure, Mapping]], directory: str,
+                    name_format: str = '{index:06d}.png', **kwargs) -> List[str]:
+    """
+    Render a stream of structures and write each image to a PNG file as soon as it is rendered.
+
+    :param structures: Structures, or mappings with the fields of `Structure`
+    :param directory: Directory to write the images to. It is created if needed.
+    :param name_format: Format of the file names, given the `index` and `name` of each structure
+    :param kwargs: Additional arguments for `render_structures`
+    :return: Paths of the written files
+    """
+    from vispy.io import write_png
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, (structure, image) in enumerate(render_structures(structures, **kwargs)):
+        path = os.path.join(directory, name_format.format(index=index, name=structure.name))
+        write_png(path, image)
+        paths.append(path)
+    return paths
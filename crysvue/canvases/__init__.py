@@ -16,6 +16,9 @@ class VisualCanvas(Protocol):
     def remove_visual(self, key: str, element):
         pass
 
+    def clear(self):
+        pass
+
     @property
     def components(self) -> Dict[str, type]:
         pass
@@ -22,6 +22,7 @@ class CrystalCanvas(SceneCanvas):
         super(CrystalCanvas, self).__init__(*args, **kwargs)
         self.unfreeze()
         self._elements = {k: dict() for k in ['atoms', 'bonds', 'axes', 'spins', 'unitcell']}
+        self._axes_views = {}
         self.view = self.central_widget.add_view()
         self.view.camera = camera
         if bg_color is not None:
@@ -40,6 +41,10 @@ class CrystalCanvas(SceneCanvas):
         self.unfreeze()
         if 'axis' in key:
             key = 'axes'
+        elif 'atoms' in key:
+            key = 'atoms'
+        elif 'spin' in key:
+            key = 'spins'
         self._elements[key][element.name] = element
         if key == 'axes':
             vb = self.central_widget.add_view(camera='arcball')
@@ -52,6 +57,7 @@ class CrystalCanvas(SceneCanvas):
             vb.camera.link(self.view.camera, props=('center', 'fov', '_quaternion'))
             callback = self._generate_resize_event(vb)
             self.events.resize.connect(callback)
+            self._axes_views[element.name] = (vb, callback)
         else:
             element.parent = self.view.scene
         self.freeze()
@@ -60,15 +66,78 @@ class CrystalCanvas(SceneCanvas):
         self.unfreeze()
         if 'axis' in key:
             key = 'axes'
+        elif 'atoms' in key:
+            key = 'atoms'
+        elif 'spin' in key:
+            key = 'spins'
         del self._elements[key][element.name]
+        if key == 'axes':
+            # The view box of the axes is removed with the resize handler and the camera link which update it
+            view_box, callback = self._axes_views.pop(element.name)
+            self.events.resize.disconnect(callback)
+            self.view.camera._linked_cameras.pop(view_box.camera, None)
+            element.parent = None
+            self.central_widget.remove_widget(view_box)
+        else:
+            element.parent = None
         self.freeze()
 
+    def clear(self) -> NoReturn:
+        for key, elements in self._elements.items():
+            for element in list(elements.values()):
+                self.remove_visual(key, element)
+
+    def enable_lod(self, **kwargs) -> list:
+        """
+        Attach a level-of-detail and culling controller to every atoms marker visual in the canvas.
+
+        :param kwargs: Additional arguments for `AtomsLOD`
+        :return: The created controllers
+        """
+        from crysvue.visual.vispy.atoms import AtomsVisual
+        from crysvue.visual.vispy.lod import AtomsLOD
+        return [AtomsLOD(element, self.view, **kwargs) for element in self._elements['atoms'].values()
+                if isinstance(element, AtomsVisual)]
+
+    def save_scene(self, path: str) -> NoReturn:
+        """
+        Write the expanded atoms and the unit cells of the canvas to a scene directory, see `crysvue.io.scene`.
+        """
+        from crysvue.io.scene import save_scene
+        from crysvue.visual.vispy.atoms import AtomsVisual
+        from crysvue.visual.vispy.unit_cell import UnitCellVisual
+        save_scene(path, atoms=[element for element in self._elements['atoms'].values()
+                                if isinstance(element, AtomsVisual)],
+                   unit_cells=[element for element in self._elements['unitcell'].values()
+                               if isinstance(element, UnitCellVisual)])
+
+    def load_scene(self, path: str) -> list:
+        """
+        Add the atoms and unit cells of a scene directory to the canvas, without expanding the symmetry again.
+
+        :return: The created visuals
+        """
+        from crysvue.io.scene import load_scene
+        scene = load_scene(path)
+        created = []
+        for kwargs in scene['unit_cells']:
+            unit_cell = vp_visuals.UnitCell(color=kwargs['color'])
+            unit_cell.set_data(kwargs['points'], kwargs['edges'])
+            self.add_visual('unitcell', unit_cell)
+            created.append(unit_cell)
+        for kwargs in scene['atoms']:
+            atoms = vp_visuals.Atoms(**kwargs)
+            self.add_visual('atoms', atoms)
+            created.append(atoms)
+        return created
+
     def on_draw(self, event) -> NoReturn:
         super().on_draw(event)
 
     @property
     def components(self) -> Dict[str, VC]:
-        return {component_key: component for component_key, component in vp_visuals.__dict__.items() if isinstance(component, type) and component_key[0] != '_'}
+        # The visual nodes are created when they are first looked up
+        return {component_key: getattr(vp_visuals, component_key) for component_key in vp_visuals.__all__}
 
     def create_component(self, component_key: str, *args, **kwargs) -> V:
         return self.components[component_key](*args, **kwargs)
@@ -0,0 +1,514 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+"""
+Streaming reader of CIF files. Files are tokenized one line at a time and data blocks are parsed one after another,
+so a file with many structures is never held in memory. The lattice, the symmetry and the atom sites of a block are
+returned as numpy arrays, ready for `AtomsLogic.from_atom_name`.
+"""
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import contextlib
+import functools
+import gzip
+import os
+import re
+from fractions import Fraction
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+
+import numpy as np
+
+from crysvue.logic.elements import ELEMENT_INDEX
+from crysvue.logic.spacegroups import (N_HALL_NUMBERS, TRANSLATION_DENOMINATOR, SpaceGroupSymmetry, find_hall_number,
+                                       spacegroup_setting, spacegroup_settings)
+
+if TYPE_CHECKING:
+    from crysvue.batch import Structure
+    from crysvue.visual.generic import Atoms, UnitCell
+
+Source = Union[str, os.PathLike, IO[str]]
+
+# Tags of the cell parameters, lengths in Angstrom and angles in degrees
+CELL_TAGS = ('_cell_length_a', '_cell_length_b', '_cell_length_c',
+             '_cell_angle_alpha', '_cell_angle_beta', '_cell_angle_gamma')
+# Tags of the symmetry, in the CIF 2 spelling then the older CIF 1 one. Tags are compared in lower case.
+HALL_TAGS = ('_space_group_name_hall', '_symmetry_space_group_name_hall')
+HM_TAGS = ('_space_group_name_h-m_alt', '_symmetry_space_group_name_h-m')
+NUMBER_TAGS = ('_space_group_it_number', '_symmetry_int_tables_number')
+OPERATOR_TAGS = ('_space_group_symop_operation_xyz', '_symmetry_equiv_pos_as_xyz')
+
+# A value in quotes ends at a quote followed by white space. A comment runs to the end of the line.
+_TOKEN = re.compile(r"""'(.*?)'(?=\s|$)|"(.*?)"(?=\s|$)|(#.*)|(\S+)""")
+_TERM = re.compile(r'([+-]?)([^+-]+)')
+_LETTERS = re.compile(r'[A-Za-z]*')
+# Values which are unknown, '?', or inapplicable, '.'
+_MISSING = {'?': 'nan', '.': 'nan'}
+# Hydrogen isotopes, which are not in the element tables
+_ISOTOPES = {'D': 'H', 'T': 'H'}
+
+
+class _Quoted(str):
+    """
+    A value which was quoted or a text field, so is never a tag or a keyword
+    """
+
+
+class CifBlock:
+    """
+    A data block of a CIF file: its single values and its loops. Tags are in lower case, with the '.' of CIF 2 tags
+    replaced by '_', so that '_atom_site.fract_x' is '_atom_site_fract_x'.
+    """
+
+    def __init__(self, name: str, items: Dict[str, str], loops: List[Dict[str, List[str]]]):
+        self._name = name
+        self._items = items
+        self._loops = loops
+        self._loop_index = {tag: index for index, loop in enumerate(loops) for tag in loop}
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def items(self) -> Dict[str, str]:
+        """
+        The values of the tags which are not in a loop
+        """
+        return self._items
+
+    @property
+    def loops(self) -> List[Dict[str, List[str]]]:
+        return self._loops
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._items or tag in self._loop_index
+
+    def get(self, tag: str, default=None) -> Optional[str]:
+        """
+        The value of a tag. A tag in a loop gives its first value.
+        """
+        if tag in self._items:
+            return self._items[tag]
+        if tag in self._loop_index:
+            column = self._loops[self._loop_index[tag]][tag]
+            return column[0] if column else default
+        return default
+
+    def loop(self, tag: str) -> Dict[str, np.ndarray]:
+        """
+        The loop which contains a tag, as numpy string columns. A tag with a single value gives a loop of one row.
+
+        :param tag: Any tag of the loop
+        :return: Columns of the loop, by tag
+        """
+        if tag in self._loop_index:
+            return {key: np.array(values, dtype=str) for key, values in self._loops[self._loop_index[tag]].items()}
+        if tag in self._items:
+            return {tag: np.array([self._items[tag]], dtype=str)}
+        raise KeyError(f"Tag {tag} not found in block {self._name}")
+
+    def _first(self, tags: Iterable[str]) -> Optional[str]:
+        for tag in tags:
+            value = self.get(tag)
+            if value not in (None, '?', '.'):
+                return value
+        return None
+
+    @property
+    def cell(self) -> np.ndarray:
+        """
+        The cell parameters (a, b, c, alpha, beta, gamma), in Angstrom and degrees
+        """
+        missing = [tag for tag in CELL_TAGS if tag not in self]
+        if missing:
+            raise ValueError(f"Block {self._name} has no {', '.join(missing)}")
+        return parse_floats([self.get(tag) for tag in CELL_TAGS])
+
+    @property
+    def lattice_matrix(self) -> np.ndarray:
+        """
+        (3, 3) lattice vectors as rows, in Angstrom
+        """
+        return lattice_matrix(*self.cell)
+
+    @property
+    def symmetry_str(self) -> Union[int, str]:
+        """
+        The symmetry of the block, as a Hall number when it is tabulated and otherwise as its list of operators
+        """
+        operators = None
+        for tag in OPERATOR_TAGS:
+            if tag in self._loop_index:
+                operators = self._loops[self._loop_index[tag]][tag]
+                break
+        number = self._first(NUMBER_TAGS)
+        return resolve_symmetry(hall=self._first(HALL_TAGS), hm=self._first(HM_TAGS),
+                                number=None if number is None else int(number), operators=operators)
+
+    @property
+    def has_atom_sites(self) -> bool:
+        return '_atom_site_fract_x' in self._loop_index
+
+    @property
+    def atom_sites(self) -> Dict[str, np.ndarray]:
+        """
+        The atom sites of the block, without dummy atoms.
+
+        :return: Columns 'label' and 'symbol', the (N, 3) fractional 'positions' and the 'occupancy' of the sites
+        """
+        if not self.has_atom_sites:
+            raise ValueError(f"Block {self._name} has no _atom_site_fract_x")
+        # The string columns of the loop, which are only converted to arrays as needed
+        columns = self._loops[self._loop_index['_atom_site_fract_x']]
+        positions = parse_floats([columns[f'_atom_site_fract_{axis}'] for axis in 'xyz']).T
+        if np.isnan(positions).any():
+            raise ValueError(f"Block {self._name} has atom sites without a position")
+        labels = columns.get('_atom_site_label', columns.get('_atom_site_type_symbol'))
+        if labels is None:
+            raise ValueError(f"Block {self._name} has no _atom_site_label or _atom_site_type_symbol")
+        symbols = element_symbols(columns.get('_atom_site_type_symbol', labels))
+        occupancy = parse_floats(columns['_atom_site_occupancy']) if '_atom_site_occupancy' in columns else \
+            np.ones(len(positions))
+        # Dummy atoms mark e.g. the centroid of a ring, and are not atoms
+        flags = columns.get('_atom_site_calc_flag')
+        keep = slice(None) if flags is None else np.char.lower(np.array(flags, dtype=str)) != 'dum'
+        return {
+            'label':     np.array(labels, dtype=str)[keep],
+            'symbol':    symbols[keep],
+            'positions': positions[keep],
+            'occupancy': np.where(np.isnan(occupancy), 1.0, occupancy)[keep],
+        }
+
+    def to_structure(self) -> Structure:
+        """
+        The structure of the block, to render with `crysvue.batch.render_structures`
+        """
+        from crysvue.batch import Structure
+
+        sites = self.atom_sites
+        return Structure(self.lattice_matrix, sites['positions'], sites['symbol'], self.symmetry_str, self._name)
+
+    def to_visuals(self, extent=(1, 1, 1), center=None, **kwargs) -> Tuple[UnitCell, Atoms]:
+        """
+        Generic unit cell and atoms visuals of the block, with element sizes and colors from
+        `AtomsLogic.from_atom_name`.
+
+        :param extent: Number of unit cells along each axis
+        :param center: Fractional coordinate placed at the origin
+        :param kwargs: Additional arguments for the atoms
+        """
+        from crysvue.logic.atoms import AtomsLogic
+        from crysvue.visual.generic import Atoms, UnitCell
+
+        sites = self.atom_sites
+        lattice = self.lattice_matrix
+        positions, sizes, colors, symmetry_str = AtomsLogic._from_atom_name(sites['positions'], sites['symbol'],
+                                                                            self.symmetry_str)
+        return (UnitCell(lattice_matrix=lattice, extent=extent, center=center),
+                Atoms(positions=positions, sizes=sizes, colors=colors, symmetry_str=symmetry_str,
+                      lattice_matrix=lattice, extent=extent, center=center, **kwargs))
+
+    def __repr__(self) -> str:
+        return f"<CifBlock {self._name}: {len(self._items)} items, {len(self._loops)} loops>"
+
+
+def parse_floats(values: Iterable[str]) -> np.ndarray:
+    """
+    Numbers of CIF values, without their standard uncertainty, e.g. '5.431(2)'. The unknown '?' and inapplicable '.'
+    values are NaN.
+    """
+    values = np.asarray(values, dtype=str)
+    numbers = [value.partition('(')[0] for value in values.ravel().tolist()]
+    try:
+        floats = np.array(numbers, dtype=float)
+    except ValueError:
+        floats = np.array([_MISSING.get(number, number) for number in numbers], dtype=float)
+    return floats.reshape(values.shape)
+
+
+def lattice_matrix(a: float, b: float, c: float, alpha: float, beta: float, gamma: float) -> np.ndarray:
+    """
+    Lattice vectors of the cell parameters, as rows, with a along x and b in the xy plane
+
+    :return: (3, 3) matrix which takes fractional coordinates, as rows, to Cartesian coordinates
+    """
+    cos_alpha, cos_beta, cos_gamma = np.cos(np.radians([alpha, beta, gamma]))
+    sin_gamma = np.sin(np.radians(gamma))
+    cy = (cos_alpha - cos_beta * cos_gamma) / sin_gamma
+    return np.array([[a, 0, 0],
+                     [b * cos_gamma, b * sin_gamma, 0],
+                     [c * cos_beta, c * cy, c * np.sqrt(1 - cos_beta ** 2 - cy ** 2)]])
+
+
+@functools.lru_cache(maxsize=None)
+def _element_symbol(label: str) -> str:
+    letters = _LETTERS.match(label).group()
+    one, two = letters[:1].upper(), letters[:2].capitalize()
+    if len(letters) > 1 and letters[1].islower() and two in ELEMENT_INDEX:
+        return two
+    if one in ELEMENT_INDEX or one in _ISOTOPES:
+        return _ISOTOPES.get(one, one)
+    return two if two in ELEMENT_INDEX else letters
+
+
+def element_symbols(labels: Iterable[str]) -> np.ndarray:
+    """
+    Element symbols of atom type symbols or labels, e.g. 'Fe3+' or 'O1a', found once per distinct label.
+    """
+    unique, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    return np.array([_element_symbol(label) for label in unique] or [''])[inverse.reshape(-1)]
+
+
+def parse_operator(operator: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rotation and translation of a symmetry operator in coordinate form, e.g. '-x+1/2, y, -z'
+
+    :return: (3, 3) int rotation and (3,) translation
+    """
+    rows = operator.replace(' ', '').lower().split(',')
+    if len(rows) != 3:
+        raise ValueError(f"Symmetry operator {operator} does not have three components")
+    rotation = np.zeros((3, 3), dtype=int)
+    translation = np.zeros(3)
+    for row, component in enumerate(rows):
+        for sign, term in _TERM.findall(component):
+            factor = -1 if sign == '-' else 1
+            axis = 'xyz'.find(term[-1])
+            if axis < 0:
+                translation[row] += factor * float(Fraction(term))
+            else:
+                coefficient = term[:-1].rstrip('*')
+                rotation[row, axis] += factor * (int(coefficient) if coefficient else 1)
+    return rotation, translation
+
+
+def _operator_set(rotations: np.ndarray, translations: np.ndarray) -> Optional[frozenset]:
+    """
+    Operators compared as a set, with translations reduced to multiples of 1/TRANSLATION_DENOMINATOR in [0, 1). None
+    when a translation is not such a multiple, as no tabulated setting then matches.
+    """
+    steps = np.asarray(translations, dtype=float) * TRANSLATION_DENOMINATOR
+    numerators = np.rint(steps)
+    if not np.allclose(steps, numerators, atol=1e-6):
+        return None
+    rows = np.concatenate([np.asarray(rotations).reshape(-1, 9), np.mod(numerators, TRANSLATION_DENOMINATOR)], axis=1)
+    return frozenset(map(tuple, rows.astype(int).tolist()))
+
+
+@functools.lru_cache(maxsize=None)
+def _setting_operators(hall_number: int) -> Optional[frozenset]:
+    symmetry = SpaceGroupSymmetry(hall_number)
+    return _operator_set(symmetry.W, symmetry.w)
+
+
+@functools.lru_cache(maxsize=1024)
+def _match_operators(operators: Tuple[str, ...], number: Optional[int]) -> Optional[int]:
+    """
+    Hall number of the setting with the same operators, among the settings of a space group or, without its number,
+    among all the settings with as many operators
+    """
+    rotations, translations = zip(*map(parse_operator, operators))
+    key = _operator_set(np.array(rotations), np.array(translations))
+    if key is None:
+        return None
+    candidates = range(1, N_HALL_NUMBERS + 1) if number is None else spacegroup_settings(number)
+    for hall_number in candidates:
+        hall_number = int(hall_number)
+        if len(SpaceGroupSymmetry(hall_number)) == len(key) and _setting_operators(hall_number) == key:
+            return hall_number
+    return None
+
+
+def resolve_symmetry(hall: Optional[str] = None, hm: Optional[str] = None, number: Optional[int] = None,
+                     operators: Optional[Iterable[str]] = None) -> Union[int, str]:
+    """
+    The symmetry of a structure from its space-group symbols and operators. A Hall symbol identifies the setting. A
+    Hermann-Mauguin symbol or a space-group number only identify the setting together with the operators, e.g. the
+    origin choice of 'F d -3 m', so the operators are matched to the tabulated settings. Operators which match no
+    tabulated setting are returned as they are.
+
+    :param hall: Hall symbol
+    :param hm: Hermann-Mauguin symbol
+    :param number: International Tables number
+    :param operators: Symmetry operators in coordinate form
+    :return: Hall number, or operators 'x,y,z;-x,-y,-z' for `brille.Symmetry`. Without any symmetry, P 1.
+    """
+    if hall is not None:
+        with contextlib.suppress(ValueError):
+            return find_hall_number(hall_symbol=hall)
+    hall_number = None
+    if hm is not None:
+        with contextlib.suppress(ValueError):
+            hall_number = find_hall_number(hm=hm)
+            number = spacegroup_setting(hall_number).number
+    if hall_number is None and number is not None:
+        with contextlib.suppress(ValueError):
+            hall_number = find_hall_number(it_number=number)
+    operators = None if operators is None else tuple(op.replace(' ', '') for op in operators)
+    if operators:
+        match = _match_operators(operators, number)
+        return ';'.join(operators) if match is None else match
+    if hall_number is not None:
+        return hall_number
+    if hall is not None or hm is not None or number is not None:
+        raise ValueError(f"Space group {hall or hm or number} not found")
+    return 1
+
+
+def _open(source: Source, binary: bool = False):
+    if not isinstance(source, (str, os.PathLike)):
+        return contextlib.nullcontext(source)
+    if os.fspath(source).endswith('.gz'):
+        return gzip.open(source, 'rb') if binary else gzip.open(source, 'rt', encoding='utf-8', errors='replace')
+    return open(source, 'rb') if binary else open(source, 'r', encoding='utf-8', errors='replace')
+
+
+def _line_tokens(lines: Iterable[str]) -> Iterator[Tuple[List[str], bool]]:
+    """
+    Tokens of each CIF line, and whether they can only be values, so that the rows of a loop are taken a line at a
+    time. Quoted values and text fields are returned without their delimiters, as `_Quoted`.
+    """
+    text = None
+    for line in lines:
+        if line[:1] == ';':
+            # A text field runs from a ';' at the start of a line to the next one
+            if text is None:
+                text = [line[1:].rstrip('\r\n')]
+                continue
+            # The first line of a text field is usually empty
+            yield [_Quoted('\n'.join(text[1:] if text[0] == '' else text))], True
+            text = None
+            line = line[1:]
+        elif text is not None:
+            text.append(line.rstrip('\r\n'))
+            continue
+        if "'" not in line and '"' not in line and '#' not in line:
+            # Tags and keywords all contain '_'
+            yield line.split(), '_' not in line
+            continue
+        tokens = []
+        for single, double, comment, bare in _TOKEN.findall(line):
+            if comment:
+                break
+            tokens.append(bare if bare else _Quoted(single or double))
+        yield tokens, False
+    if text is not None:
+        raise ValueError("Text field is not closed")
+
+
+def _is_value(token: str) -> bool:
+    return type(token) is _Quoted or token[0] != '_' and token[:5].lower() not in ('data_', 'loop_', 'save_') \
+        and token.lower() not in ('global_', 'stop_')
+
+
+def iter_blocks(source: Source, offset: int = 0) -> Iterator[CifBlock]:
+    """
+    Parse the data blocks of a CIF file one at a time. Only the block being parsed is held in memory, so large files
+    of many structures can be scanned.
+
+    :param source: Path of the file, which may be gzipped, or an open text file
+    :param offset: Position in a file path to start from, e.g. of a block found by `index_blocks`
+    """
+    with _open(source) as f:
+        if offset:
+            f.seek(offset)
+        name, items, loops = None, {}, []
+        tag, loop_tags, loop_values = None, None, None
+
+        def end_loop():
+            if loop_tags:
+                if len(loop_values) % len(loop_tags):
+                    raise ValueError(f"Loop of {loop_tags[0]} in block {name} has an incomplete row")
+                loops.append({key: loop_values[i::len(loop_tags)] for i, key in enumerate(loop_tags)})
+
+        for tokens, values_only in _line_tokens(f):
+            if values_only and loop_tags is not None and tag is None:
+                loop_values.extend(tokens)
+                continue
+            for token in tokens:
+                if _is_value(token):
+                    if tag is not None:
+                        items[tag] = token
+                        tag = None
+                    elif loop_tags is not None:
+                        loop_values.append(token)
+                    else:
+                        raise ValueError(f"Value {token} in block {name} has no tag")
+                    continue
+                if tag is not None:
+                    raise ValueError(f"Tag {tag} in block {name} has no value")
+                if token[0] == '_':
+                    token = token.lower().replace('.', '_')
+                    if loop_tags is not None and not loop_values:
+                        loop_tags.append(token)
+                    else:
+                        end_loop()
+                        loop_tags = None
+                        tag = token
+                    continue
+                end_loop()
+                loop_tags = None
+                keyword = token[:5].lower()
+                if keyword == 'loop_':
+                    loop_tags, loop_values = [], []
+                elif keyword == 'data_':
+                    if name is not None or items or loops:
+                        yield CifBlock(name, items, loops)
+                    name, items, loops = token[5:], {}, []
+        if tag is not None:
+            raise ValueError(f"Tag {tag} in block {name} has no value")
+        end_loop()
+        if name is not None or items or loops:
+            yield CifBlock(name, items, loops)
+
+
+def index_blocks(path: Union[str, os.PathLike]) -> List[Tuple[str, int]]:
+    """
+    Find the data blocks of a CIF file without parsing them, to read them later with `iter_blocks`
+
+    :param path: Path of the file, which may be gzipped
+    :return: Name of each block and its position in the file
+    """
+    blocks = []
+    with _open(path, binary=True) as f:
+        position = 0
+        text = False
+        for line in f:
+            if line[:1] == b';':
+                text = not text
+            elif not text and line[:5].lower() == b'data_':
+                name = line[5:].split(maxsplit=1)
+                blocks.append((name[0].decode('utf-8', 'replace') if name else '', position))
+            position += len(line)
+    return blocks
+
+
+def read_block(source: Source, name: Optional[str] = None) -> CifBlock:
+    """
+    Parse one data block of a CIF file, reading the file only up to the end of the block.
+
+    :param source: Path of the file or an open text file
+    :param name: Name of the block. By default the first block with atom sites.
+    """
+    for block in iter_blocks(source):
+        if block.name == name if name is not None else block.has_atom_sites:
+            return block
+    raise KeyError(f"Block {name} not found" if name is not None else "No block has atom sites")
+
+
+def iter_structures(source: Source, offset: int = 0) -> Iterator[Structure]:
+    """
+    The structures of the data blocks of a CIF file which have atom sites, one at a time. They can be rendered as
+    they are read with `crysvue.batch.render_structures`.
+
+    :param source: Path of the file or an open text file
+    :param offset: Position in a file path to start from
+    """
+    for block in iter_blocks(source, offset):
+        if block.has_atom_sites:
+            yield block.to_structure()
@@ -0,0 +1,131 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from crysvue.misc.color import to_rgba
+
+if TYPE_CHECKING:
+    from crysvue.visual.vispy.atoms import AtomsVisual
+    from crysvue.visual.vispy.unit_cell import UnitCellVisual
+
+# A scene is a directory with a JSON header and one .npy file per array, so that arrays can be memory-mapped
+SCENE_FORMAT = 'crysvue-scene'
+SCENE_VERSION = 1
+HEADER_FILE = 'scene.json'
+
+# Per-site columns of an atoms dataset, plus the palette and offsets of its atoms
+DATASET_KEYS = ('positions', 'colors', 'sizes', 'operators', 'translations', 'parents', 'offsets', 'palette',
+                'color_index')
+
+
+def save_scene(path: str, atoms: Iterable[AtomsVisual] = (), unit_cells: Iterable[UnitCellVisual] = ()) -> None:
+    """
+    Write fully expanded atoms and unit cells to a scene directory, so that they can be drawn again with
+    `load_scene` without expanding the symmetry. The header is written last, so an interrupted save cannot be loaded.
+
+    :param path: Directory of the scene. It is created if needed, and a scene already in it is replaced.
+    :param atoms: Atoms visuals. A lazy supercell is completed first.
+    :param unit_cells: Unit cell visuals
+    """
+    os.makedirs(path, exist_ok=True)
+    header_path = os.path.join(path, HEADER_FILE)
+    if os.path.exists(header_path):
+        os.remove(header_path)
+    header = {'format': SCENE_FORMAT, 'version': SCENE_VERSION, 'atoms': [], 'unit_cells': []}
+
+    def write(name: str, array: np.ndarray) -> str:
+        # Replacing the file, rather than writing over it, leaves scenes which are memory-mapped from it intact
+        file_name = f'{name}.npy'
+        with open(os.path.join(path, file_name + '.tmp'), 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(os.path.join(path, file_name + '.tmp'), os.path.join(path, file_name))
+        return file_name
+
+    for index, visual in enumerate(atoms):
+        dataset = visual.generate_full_dataset(visual.extent)
+        arrays = {key: write(f'atoms{index}_{key}', dataset[key]) for key in DATASET_KEYS}
+        arrays['atom_positions'] = write(f'atoms{index}_atom_positions',
+                                         np.array([atom.position for atom in visual.atoms], dtype=float))
+        arrays['atom_sizes'] = write(f'atoms{index}_atom_sizes',
+                                     np.array([atom.size for atom in visual.atoms], dtype=float))
+        arrays['atom_colors'] = write(f'atoms{index}_atom_colors', visual.palette[visual.color_index])
+        symmetry = visual.symmetry_str
+        header['atoms'].append({
+            'symmetry':    int(symmetry) if isinstance(symmetry, (int, np.integer)) else symmetry,
+            'extent':      list(visual.extent),
+            'center':      np.asarray(visual.center, dtype=float).tolist(),
+            'frac_to_abc': np.asarray(visual.frac_to_abc, dtype=float).tolist(),
+            'arrays':      arrays,
+        })
+
+    for index, visual in enumerate(unit_cells):
+        header['unit_cells'].append({
+            'color':  to_rgba(visual.color).tolist(),
+            'arrays': {'points': write(f'unit_cell{index}_points', visual.points),
+                       'edges':  write(f'unit_cell{index}_edges', visual.edges)},
+        })
+
+    with open(header_path, 'w') as f:
+        json.dump(header, f, indent=1)
+
+
+def read_header(path: str) -> dict:
+    """
+    The header of a scene directory, checking its format and version.
+    """
+    with open(os.path.join(path, HEADER_FILE)) as f:
+        header = json.load(f)
+    if header.get('format') != SCENE_FORMAT:
+        raise ValueError(f"{path} is not a crysvue scene")
+    if header.get('version', 0) > SCENE_VERSION:
+        raise ValueError(f"Scene version {header['version']} is newer than the supported version {SCENE_VERSION}")
+    return header
+
+
+def load_scene(path: str, mmap_mode: Optional[str] = 'c') -> Dict[str, List[dict]]:
+    """
+    Read a scene written by `save_scene`. The arrays are memory-mapped, so they are read from disk as they are used.
+
+    :param path: Directory of the scene
+    :param mmap_mode: Memory-map mode of the arrays. The default, copy-on-write, lets the atoms be edited without
+        changing the files. None reads the arrays into memory.
+    :return: Keyword arguments of each visual, as {'atoms': [...], 'unit_cells': [...]}. Atoms arguments are those of
+        `AtomsVisual` with a `dataset`, unit cell arguments are a `color` and the `points` and `edges` to set.
+    """
+    header = read_header(path)
+
+    def read(file_name: str) -> np.ndarray:
+        # Views of the mapping, as indexing a `np.memmap` is slower
+        return np.asarray(np.load(os.path.join(path, file_name), mmap_mode=mmap_mode))
+
+    scene = {'atoms': [], 'unit_cells': []}
+    for record in header['atoms']:
+        arrays = record['arrays']
+        scene['atoms'].append({
+            'position':     read(arrays['atom_positions']),
+            'size':         read(arrays['atom_sizes']),
+            'color':        read(arrays['atom_colors']),
+            'symmetry_str': record['symmetry'],
+            'extent':       tuple(record['extent']),
+            'center':       np.asarray(record['center']),
+            'frac_to_abc':  np.asarray(record['frac_to_abc']),
+            'dataset':      {key: read(arrays[key]) for key in DATASET_KEYS},
+        })
+    for record in header['unit_cells']:
+        scene['unit_cells'].append({
+            'color':  tuple(record['color']),
+            'points': read(record['arrays']['points']),
+            'edges':  read(record['arrays']['edges']),
+        })
+    return scene
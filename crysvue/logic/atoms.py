@@ -7,29 +7,55 @@ from __future__ import annotations
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-import brille
 import numpy as np
 
-from crysvue.misc.color import rgb_to_hex
-from typing import List, Optional, TYPE_CHECKING, Union
+from crysvue.logic.cache import expand_orbits_cached, expand_positions_cached, get_symmetry
+# The element data are also importable from here, where they used to live
+from crysvue.logic.elements import (COLOR_DATA, ELEMENT_DATA, ELEMENT_RADII, ELEMENT_RGBA, RADIUS_DATA,
+                                    atomic_number_index, element_index)
+from crysvue.logic.expansion import cell_blocks, count_positions, expand_positions_in_block, home_cell_orbit
+from crysvue.misc.color import to_rgba, to_rgba_array
+from typing import Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
+    from concurrent.futures import Executor
     import numpy.typing as npt
 
+# Storage types of the per-site columns of an atoms dataset
+POSITION_DTYPE = np.float32
+COLOR_DTYPE = np.float32
+SIZE_DTYPE = np.float32
+OPERATOR_DTYPE = np.int16
+TRANSLATION_DTYPE = np.int16
+PARENT_DTYPE = np.int32
+
+# Unit cells along each axis of a block of a lazily generated supercell
+CHUNK_CELLS = 8
+
 
 class AtomLogic:
-    def __init__(self, position, size, color, symmetry_str):
-        self._symmetry = brille.Symmetry(symmetry_str)
+    def __init__(self, position, size, color, symmetry_str, extent=(1, 1, 1),
+                 orbit: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None, rgba: Optional[np.ndarray] = None):
+        self._symmetry_str = symmetry_str
+        self._symmetry = get_symmetry(symmetry_str)
         self._color = color
+        # Color already converted by the caller
+        self._rgba = to_rgba(color) if rgba is None else rgba
         self._size = size
         self._position = np.asarray(position)
+        self._extent = tuple(np.asarray(extent, dtype=int).tolist())
+        # Orbit of the position in the home cell, which the blocks of a lazy supercell are tiled from
+        self._home_orbit = None
         self._dataset = {
-            'positions':  [],
-            'generators': [],
-            'colors':     [],
-            'sizes':      []
+            'positions':    np.zeros((0, 3)),
+            'operators':    np.zeros(0, dtype=int),
+            'translations': np.zeros((0, 3), dtype=int),
         }
-        self._generate_full_data()
+        if orbit is None:
+            self._generate_full_data(self._extent)
+        else:
+            # Orbit already expanded by the caller, as (positions, operators, translations)
+            self._dataset = dict(zip(('positions', 'operators', 'translations'), orbit))
 
     @property
     def color(self):
@@ -37,10 +63,12 @@ class AtomLogic:
 
     @color.setter
     def color(self, value: Union[str, tuple]):
-        if not isinstance(value, str):
-            value = rgb_to_hex(value)
         self._color = value
-        self._dataset['colors'] = [value] * len(self._dataset['positions'])
+        self._rgba = to_rgba(value)
+
+    @property
+    def rgba(self) -> np.ndarray:
+        return self._rgba
 
     @property
     def size(self):
@@ -49,7 +77,6 @@ class AtomLogic:
     @size.setter
     def size(self, value):
         self._size = value
-        self._dataset['sizes'] = [value] * len(self._dataset['positions'])
 
     @property
     def position(self):
@@ -58,7 +85,8 @@ class AtomLogic:
     @position.setter
     def position(self, value: npt.ArrayLike):
         self._position = np.asarray(value)
-        self._generate_full_data()
+        self._home_orbit = None
+        self._generate_full_data(self._extent)
 
     @property
     def symmetry(self):
@@ -66,79 +94,176 @@ class AtomLogic:
 
     @symmetry.setter
     def symmetry(self, symmetry_str: str):
-        self._symmetry = brille.Symmetry(symmetry_str)
+        self._symmetry_str = symmetry_str
+        self._symmetry = get_symmetry(symmetry_str)
+        self._home_orbit = None
 
     @property
-    def positions(self):
+    def positions(self) -> np.ndarray:
         return self._dataset['positions']
 
     @property
-    def generators(self):
-        return self._dataset['generators']
+    def operators(self) -> np.ndarray:
+        """
+        Index of the symmetry operator which generated each site
+        """
+        return self._dataset['operators']
 
     @property
-    def colors(self) -> List[List[float]]:
-        return self._dataset['colors']
+    def translations(self) -> np.ndarray:
+        """
+        Lattice translation which generated each site
+        """
+        return self._dataset['translations']
 
     @property
-    def sizes(self) -> List[float]:
-        return self._dataset['sizes']
+    def generators(self) -> list:
+        return self._generators(self.operators, self.translations)
+
+    @property
+    def colors(self) -> np.ndarray:
+        return np.broadcast_to(self._rgba, (len(self.positions), 4))
 
-    def generate_full_data(self, extent) -> dict:
-        return self._generate_full_data(extent, set_data=False)
+    @property
+    def sizes(self) -> np.ndarray:
+        return np.broadcast_to(np.asarray(self._size, dtype=SIZE_DTYPE), (len(self.positions),))
+
+    def generate_full_data(self, extent, lower: Optional[npt.ArrayLike] = None,
+                           upper: Optional[npt.ArrayLike] = None) -> dict:
+        """
+        Sites of the atom in a supercell, or only the sites in a block of its unit cells.
+
+        :param extent: Number of unit cells along each axis
+        :param lower: Lower corner of the block, in unit cells. Defaults to the origin.
+        :param upper: Upper corner of the block, in unit cells. Defaults to the extent.
+        """
+        if lower is None and upper is None:
+            return self._generate_full_data(extent, set_data=False)
+        lower = np.zeros(3, dtype=int) if lower is None else lower
+        upper = extent if upper is None else upper
+        positions, operators, translations = expand_positions_in_block(self._symmetry.W, self._symmetry.w,
+                                                                       self._position, extent, lower, upper,
+                                                                       orbit=self.home_orbit)
+        return self._styled_dataset(positions, operators, translations)
+
+    @property
+    def home_orbit(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Sites of the atom in the home cell, with their operators and wrapping translations, see `home_cell_orbit`.
+        It is expanded once and reused for every block of a supercell.
+        """
+        if self._home_orbit is None:
+            self._home_orbit = home_cell_orbit(self._symmetry.W, self._symmetry.w, self._position)
+        return self._home_orbit
+
+    def count_sites(self, extent) -> int:
+        """
+        Number of sites of the atom in a supercell, counted without generating them
+        """
+        return count_positions(self._symmetry.W, self._symmetry.w, self._position, extent, orbit=self.home_orbit)
+
+    def iter_full_data(self, extent, block: npt.ArrayLike = CHUNK_CELLS) -> Iterator[dict]:
+        """
+        Sites of the atom in a supercell, one block of unit cells at a time. No site is in two blocks.
+
+        :param extent: Number of unit cells along each axis
+        :param block: Number of unit cells along each axis of a block
+        """
+        for lower, upper in cell_blocks(extent, block):
+            yield self.generate_full_data(extent, lower, upper)
+
+    def _styled_dataset(self, positions, operators, translations) -> dict:
+        return {
+            'positions':    positions,
+            'operators':    operators,
+            'translations': translations,
+            'colors':       np.broadcast_to(self._rgba, (len(positions), 4)),
+            'sizes':        np.broadcast_to(np.asarray(self._size, dtype=SIZE_DTYPE), (len(positions),)),
+        }
 
     def _generate_full_data(self, extent=(1, 1, 1), set_data=True) -> Optional[dict]:
 
-        positions, generators = self.generate_positions(self._position, extent)
+        positions, operators, translations = expand_positions_cached(self._symmetry_str, self._position, extent)
 
-        dataset = {
-            'positions':  positions,
-            'generators': generators,
-            'colors':     [self._color] * len(positions),
-            'sizes':      [self._size] * len(positions)
-        }
         if set_data:
-            self._dataset = dataset
+            self._dataset = {
+                'positions':    positions,
+                'operators':    operators,
+                'translations': translations,
+            }
         else:
-            return dataset
+            return self._styled_dataset(positions, operators, translations)
+
+    def _generators(self, operators: np.ndarray, translations: np.ndarray) -> list:
+        rotations = np.concatenate([self._symmetry.W, np.eye(3, dtype=self._symmetry.W.dtype)[np.newaxis]])
+        shifts = np.concatenate([self._symmetry.w, np.zeros((1, 3))])
+        # Operator index -1 (no identity in the symmetry) picks the appended identity
+        return [list(gen) for gen in zip(rotations[operators], translations, shifts[operators])]
 
     def generate_positions(self, atom: np.ndarray, extent: tuple):
-        all_positions = np.array(atom).reshape(-1, 3)
-        generators = [[np.eye(3), np.array(atom), np.zeros(3)]]
-        for z in np.arange(-1, extent[2] + 1):
-            for y in np.arange(-1, extent[1] + 1):
-                for x in np.arange(-1, extent[0] + 1):
-                    for rot, trans in zip(self._symmetry.W, self._symmetry.w):
-                        this_position = np.matmul(rot, atom + [x, y, z]) + trans
-                        # Check if this position is already in the list
-                        # and if it is within the extent
-                        if not np.any(np.all(all_positions == this_position, axis=1)) and \
-                                np.all(this_position >= 0) and \
-                                np.all(this_position <= extent):
-                            all_positions = np.concatenate((all_positions, this_position.reshape(-1, 3)))
-                            generators.append([rot, np.array([x, y, z]), trans])
-        return all_positions, generators
+        all_positions, operators, translations = expand_positions_cached(self._symmetry_str, atom, extent)
+        return all_positions, self._generators(operators, translations)
 
 
 class AtomsLogic:
 
-    def __init__(self, position, size, color, symmetry_str):
+    def __init__(self, position, size, color, symmetry_str, extent=(1, 1, 1), executor: Optional[Executor] = None,
+                 lazy: bool = False, chunk_cells: npt.ArrayLike = CHUNK_CELLS,
+                 dataset: Optional[Dict[str, np.ndarray]] = None):
+        """
+        :param position: Fractional positions of the asymmetric-unit atoms
+        :param size: Size of each atom
+        :param color: Color of each atom
+        :param symmetry_str: Symmetry string or Hall number understood by `brille.Symmetry`
+        :param extent: Number of unit cells along each axis
+        :param executor: Optional thread or process pool to expand the atoms concurrently. The sites are merged in the
+            order of the atoms, so the dataset does not depend on the executor.
+        :param lazy: Whether to generate the supercell one block of unit cells at a time with `load_chunk`, rather
+            than all at once
+        :param chunk_cells: Number of unit cells along each axis of a block, when lazy
+        :param dataset: The dataset of the supercell, already expanded, e.g. by `crysvue.io.scene.load_scene`. The
+            atoms are not expanded again and the columns are used as they are, so they may be memory-mapped.
+        """
+        self._symmetry_str = symmetry_str
+        self._extent = tuple(np.asarray(extent, dtype=int).tolist())
+        self._pending = None
+        # Number of sites generated so far of each atom, while a lazy supercell is loading
+        self._filled = None
+        self._dataset = None
+        if dataset is not None:
+            offsets = dataset['offsets']
+            orbits = [tuple(dataset[key][start:stop] for key in ('positions', 'operators', 'translations'))
+                      for start, stop in zip(offsets[:-1], offsets[1:])]
+            lazy = False
+        elif lazy:
+            orbits = [(np.zeros((0, 3)), np.zeros(0, dtype=int), np.zeros((0, 3), dtype=int))] * len(position)
+        else:
+            orbits = expand_orbits_cached(symmetry_str, position, self._extent, executor=executor)
+        # Colors are converted all at once, and each site takes the color of its atom from a palette
+        rgba = to_rgba_array(color, len(position))
+        self._set_palette(rgba)
         self._atoms = []
-        for pos, sz, c in zip(position, size, color):
-            self._atoms.append(AtomLogic(pos, sz, c, symmetry_str))
+        for pos, sz, c, orbit, atom_rgba in zip(position, size, color, orbits, rgba):
+            self._atoms.append(AtomLogic(pos, sz, c, symmetry_str, extent=self._extent, orbit=orbit, rgba=atom_rgba))
+        if dataset is not None:
+            self._dataset = dict(dataset, palette=self._palette, color_index=self._color_index)
+        elif lazy:
+            # The sites are counted up front, and each block is written into place as it is generated
+            self._dataset = self._allocate_dataset([atom.count_sites(self._extent) for atom in self._atoms])
+            self._filled = np.zeros(len(self._atoms), dtype=int)
+            self._pending = self._iter_blocks(self._extent, chunk_cells)
+        else:
+            self._dataset = self._merge_datasets([atom._dataset for atom in self._atoms])
 
     @staticmethod
     def _from_atom_name(positions, atom_label, symmetry_str):
-        sizes = []
-        colors = []
-        for atom_str in atom_label:
-            if atom_str in ELEMENT_DATA:
-                idx = ELEMENT_DATA.index(atom_str)
-                sizes.append(RADIUS_DATA[idx])
-                colors.append('#' + COLOR_DATA[idx])
-            else:
-                raise ValueError(f"Atom {atom_str} not found in ELEMENT_DATA")
-        return positions, sizes, colors, symmetry_str
+        """
+        Sizes and colors of atoms from their element symbols, looked up for all the atoms at once.
+
+        :return: Positions, (A,) float32 sizes, (A, 4) float32 RGBA colors and the symmetry string
+        """
+        indices = element_index(atom_label)
+        return positions, ELEMENT_RADII[indices], ELEMENT_RGBA[indices], symmetry_str
 
     @classmethod
     def from_atom_name(cls, positions, atom_label, symmetry_str, **kwargs):
@@ -147,15 +272,13 @@ class AtomsLogic:
 
     @staticmethod
     def _from_atom_number(positions, atom_number, symmetry_str):
-        sizes = []
-        colors = []
-        for atom_num in atom_number:
-            if atom_num < len(ELEMENT_DATA):
-                sizes.append(RADIUS_DATA[atom_num - 1])
-                colors.append('#' + COLOR_DATA[atom_num - 1])
-            else:
-                raise ValueError(f"Atom {atom_num} is not valid")
-        return positions, sizes, colors, symmetry_str
+        """
+        Sizes and colors of atoms from their atomic numbers, looked up for all the atoms at once.
+
+        :return: Positions, (A,) float32 sizes, (A, 4) float32 RGBA colors and the symmetry string
+        """
+        indices = atomic_number_index(atom_number)
+        return positions, ELEMENT_RADII[indices], ELEMENT_RGBA[indices], symmetry_str
 
     @classmethod
     def from_atom_number(cls, positions, atom_number, symmetry_str, **kwargs):
@@ -167,282 +290,308 @@ class AtomsLogic:
         return self._atoms
 
     @property
-    def positions(self):
-        return np.concatenate([atom.positions for atom in self._atoms])
+    def loading(self) -> bool:
+        """
+        Whether a lazy supercell still has blocks to generate. The dataset is complete once this is False.
+        """
+        return self._pending is not None
+
+    def iter_full_dataset(self, extent, block: npt.ArrayLike = CHUNK_CELLS) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        The dataset of a supercell one block of unit cells at a time, so that only one block is expanded in memory
+        at once. Each chunk has the columns of the full dataset, with the sites of every atom of the block.
+
+        :param extent: Number of unit cells along each axis
+        :param block: Number of unit cells along each axis of a block
+        """
+        extent = tuple(np.asarray(extent, dtype=int).tolist())
+        for lower, upper in cell_blocks(extent, block):
+            yield self._merge_datasets([atom.generate_full_data(extent, lower, upper) for atom in self._atoms])
+
+    def _iter_blocks(self, extent, block: npt.ArrayLike) -> Iterator[List[dict]]:
+        for lower, upper in cell_blocks(extent, block):
+            yield [atom.generate_full_data(extent, lower, upper) for atom in self._atoms]
+
+    def load_chunk(self) -> Optional[List[slice]]:
+        """
+        Generate the next block of a lazy supercell. The sites of each atom are written into place in the dataset,
+        after those of the previous blocks, so that the sites of each atom are contiguous as usual and the block is
+        not kept.
+
+        :return: The slices of the dataset which were generated, one per atom with sites in the block, or None if
+            there are no blocks left
+        """
+        if self._pending is None:
+            return None
+        block = next(self._pending, None)
+        if block is None:
+            self._finish_loading()
+            return None
+        sites = []
+        for index, data in enumerate(block):
+            start = int(self.offsets[index] + self._filled[index])
+            generated = slice(start, start + len(data['positions']))
+            for key in ('positions', 'operators', 'translations'):
+                self._dataset[key][generated] = data[key]
+            self._filled[index] += len(data['positions'])
+            if len(data['positions']):
+                sites.append(generated)
+        return sites
+
+    def load_all(self) -> None:
+        """
+        Generate every remaining block of a lazy supercell
+        """
+        while self.load_chunk() is not None:
+            pass
+
+    def _finish_loading(self):
+        if np.any(self._filled != np.diff(self.offsets)):
+            raise RuntimeError("The blocks of the supercell do not have the counted number of sites")
+        self._pending, self._filled = None, None
+        # The orbits of the atoms are views of the dataset
+        for atom, start, stop in zip(self._atoms, self.offsets[:-1], self.offsets[1:]):
+            atom._dataset = {key: self._dataset[key][start:stop] for key in ('positions', 'operators', 'translations')}
+
+    @property
+    def symmetry(self):
+        return get_symmetry(self._symmetry_str)
+
+    @property
+    def symmetry_str(self) -> Union[str, int]:
+        return self._symmetry_str
+
+    @property
+    def extent(self):
+        return self._extent
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self._dataset['positions']
+
+    @property
+    def colors(self) -> np.ndarray:
+        return self._dataset['colors']
 
     @property
-    def generators(self):
-        return np.concatenate([atom.generators for atom in self._atoms])
+    def sizes(self) -> np.ndarray:
+        return self._dataset['sizes']
 
     @property
-    def colors(self):
-        return np.concatenate([atom.colors for atom in self._atoms])
+    def operators(self) -> np.ndarray:
+        """
+        Index of the symmetry operator which generated each site
+        """
+        return self._dataset['operators']
 
     @property
-    def sizes(self):
-        return np.concatenate([atom.sizes for atom in self._atoms])
-
-    def generate_full_dataset(self, extent):
-        dataset = self._atoms[0].generate_full_data(extent)
-        for atom in self._atoms[1:]:
-            this_dataset = atom.generate_full_data(extent)
-            dataset['sizes'] += this_dataset['sizes']
-            dataset['colors'] += this_dataset['colors']
-            dataset['positions'] = np.concatenate([dataset['positions'], this_dataset['positions']])
-            dataset['generators'] += this_dataset['generators']
+    def translations(self) -> np.ndarray:
+        """
+        Lattice translation which generated each site
+        """
+        return self._dataset['translations']
+
+    @property
+    def parents(self) -> np.ndarray:
+        """
+        Index of the asymmetric-unit atom of each site
+        """
+        return self._dataset['parents']
+
+    @property
+    def palette(self) -> np.ndarray:
+        """
+        (P, 4) distinct RGBA colors of the atoms
+        """
+        return self._palette
+
+    @property
+    def color_index(self) -> np.ndarray:
+        """
+        Index in the palette of the color of each asymmetric-unit atom, so that the colors of the sites are
+        palette[color_index[parents]]
+        """
+        return self._color_index
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """
+        Sites of asymmetric-unit atom `i` are in the slice offsets[i]:offsets[i + 1]
+        """
+        return self._dataset['offsets']
+
+    @property
+    def generators(self) -> list:
+        generators = []
+        for atom, start, stop in zip(self._atoms, self.offsets[:-1], self.offsets[1:]):
+            generators += atom._generators(self.operators[start:stop], self.translations[start:stop])
+        return generators
+
+    def _atom_slice(self, index: int) -> slice:
+        # Sites can only be addressed by atom once a lazy supercell is complete
+        self.load_all()
+        return slice(int(self.offsets[index]), int(self.offsets[index + 1]))
+
+    def set_atom_color(self, index: int, color: Union[str, tuple]) -> slice:
+        """
+        Change the color of an asymmetric-unit atom and its equivalent sites.
+
+        :param index: Index of the asymmetric-unit atom
+        :param color: New color
+        :return: Slice of the dataset which has changed
+        """
+        atom = self._atoms[index]
+        atom.color = color
+        rgba = self._palette[self._color_index]
+        rgba[index] = atom.rgba
+        self._set_palette(rgba)
+        sites = self._atom_slice(index)
+        self._dataset['colors'][sites] = atom.rgba
+        return sites
+
+    def set_colors(self, colors) -> slice:
+        """
+        Change the colors of all the asymmetric-unit atoms at once, e.g. to colors from `crysvue.misc.color.colormap`
+        of a property of each atom. The colors of the sites are gathered from the palette in one step.
+
+        :param colors: A color for every atom, or a single color for all of them
+        :return: Slice of the dataset which has changed
+        """
+        rgba = to_rgba_array(colors, len(self._atoms))
+        for atom, atom_rgba in zip(self._atoms, rgba):
+            atom.color = atom_rgba
+        self._set_palette(rgba)
+        self.load_all()
+        self._dataset['colors'][:] = self._palette[self._color_index[self.parents]]
+        return slice(0, len(self.positions))
+
+    def _set_palette(self, rgba: np.ndarray):
+        palette, index = np.unique(np.asarray(rgba, dtype=COLOR_DTYPE).reshape(-1, 4), axis=0, return_inverse=True)
+        self._palette = palette
+        self._color_index = index.reshape(-1).astype(PARENT_DTYPE)
+        if self._dataset is not None:
+            self._dataset['palette'] = self._palette
+            self._dataset['color_index'] = self._color_index
+
+    def set_atom_size(self, index: int, size: float) -> slice:
+        """
+        Change the size of an asymmetric-unit atom and its equivalent sites.
+
+        :param index: Index of the asymmetric-unit atom
+        :param size: New size
+        :return: Slice of the dataset which has changed
+        """
+        atom = self._atoms[index]
+        atom.size = size
+        sites = self._atom_slice(index)
+        self._dataset['sizes'][sites] = size
+        return sites
+
+    def set_atom_position(self, index: int, position: npt.ArrayLike) -> Optional[slice]:
+        """
+        Move an asymmetric-unit atom and regenerate its equivalent sites.
+
+        :param index: Index of the asymmetric-unit atom
+        :param position: New fractional position
+        :return: Slice of the dataset which has changed, or None if the number of sites changed and the whole dataset
+            was rebuilt
+        """
+        atom = self._atoms[index]
+        atom.position = position
+        sites = self._atom_slice(index)
+        if len(atom.positions) != sites.stop - sites.start:
+            self._dataset = self._merge_datasets([atom._dataset for atom in self._atoms])
+            return None
+        self._dataset['positions'][sites] = atom.positions
+        self._dataset['operators'][sites] = atom.operators
+        self._dataset['translations'][sites] = atom.translations
+        return sites
+
+    def _merge_datasets(self, datasets: List[dict]) -> Dict[str, np.ndarray]:
+        """
+        Pack the per-atom orbits into one set of contiguous per-site columns. The colors of the sites are gathered from
+        the palette, which is kept with them.
+        """
+        merged = self._allocate_dataset([len(dataset['positions']) for dataset in datasets])
+        offsets = merged['offsets']
+        for dataset, start, stop in zip(datasets, offsets[:-1], offsets[1:]):
+            merged['positions'][start:stop] = dataset['positions']
+            merged['operators'][start:stop] = dataset['operators']
+            merged['translations'][start:stop] = dataset['translations']
+        return merged
+
+    def _allocate_dataset(self, counts: List[int]) -> Dict[str, np.ndarray]:
+        """
+        The per-site columns for a number of sites of each atom, with the colors, sizes and parents of the sites set
+        and the positions, operators and translations to be filled in.
+        """
+        counts = np.array(counts, dtype=int)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        n_sites = int(offsets[-1])
+        # Zeroed, so that sites of a lazy supercell which are not generated yet are at the origin
+        dataset = {
+            'positions':    np.zeros((n_sites, 3), dtype=POSITION_DTYPE),
+            'colors':       np.empty((n_sites, 4), dtype=COLOR_DTYPE),
+            'sizes':        np.empty(n_sites, dtype=SIZE_DTYPE),
+            'operators':    np.zeros(n_sites, dtype=OPERATOR_DTYPE),
+            'translations': np.zeros((n_sites, 3), dtype=TRANSLATION_DTYPE),
+            'parents':      np.repeat(np.arange(len(counts), dtype=PARENT_DTYPE), counts),
+            'offsets':      offsets,
+            'palette':      self._palette,
+            'color_index':  self._color_index,
+        }
+        dataset['colors'][:] = self._palette[self._color_index[dataset['parents']]]
+        for atom, start, stop in zip(self._atoms, offsets[:-1], offsets[1:]):
+            dataset['sizes'][start:stop] = atom.size
         return dataset
 
-    def generate_spin_vectors(self, spin_vectors: np.ndarray) -> List[np.ndarray]:
-        spin_vectors = np.array(spin_vectors).reshape(-1, 3)
-        all_spin_vectors = []
+    def loaded_sites(self) -> np.ndarray:
+        """
+        Whether each site of the dataset has been generated yet. Only the sites of the blocks loaded so far are, while
+        a lazy supercell is loading.
+        """
+        loaded = np.ones(len(self.positions), dtype=bool)
+        if self._filled is not None:
+            for start, stop, filled in zip(self.offsets[:-1], self.offsets[1:], self._filled):
+                loaded[start + filled:stop] = False
+        return loaded
+
+    def generate_full_dataset(self, extent) -> Dict[str, np.ndarray]:
+        extent = tuple(np.asarray(extent, dtype=int).tolist())
+        if extent == self._extent:
+            self.load_all()
+            return self._dataset
+        return self._merge_datasets([atom.generate_full_data(extent) for atom in self._atoms])
+
+    def generate_spin_vectors(self, spin_vectors: npt.ArrayLike, time_reversal: Optional[npt.ArrayLike] = None,
+                              axial: bool = True) -> np.ndarray:
+        """
+        Propagate a vector on each asymmetric-unit atom to every site. The vector of a site generated by the operator
+        (W, w) is W v, times det(W) for an axial vector such as a magnetic moment, and times -1 if the operator is
+        combined with time reversal.
+
+        :param spin_vectors: (A, 3) vector of each asymmetric-unit atom
+        :param time_reversal: Optional (O,) time-reversal flag of each symmetry operator, as +1/-1 or False/True, for
+            magnetic space groups. See `crysvue.logic.spins.magnetic_operators`.
+        :param axial: Whether the vectors are axial (magnetic moments) rather than polar (displacements)
+        :return: (N, 3) vector of each site, aligned with `positions`
+        """
+        spin_vectors = np.asarray(spin_vectors, dtype=float).reshape(-1, 3)
         if len(spin_vectors) != len(self._atoms):
             raise ValueError("Number of spin vectors must match number of atoms")
-        for spin, atom in zip(spin_vectors, self._atoms):
-            generators = atom.generators
-            these_spin_vectors = []
-            for gen in generators:
-                these_spin_vectors.append(np.matmul(gen[0], spin))
-            all_spin_vectors.append(np.array(these_spin_vectors))
-        return all_spin_vectors
-
-
-COLOR_DATA = '#FFFFFF#D9FFFF#CC80FF#C2FF00#FFB5B5#909090#3050F8#FF0D0D#90E050#B3E3F5#AB5CF2#8AFF00#BFA6A6#F0C8A0' \
-             '#FF8000#FFFF30#1FF01F#80D1E3#8F40D4#3DFF00#E6E6E6#BFC2C7#A6A6AB#8A99C7#9C7AC7#E06633#F090A0#50D050' \
-             '#C88033#7D80B0#C28F8F#668F8F#BD80E3#FFA100#A62929#5CB8D1#702EB0#00FF00#94FFFF#94E0E0#73C2C9#54B5B5' \
-             '#3B9E9E#248F8F#0A7D8C#006985#C0C0C0#FFD98F#A67573#668080#9E63B5#D47A00#940094#429EB0#57178F#00C900' \
-             '#70D4FF#FFFFC7#D9FFC7#C7FFC7#A3FFC7#8FFFC7#61FFC7#45FFC7#30FFC7#1FFFC7#00FF9C#00E675#00D452#00BF38' \
-             '#00AB24#4DC2FF#4DA6FF#2194D6#267DAB#266696#175487#D0D0E0#FFD123#B8B8D0#A6544D#575961#9E4FB5#AB5C00' \
-             '#754F45#428296#420066#007D00#70ABFA#00BAFF#00A1FF#008FFF#0080FF#006BFF#545CF2#785CE3#8A4FE3#A136D4' \
-             '#B31FD4#B31FBA#B30DA6#BD0D87#C70066#CC0059#D1004F#D90045#E00038#E6002E#EB0026#000000#000000#000000' \
-             '#000000#000000#000000#000000#000000#000000'.split(
-    '#')[1:]
-
-RADIUS_DATA = [0.37,
-               0.32,
-               0.90,
-               0.50,
-               0.32,
-               0.77,
-               0.75,
-               1.26,
-               1.18,
-               0.38,
-               1.21,
-               0.86,
-               0.60,
-               1.11,
-               1.06,
-               1.84,
-               1.67,
-               0.71,
-               1.52,
-               1.20,
-               0.95,
-               0.74,
-               0.81,
-               0.75,
-               0.81,
-               0.75,
-               0.78,
-               0.70,
-               0.70,
-               0.88,
-               0.69,
-               1.22,
-               1.19,
-               1.98,
-               1.95,
-               0.88,
-               1.70,
-               1.35,
-               1.09,
-               0.86,
-               0.82,
-               0.78,
-               0.72,
-               0.76,
-               0.74,
-               0.90,
-               1.08,
-               1.09,
-               0.94,
-               1.41,
-               1.38,
-               2.21,
-               2.06,
-               1.08,
-               1.85,
-               1.52,
-               1.40,
-               1.30,
-               1.20,
-               1.18,
-               1.17,
-               1.15,
-               1.25,
-               1.13,
-               1.12,
-               1.10,
-               1.10,
-               1.08,
-               1.07,
-               1.15,
-               1.05,
-               0.85,
-               0.83,
-               0.76,
-               0.72,
-               0.70,
-               0.76,
-               0.82,
-               1.00,
-               1.16,
-               1.48,
-               1.33,
-               1.46,
-               1.08,
-               0.76,
-               1.20,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00,
-               1.00]
-
-ELEMENT_DATA = ["H",
-                "He",
-                "Li",
-                "Be",
-                "B",
-                "C",
-                "N",
-                "O",
-                "F",
-                "Ne",
-                "Na",
-                "Mg",
-                "Al",
-                "Si",
-                "P",
-                "S",
-                "Cl",
-                "Ar",
-                "K",
-                "Ca",
-                "Sc",
-                "Ti",
-                "V",
-                "Cr",
-                "Mn",
-                "Fe",
-                "Co",
-                "Ni",
-                "Cu",
-                "Zn",
-                "Ga",
-                "Ge",
-                "As",
-                "Se",
-                "Br",
-                "Kr",
-                "Rb",
-                "Sr",
-                "Y",
-                "Zr",
-                "Nb",
-                "Mo",
-                "Tc",
-                "Ru",
-                "Rh",
-                "Pd",
-                "Ag",
-                "Cd",
-                "In",
-                "Sn",
-                "Sb",
-                "Te",
-                "I",
-                "Xe",
-                "Cs",
-                "Ba",
-                "La",
-                "Ce",
-                "Pr",
-                "Nd",
-                "Pm",
-                "Sm",
-                "Eu",
-                "Gd",
-                "Tb",
-                "Dy",
-                "Ho",
-                "Er",
-                "Tm",
-                "Yb",
-                "Lu",
-                "Hf",
-                "Ta",
-                "W",
-                "Re",
-                "Os",
-                "Ir",
-                "Pt",
-                "Au",
-                "Hg",
-                "Tl",
-                "Pb",
-                "Bi",
-                "Po",
-                "At",
-                "Rn",
-                "Fr",
-                "Ra",
-                "Ac",
-                "Th",
-                "Pa",
-                "U",
-                "Np",
-                "Pu",
-                "Am",
-                "Cm",
-                "Bk",
-                "Cf",
-                "Es",
-                "Fm",
-                "Md",
-                "No",
-                "Lr",
-                "Rf",
-                "Db",
-                "Sg",
-                "Bh",
-                "Hs",
-                "Mt",
-                "Ds",
-                "Rg",
-                "Cn",
-                "Nh",
-                "Fl",
-                ]
+        rotations = np.asarray(self.symmetry.W, dtype=float)
+        factors = np.ones(len(rotations))
+        if axial:
+            factors *= np.rint(np.linalg.det(rotations))
+        if time_reversal is not None:
+            time_reversal = np.asarray(time_reversal).reshape(-1)
+            if len(time_reversal) != len(rotations):
+                raise ValueError("Number of time-reversal flags must match number of symmetry operators")
+            if time_reversal.dtype == bool:
+                time_reversal = np.where(time_reversal, -1, 1)
+            factors *= np.sign(time_reversal)
+        # Operator index -1 (no identity in the symmetry) picks the appended identity
+        rotations = np.concatenate([rotations * factors[:, np.newaxis, np.newaxis], np.eye(3)[np.newaxis]])
+        # Every (atom, operator) vector at once, then one gather to the sites
+        vectors = np.einsum('oij,aj->aoi', rotations, spin_vectors)
+        return vectors[self.parents, self.operators]
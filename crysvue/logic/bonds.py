@@ -0,0 +1,286 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+from itertools import product
+from typing import List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from crysvue.logic.cache import expand_orbits_cached, get_symmetry
+from crysvue.logic.expansion import home_cell_orbit
+from crysvue.logic.sites import DEFAULT_TOLERANCE
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+# Added to the sum of the radii of two atoms to give the longest bond between them, in Angstrom
+BOND_TOLERANCE = 0.45
+BOND_DTYPE = np.int32
+# Candidate pairs tested at once, to bound the memory used by the neighbour search
+_PAIR_CHUNK = 2 ** 22
+
+
+def _ragged_arange(starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenate arange(start, start + count) for every (start, count).
+
+    :return: The concatenated ranges and the index of the range each element came from
+    """
+    owner = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    return starts[owner] + np.arange(len(owner)) - first[owner], owner
+
+
+def find_bonds(positions: npt.ArrayLike, radii: npt.ArrayLike, frac_to_abc: Optional[npt.ArrayLike] = None,
+               tolerance: float = BOND_TOLERANCE, period: Optional[npt.ArrayLike] = None,
+               return_images: bool = False):
+    """
+    Find the bonded pairs of a set of sites with a cell list. Two sites are bonded when their separation is at most
+    the sum of their radii plus the tolerance. The sites are binned into cells of the lattice at least as wide as the
+    longest possible bond, so only sites in neighbouring cells are compared and the search runs in O(N) time.
+
+    With a `period`, the sites are taken to repeat with that (fractional) periodicity and separations use the minimum
+    image, so sites on opposite faces of the box can be bonded. The box must be at least twice the longest bond wide.
+
+    :param positions: (N, 3) fractional positions
+    :param radii: (N,) radii of the sites, in Angstrom
+    :param frac_to_abc: Lattice matrix with the lattice vectors as rows. Identity if None.
+    :param tolerance: Added to the sum of the radii to give the longest bond, in Angstrom
+    :param period: Optional periodicity along each axis in fractional units, e.g. the extent of a supercell
+    :param return_images: Also return the lattice translation of the second site of each pair
+    :return: (M, 2) int32 indices of the bonded sites with i < j, sorted, and (M, 3) int translations if requested
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(positions),))
+    frac_to_abc = np.eye(3) if frac_to_abc is None else np.asarray(frac_to_abc, dtype=float)
+    n_sites = len(positions)
+    if n_sites < 2:
+        bonds = np.zeros((0, 2), dtype=BOND_DTYPE)
+        return (bonds, np.zeros((0, 3), dtype=int)) if return_images else bonds
+
+    cutoff = 2 * radii.max() + tolerance
+    # Distance between lattice planes per unit of each fractional coordinate
+    spacing = 1 / np.linalg.norm(np.linalg.inv(frac_to_abc), axis=0)
+
+    if period is None:
+        periodic = np.zeros(3, dtype=bool)
+        origin = positions.min(axis=0)
+        length = np.maximum(positions.max(axis=0) - origin, 0)
+    else:
+        periodic = np.ones(3, dtype=bool)
+        length = np.broadcast_to(np.asarray(period, dtype=float), (3,))
+        origin = np.zeros(3)
+        positions = np.mod(positions, length)
+    n_cells = np.maximum(np.floor(length * spacing / cutoff), 1).astype(np.int64)
+    cell = np.floor((positions - origin) / np.where(length > 0, length, 1) * n_cells).astype(np.int64)
+    cell = np.minimum(cell, n_cells - 1)
+
+    # Sort the sites by cell, so the sites of a cell are a contiguous range
+    cell_id = np.ravel_multi_index(cell.T, n_cells)
+    order = np.argsort(cell_id, kind='stable')
+    counts = np.bincount(cell_id, minlength=np.prod(n_cells))
+    starts = np.cumsum(counts) - counts
+
+    # Neighbouring cells along each axis. With periodic wrapping, offsets landing on the same cell are only kept once.
+    axis_offsets = [np.unique(np.mod([-1, 0, 1], n)) if p else np.array([-1, 0, 1])
+                    for n, p in zip(n_cells, periodic)]
+
+    pairs = []
+    images = []
+    for offset in product(*axis_offsets):
+        neighbour = cell + np.asarray(offset)
+        if periodic.any():
+            neighbour = np.mod(neighbour, n_cells)
+        valid = np.all((neighbour >= 0) & (neighbour < n_cells), axis=1)
+        first = np.flatnonzero(valid)
+        neighbour_id = np.ravel_multi_index(neighbour[valid].T, n_cells)
+        n_candidates = counts[neighbour_id]
+        # Work through the sites in chunks of roughly _PAIR_CHUNK candidate pairs
+        bounds = np.searchsorted(np.cumsum(n_candidates), np.arange(_PAIR_CHUNK, n_candidates.sum(), _PAIR_CHUNK))
+        for chunk in np.split(np.arange(len(first)), bounds):
+            slots, owner = _ragged_arange(starts[neighbour_id[chunk]], n_candidates[chunk])
+            i = first[chunk][owner]
+            j = order[slots]
+            keep = i < j
+            i, j = i[keep], j[keep]
+            delta = positions[j] - positions[i]
+            image = np.zeros_like(delta)
+            if period is not None:
+                image = -length * np.round(delta / length)
+                delta = delta + image
+            distance = np.linalg.norm(delta @ frac_to_abc, axis=1)
+            bonded = distance <= radii[i] + radii[j] + tolerance
+            pairs.append(np.stack([i[bonded], j[bonded]], axis=1))
+            images.append(image[bonded])
+
+    pairs = np.concatenate(pairs).astype(BOND_DTYPE)
+    images = np.rint(np.concatenate(images)).astype(int)
+    sort = np.lexsort((pairs[:, 1], pairs[:, 0]))
+    if return_images:
+        return pairs[sort], images[sort]
+    return pairs[sort]
+
+
+def _void_keys(keys: np.ndarray) -> np.ndarray:
+    """
+    View each row of an (N, 3) integer array as one opaque value, so rows can be sorted and searched as scalars.
+    """
+    keys = np.ascontiguousarray(keys)
+    return keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+
+
+def _match_sites(sites: np.ndarray, queries: np.ndarray, resolution: float) -> np.ndarray:
+    """
+    Find the site at the same position as each query. Positions are compared on a grid of the given resolution, and
+    queries which are not matched are tried again on a grid offset by half a step, so that positions close to a grid
+    boundary are still matched.
+
+    :return: Index of the matching site for each query, -1 where there is none
+    """
+    found = np.full(len(queries), -1, dtype=np.int64)
+    for shift in (0.0, 0.5):
+        pending = np.flatnonzero(found < 0)
+        if not len(pending) or not len(sites):
+            break
+        site_keys = _void_keys(np.floor(sites / resolution + shift).astype(np.int64))
+        query_keys = _void_keys(np.floor(queries[pending] / resolution + shift).astype(np.int64))
+        order = np.argsort(site_keys, kind='stable')
+        site_keys = site_keys[order]
+        slot = np.minimum(np.searchsorted(site_keys, query_keys), len(site_keys) - 1)
+        hit = site_keys[slot] == query_keys
+        found[pending[hit]] = order[slot[hit]]
+    return found
+
+
+def asymmetric_unit_bonds(rotations: npt.ArrayLike, translations: npt.ArrayLike, positions: npt.ArrayLike,
+                          radii: npt.ArrayLike, frac_to_abc: Optional[npt.ArrayLike] = None,
+                          tolerance: float = BOND_TOLERANCE,
+                          site_tolerance: float = DEFAULT_TOLERANCE) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Find the neighbours of each asymmetric-unit atom in the infinite crystal.
+
+    :param rotations: (O, 3, 3) rotation matrices W
+    :param translations: (O, 3) translation vectors w
+    :param positions: (A, 3) fractional positions of the asymmetric-unit atoms
+    :param radii: (A,) radii of the atoms, in Angstrom
+    :param frac_to_abc: Lattice matrix with the lattice vectors as rows. Identity if None.
+    :param tolerance: Added to the sum of the radii to give the longest bond, in Angstrom
+    :param site_tolerance: Fractional distance within which two sites are the same
+    :return: For each atom, the (P, 3) fractional positions of its neighbours and the (P,) atoms they are images of
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(positions),))
+    frac_to_abc = np.eye(3) if frac_to_abc is None else np.asarray(frac_to_abc, dtype=float)
+
+    # Every site of the crystal is a site of the home cell plus a lattice translation
+    orbits = [home_cell_orbit(rotations, translations, position, tolerance=site_tolerance)[0] for position in positions]
+    home_sites = np.concatenate(orbits)
+    home_parents = np.repeat(np.arange(len(orbits)), [len(orbit) for orbit in orbits])
+    spacing = 1 / np.linalg.norm(np.linalg.inv(frac_to_abc), axis=0)
+
+    neighbours = []
+    for position, radius in zip(positions, radii):
+        cutoffs = radius + radii[home_parents] + tolerance
+        # Lattice translations which can bring a home site within the longest cutoff of this atom
+        reach = cutoffs.max() / spacing
+        cells = np.stack(np.meshgrid(*[np.arange(np.floor(p - r), np.floor(p + r) + 1) for p, r in zip(position, reach)],
+                                     indexing='ij'), axis=-1).reshape(-1, 3)
+        candidates = (home_sites[np.newaxis] + cells[:, np.newaxis]).reshape(-1, 3)
+        delta = candidates - position
+        distance = np.linalg.norm(delta @ frac_to_abc, axis=1)
+        bonded = (distance <= np.tile(cutoffs, len(cells))) & np.any(np.abs(delta) > site_tolerance, axis=1)
+        neighbours.append((candidates[bonded], np.tile(home_parents, len(cells))[bonded]))
+    return neighbours
+
+
+def spread_bonds(rotations: npt.ArrayLike, translations: npt.ArrayLike,
+                 orbits: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                 neighbours: Sequence[Tuple[np.ndarray, np.ndarray]],
+                 site_tolerance: float = DEFAULT_TOLERANCE) -> np.ndarray:
+    """
+    Spread the bonds of the asymmetric-unit atoms to every displayed site. A site generated from its atom by
+    x -> W (x + t) + w is bonded to the image of each neighbour of the atom under the same operation, so the bonds
+    follow from the generator records of the orbits without searching the displayed sites.
+
+    :param rotations: (O, 3, 3) rotation matrices W
+    :param translations: (O, 3) translation vectors w
+    :param orbits: (positions, operators, lattice translations) of the displayed sites of each atom
+    :param neighbours: Neighbours of each atom, from `asymmetric_unit_bonds`
+    :param site_tolerance: Fractional distance within which two sites are the same
+    :return: (M, 2) int32 indices of the bonded sites with i < j, sorted, in the concatenated order of the orbits
+    """
+    rotations = np.asarray(rotations, dtype=float)
+    # Operator index -1 (no identity in the symmetry) picks an appended identity
+    rotations = np.concatenate([rotations, np.eye(3)[np.newaxis]])
+    translations = np.concatenate([np.asarray(translations, dtype=float).reshape(-1, 3), np.zeros((1, 3))])
+    sites = np.concatenate([orbit[0] for orbit in orbits])
+    offsets = np.cumsum([0] + [len(orbit[0]) for orbit in orbits])
+
+    pairs = []
+    for start, (_, operators, cells), (targets, _) in zip(offsets[:-1], orbits, neighbours):
+        if not len(targets):
+            continue
+        # Image of every neighbour under the generator of every site of this atom
+        images = np.einsum('sij,spj->spi', rotations[operators],
+                           targets[np.newaxis] + cells[:, np.newaxis]) + translations[operators][:, np.newaxis]
+        found = _match_sites(sites, images.reshape(-1, 3), 2 * site_tolerance)
+        first = np.repeat(start + np.arange(len(operators)), len(targets))
+        # Every bond is found from both of its sites, so keeping i < j leaves each bond once
+        keep = found > first
+        pairs.append(first[keep] * len(sites) + found[keep])
+
+    if not pairs:
+        return np.zeros((0, 2), dtype=BOND_DTYPE)
+    pairs = np.sort(np.concatenate(pairs))
+    return np.stack(np.divmod(pairs, len(sites)), axis=1).astype(BOND_DTYPE)
+
+
+class BondsLogic:
+
+    def __init__(self, position, size, symmetry_str, extent=(1, 1, 1), frac_to_abc=None,
+                 tolerance: float = BOND_TOLERANCE):
+        """
+        :param position: Fractional positions of the asymmetric-unit atoms
+        :param size: Radius of each atom, in Angstrom
+        :param symmetry_str: Symmetry string or Hall number understood by `brille.Symmetry`
+        :param extent: Number of unit cells along each axis
+        :param frac_to_abc: Lattice matrix with the lattice vectors as rows
+        :param tolerance: Added to the sum of the radii to give the longest bond, in Angstrom
+        """
+        self._symmetry_str = symmetry_str
+        self._extent = tuple(np.asarray(extent, dtype=int).tolist())
+        self._frac_to_abc = np.eye(3) if frac_to_abc is None else np.asarray(frac_to_abc, dtype=float)
+        self._tolerance = tolerance
+        symmetry = get_symmetry(symmetry_str)
+        orbits = expand_orbits_cached(symmetry_str, position, self._extent)
+        self._bond_positions = np.concatenate([orbit[0] for orbit in orbits])
+        self._bond_radii = np.repeat(np.asarray(size, dtype=float), [len(orbit[0]) for orbit in orbits])
+        self._bond_parents = np.repeat(np.arange(len(orbits)), [len(orbit[0]) for orbit in orbits])
+        # Neighbours are only searched for the asymmetric unit, then carried to every site by its generator
+        neighbours = asymmetric_unit_bonds(symmetry.W, symmetry.w, position, size, self._frac_to_abc,
+                                           tolerance=tolerance)
+        self._bonds = spread_bonds(symmetry.W, symmetry.w, orbits, neighbours)
+
+    @property
+    def bonds(self) -> np.ndarray:
+        """
+        (M, 2) indices of the bonded sites, in the site order of `AtomsLogic`
+        """
+        return self._bonds
+
+    @property
+    def bond_vectors(self) -> np.ndarray:
+        """
+        (M, 3) cartesian vector from the first to the second site of each bond
+        """
+        return (self._bond_positions[self._bonds[:, 1]] - self._bond_positions[self._bonds[:, 0]]) @ self._frac_to_abc
+
+    @property
+    def bond_lengths(self) -> np.ndarray:
+        return np.linalg.norm(self.bond_vectors, axis=1)
@@ -0,0 +1,222 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import functools
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union, TYPE_CHECKING
+
+import numpy as np
+
+from crysvue.logic.expansion import expand_positions
+from crysvue.logic.sites import DEFAULT_TOLERANCE
+from crysvue.logic.spacegroups import SpaceGroupSymmetry, lookup_symmetry
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    import brille
+    import numpy.typing as npt
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# Number of parsed symmetries to keep
+SYMMETRY_CACHE_SIZE = 256
+# Memory budget for expanded orbits, in bytes
+ORBIT_CACHE_BYTES = 128 * 1024 ** 2
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache with a memory budget. The size of a value is the total size of the numpy
+    arrays it holds, and the least recently used entries are evicted once the budget is exceeded.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._data: OrderedDict = OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        with self._lock:
+            self._max_bytes = value
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self._misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = _nbytes(value)
+        with self._lock:
+            if key in self._data:
+                self._nbytes -= _nbytes(self._data.pop(key))
+            if size > self._max_bytes:
+                return
+            self._data[key] = value
+            self._nbytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._nbytes > self._max_bytes and self._data:
+            _, value = self._data.popitem(last=False)
+            self._nbytes -= _nbytes(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+            self._hits = 0
+            self._misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self._hits, self._misses, self._max_bytes, self._nbytes)
+
+
+ORBIT_CACHE = LRUCache(ORBIT_CACHE_BYTES)
+
+
+@functools.lru_cache(maxsize=SYMMETRY_CACHE_SIZE)
+def get_symmetry(symbol: Union[str, int]) -> Union[SpaceGroupSymmetry, brille.Symmetry]:
+    """
+    Return the symmetry for a symbol, building it only on the first request. Hall numbers, Hermann-Mauguin symbols
+    and Hall symbols are read from the space-group tables, other symbols are parsed by `brille.Symmetry`.
+
+    :param symbol: Symmetry string, Hall number or space-group symbol
+    :return: Shared symmetry object, with rotations `W` and translations `w`
+    """
+    symmetry = lookup_symmetry(symbol)
+    if symmetry is not None:
+        return symmetry
+    import brille
+    return brille.Symmetry(symbol)
+
+
+def orbit_key(symbol: Union[str, int], position: npt.ArrayLike, extent: npt.ArrayLike,
+              tolerance: float = DEFAULT_TOLERANCE) -> tuple:
+    """
+    Key of an expanded orbit in the orbit cache: the symbol, the position rounded to the tolerance and the extent.
+    """
+    position = np.asarray(position, dtype=float).reshape(3)
+    return (symbol,
+            tuple(np.round(position / tolerance).astype(np.int64).tolist()),
+            tuple(np.asarray(extent, dtype=int).tolist()),
+            tolerance)
+
+
+def store_orbit(key: tuple, orbit: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> None:
+    """
+    Add an expanded orbit to the orbit cache, e.g. one computed in another process. The arrays are made read-only as
+    they will be shared between callers.
+    """
+    for array in orbit:
+        array.setflags(write=False)
+    ORBIT_CACHE.put(key, tuple(orbit))
+
+
+def expand_positions_cached(symbol: Union[str, int], position: npt.ArrayLike, extent: npt.ArrayLike,
+                            tolerance: float = DEFAULT_TOLERANCE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Cached version of `expand_positions` for a symmetry symbol. Orbits are keyed by the symbol, the position rounded to
+    the tolerance and the extent. The returned arrays are shared between callers and are read-only.
+
+    :param symbol: Symmetry string or Hall number understood by `brille.Symmetry`
+    :param position: Fractional position of the atom
+    :param extent: Number of unit cells along each axis
+    :param tolerance: Fractional distance within which two sites are the same
+    :return: (N, 3) positions, (N,) operator indices and (N, 3) lattice translations
+    """
+    key = orbit_key(symbol, position, extent, tolerance)
+    orbit = ORBIT_CACHE.get(key)
+    if orbit is None:
+        symmetry = get_symmetry(symbol)
+        orbit = expand_positions(symmetry.W, symmetry.w, position, extent, tolerance=tolerance)
+        store_orbit(key, orbit)
+    return orbit
+
+
+def expand_orbits_cached(symbol: Union[str, int], positions: npt.ArrayLike, extent: npt.ArrayLike,
+                         tolerance: float = DEFAULT_TOLERANCE,
+                         executor: Optional[Executor] = None) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Expand the orbits of several positions with `expand_positions_cached`. Orbits which are not cached are expanded
+    concurrently when an executor is given. Orbits expanded in a process pool are added to the orbit cache of this
+    process. The orbits are returned in the order of the positions, whatever order the workers finish in.
+
+    :param symbol: Symmetry string or Hall number understood by `brille.Symmetry`
+    :param positions: (A, 3) fractional positions
+    :param extent: Number of unit cells along each axis
+    :param tolerance: Fractional distance within which two sites are the same
+    :param executor: Thread or process pool to expand the orbits in. If None they are expanded one after another.
+    :return: List of (positions, operators, translations) orbits, one per position
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    keys = [orbit_key(symbol, position, extent, tolerance) for position in positions]
+    orbits = [ORBIT_CACHE.get(key) for key in keys]
+    missing = [i for i, orbit in enumerate(orbits) if orbit is None]
+    if executor is None or len(missing) < 2:
+        for i in missing:
+            orbits[i] = expand_positions_cached(symbol, positions[i], extent, tolerance)
+        return orbits
+
+    # Parse the symmetry before submitting, so that threads share it rather than all parsing it at once
+    get_symmetry(symbol)
+    futures = [executor.submit(expand_positions_cached, symbol, positions[i], extent, tolerance) for i in missing]
+    # Threads share this cache, worker processes have their own. The process pool module is slow to import, so it is
+    # only imported once an executor is used.
+    from concurrent.futures import ProcessPoolExecutor
+    separate_cache = isinstance(executor, ProcessPoolExecutor)
+    for i, future in zip(missing, futures):
+        orbit = future.result()
+        if separate_cache:
+            store_orbit(keys[i], orbit)
+        orbits[i] = orbit
+    return orbits
+
+
+def cache_info() -> Dict[str, CacheInfo]:
+    """
+    Hit and miss counters of the symmetry and orbit caches.
+    """
+    return {'symmetry': get_symmetry.cache_info(),
+            'orbit':    ORBIT_CACHE.cache_info()}
+
+
+def clear_caches() -> None:
+    """
+    Empty the symmetry and orbit caches and reset their counters.
+    """
+    get_symmetry.cache_clear()
+    ORBIT_CACHE.clear()
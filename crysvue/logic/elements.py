@@ -0,0 +1,306 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import itertools
+from typing import Dict, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+COLOR_DATA = '#FFFFFF#D9FFFF#CC80FF#C2FF00#FFB5B5#909090#3050F8#FF0D0D#90E050#B3E3F5#AB5CF2#8AFF00#BFA6A6#F0C8A0' \
+             '#FF8000#FFFF30#1FF01F#80D1E3#8F40D4#3DFF00#E6E6E6#BFC2C7#A6A6AB#8A99C7#9C7AC7#E06633#F090A0#50D050' \
+             '#C88033#7D80B0#C28F8F#668F8F#BD80E3#FFA100#A62929#5CB8D1#702EB0#00FF00#94FFFF#94E0E0#73C2C9#54B5B5' \
+             '#3B9E9E#248F8F#0A7D8C#006985#C0C0C0#FFD98F#A67573#668080#9E63B5#D47A00#940094#429EB0#57178F#00C900' \
+             '#70D4FF#FFFFC7#D9FFC7#C7FFC7#A3FFC7#8FFFC7#61FFC7#45FFC7#30FFC7#1FFFC7#00FF9C#00E675#00D452#00BF38' \
+             '#00AB24#4DC2FF#4DA6FF#2194D6#267DAB#266696#175487#D0D0E0#FFD123#B8B8D0#A6544D#575961#9E4FB5#AB5C00' \
+             '#754F45#428296#420066#007D00#70ABFA#00BAFF#00A1FF#008FFF#0080FF#006BFF#545CF2#785CE3#8A4FE3#A136D4' \
+             '#B31FD4#B31FBA#B30DA6#BD0D87#C70066#CC0059#D1004F#D90045#E00038#E6002E#EB0026#000000#000000#000000' \
+             '#000000#000000#000000#000000#000000#000000'.split(
+    '#')[1:]
+
+RADIUS_DATA = [0.37,
+               0.32,
+               0.90,
+               0.50,
+               0.32,
+               0.77,
+               0.75,
+               1.26,
+               1.18,
+               0.38,
+               1.21,
+               0.86,
+               0.60,
+               1.11,
+               1.06,
+               1.84,
+               1.67,
+               0.71,
+               1.52,
+               1.20,
+               0.95,
+               0.74,
+               0.81,
+               0.75,
+               0.81,
+               0.75,
+               0.78,
+               0.70,
+               0.70,
+               0.88,
+               0.69,
+               1.22,
+               1.19,
+               1.98,
+               1.95,
+               0.88,
+               1.70,
+               1.35,
+               1.09,
+               0.86,
+               0.82,
+               0.78,
+               0.72,
+               0.76,
+               0.74,
+               0.90,
+               1.08,
+               1.09,
+               0.94,
+               1.41,
+               1.38,
+               2.21,
+               2.06,
+               1.08,
+               1.85,
+               1.52,
+               1.40,
+               1.30,
+               1.20,
+               1.18,
+               1.17,
+               1.15,
+               1.25,
+               1.13,
+               1.12,
+               1.10,
+               1.10,
+               1.08,
+               1.07,
+               1.15,
+               1.05,
+               0.85,
+               0.83,
+               0.76,
+               0.72,
+               0.70,
+               0.76,
+               0.82,
+               1.00,
+               1.16,
+               1.48,
+               1.33,
+               1.46,
+               1.08,
+               0.76,
+               1.20,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00,
+               1.00]
+
+ELEMENT_DATA = ["H",
+                "He",
+                "Li",
+                "Be",
+                "B",
+                "C",
+                "N",
+                "O",
+                "F",
+                "Ne",
+                "Na",
+                "Mg",
+                "Al",
+                "Si",
+                "P",
+                "S",
+                "Cl",
+                "Ar",
+                "K",
+                "Ca",
+                "Sc",
+                "Ti",
+                "V",
+                "Cr",
+                "Mn",
+                "Fe",
+                "Co",
+                "Ni",
+                "Cu",
+                "Zn",
+                "Ga",
+                "Ge",
+                "As",
+                "Se",
+                "Br",
+                "Kr",
+                "Rb",
+                "Sr",
+                "Y",
+                "Zr",
+                "Nb",
+                "Mo",
+                "Tc",
+                "Ru",
+                "Rh",
+                "Pd",
+                "Ag",
+                "Cd",
+                "In",
+                "Sn",
+                "Sb",
+                "Te",
+                "I",
+                "Xe",
+                "Cs",
+                "Ba",
+                "La",
+                "Ce",
+                "Pr",
+                "Nd",
+                "Pm",
+                "Sm",
+                "Eu",
+                "Gd",
+                "Tb",
+                "Dy",
+                "Ho",
+                "Er",
+                "Tm",
+                "Yb",
+                "Lu",
+                "Hf",
+                "Ta",
+                "W",
+                "Re",
+                "Os",
+                "Ir",
+                "Pt",
+                "Au",
+                "Hg",
+                "Tl",
+                "Pb",
+                "Bi",
+                "Po",
+                "At",
+                "Rn",
+                "Fr",
+                "Ra",
+                "Ac",
+                "Th",
+                "Pa",
+                "U",
+                "Np",
+                "Pu",
+                "Am",
+                "Cm",
+                "Bk",
+                "Cf",
+                "Es",
+                "Fm",
+                "Md",
+                "No",
+                "Lr",
+                "Rf",
+                "Db",
+                "Sg",
+                "Bh",
+                "Hs",
+                "Mt",
+                "Ds",
+                "Rg",
+                "Cn",
+                "Nh",
+                "Fl",
+                ]
+
+# Radius of the elements beyond RADIUS_DATA
+DEFAULT_RADIUS = 1.0
+
+# Index of each element symbol in the tables below, i.e. its atomic number minus one
+ELEMENT_INDEX: Dict[str, int] = {symbol: index for index, symbol in enumerate(ELEMENT_DATA)}
+# (E, 4) float32 RGBA color of each element
+ELEMENT_RGBA = (np.array([[int(color[i:i + 2], 16) for i in (0, 2, 4)] + [255]
+                          for color in COLOR_DATA[:len(ELEMENT_DATA)]], dtype=np.float32) / 255)
+# (E,) float32 radius of each element
+ELEMENT_RADII = np.array(RADIUS_DATA[:len(ELEMENT_DATA)] +
+                         [DEFAULT_RADIUS] * (len(ELEMENT_DATA) - len(RADIUS_DATA)), dtype=np.float32)
+# Element symbols in sorted order, with their index, for vectorised lookups
+_SORTED_INDICES = np.argsort(ELEMENT_DATA)
+_SORTED_SYMBOLS = np.array(ELEMENT_DATA)[_SORTED_INDICES]
+
+
+def element_index(labels: npt.ArrayLike) -> np.ndarray:
+    """
+    Index of each element symbol in the element tables, looked up for all the labels at once: a binary search over
+    the sorted symbols for a numpy string array, or a dictionary lookup per label in C for other sequences.
+
+    :param labels: Element symbols, e.g. ['Na', 'Cl', 'Na']
+    :return: Indices into `ELEMENT_RGBA` and `ELEMENT_RADII`, i.e. atomic numbers minus one
+    """
+    if isinstance(labels, np.ndarray) and labels.dtype.kind == 'U':
+        labels = labels.reshape(-1)
+        found = np.minimum(np.searchsorted(_SORTED_SYMBOLS, labels), len(_SORTED_SYMBOLS) - 1)
+        indices = np.where(_SORTED_SYMBOLS[found] == labels, _SORTED_INDICES[found], -1)
+    else:
+        labels = [labels] if isinstance(labels, str) else labels
+        indices = np.fromiter(map(ELEMENT_INDEX.get, labels, itertools.repeat(-1)), dtype=np.int64)
+    if np.any(indices < 0):
+        raise ValueError(f"Atom {np.asarray(labels)[np.argmax(indices < 0)]} not found in ELEMENT_DATA")
+    return indices
+
+
+def atomic_number_index(numbers: npt.ArrayLike) -> np.ndarray:
+    """
+    Index of each atomic number in the element tables.
+
+    :param numbers: Atomic numbers, from 1
+    :return: Indices into `ELEMENT_RGBA` and `ELEMENT_RADII`
+    """
+    numbers = np.asarray(numbers).reshape(-1)
+    valid = (numbers >= 1) & (numbers <= len(ELEMENT_DATA)) & (numbers == np.floor(numbers))
+    if not np.all(valid):
+        raise ValueError(f"Atom {numbers[~valid][0]} is not valid")
+    return numbers.astype(np.int64) - 1
@@ -0,0 +1,262 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from crysvue.logic.sites import DEFAULT_TOLERANCE, SiteHash
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+
+def lattice_translations(extent: npt.ArrayLike) -> np.ndarray:
+    """
+    Generate all integer lattice translations in the range [-1, extent] for each axis. The translations are ordered
+    with x varying fastest, followed by y and then z.
+
+    :param extent: Number of unit cells along each axis
+    :return: (C, 3) array of integer translations
+    """
+    extent = np.asarray(extent, dtype=int)
+    z, y, x = np.meshgrid(np.arange(-1, extent[2] + 1),
+                          np.arange(-1, extent[1] + 1),
+                          np.arange(-1, extent[0] + 1), indexing='ij')
+    return np.stack([x.ravel(), y.ravel(), z.ravel()], axis=1)
+
+
+def identity_index(rotations: npt.ArrayLike, translations: npt.ArrayLike) -> int:
+    """
+    Find the identity operator in a set of symmetry operators.
+
+    :param rotations: (O, 3, 3) rotation matrices W
+    :param translations: (O, 3) translation vectors w
+    :return: Index of the identity operator, or -1 if there is none
+    """
+    rotations = np.asarray(rotations)
+    translations = np.asarray(translations).reshape(-1, 3)
+    found = np.flatnonzero(np.all(rotations == np.eye(3), axis=(1, 2)) & np.all(translations == 0, axis=1))
+    return int(found[0]) if len(found) else -1
+
+
+def tile_orbit(orbit: npt.ArrayLike, extent: npt.ArrayLike, lower: npt.ArrayLike = (0, 0, 0),
+               upper: Optional[npt.ArrayLike] = None,
+               tolerance: float = DEFAULT_TOLERANCE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Place the lattice images of the sites of a home-cell orbit in a block of unit cells, in one broadcast operation.
+    Sites in [-tolerance, 1 - tolerance) have images at integer translations in [lower, upper]. A site on a face
+    between two blocks belongs to the block above it, and faces at the top of the supercell are closed, so that the
+    blocks tiling a supercell share no sites.
+
+    :param orbit: (M, 3) sites of the orbit in the home cell, e.g. from `home_cell_orbit`
+    :param extent: Number of unit cells along each axis of the supercell
+    :param lower: Lower corner of the block, in unit cells
+    :param upper: Upper corner of the block, in unit cells. Defaults to the extent.
+    :param tolerance: Fractional distance within which two sites are the same
+    :return: (N,) index of the orbit site and (N, 3) lattice translation of each image, ordered by translation with x
+        varying fastest and then by orbit site
+    """
+    orbit = np.asarray(orbit, dtype=float).reshape(-1, 3)
+    extent = np.asarray(extent, dtype=int).reshape(3)
+    lower = np.asarray(lower, dtype=int).reshape(3)
+    upper = extent if upper is None else np.asarray(upper, dtype=int).reshape(3)
+
+    z, y, x = np.meshgrid(*[np.arange(lower[i], upper[i] + 1) for i in (2, 1, 0)], indexing='ij')
+    cells = np.stack([x.ravel(), y.ravel(), z.ravel()], axis=1)
+    sites = cells[:, np.newaxis, :] + orbit[np.newaxis, :, :]
+    cell_index, orbit_index = np.nonzero(np.all(_in_block(sites, extent, lower, upper, tolerance), axis=-1))
+    return orbit_index, cells[cell_index]
+
+
+def _in_block(sites: np.ndarray, extent: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+              tolerance: float) -> np.ndarray:
+    """
+    Whether each coordinate of the sites is in a block of unit cells, with the faces of `tile_orbit`
+    """
+    above = sites >= lower - tolerance
+    below = np.where(upper >= extent, sites <= upper + tolerance, sites < upper - tolerance)
+    return above & below
+
+
+def count_tiled_sites(orbit: npt.ArrayLike, extent: npt.ArrayLike, lower: npt.ArrayLike = (0, 0, 0),
+                      upper: Optional[npt.ArrayLike] = None, tolerance: float = DEFAULT_TOLERANCE) -> np.ndarray:
+    """
+    Number of images of each orbit site which `tile_orbit` places in a block, without generating them. The faces of
+    the block are tested along each axis separately, and the counts along the axes multiplied.
+
+    :return: (M,) number of images of each orbit site
+    """
+    orbit = np.asarray(orbit, dtype=float).reshape(-1, 3)
+    extent = np.asarray(extent, dtype=int).reshape(3)
+    lower = np.asarray(lower, dtype=int).reshape(3)
+    upper = extent if upper is None else np.asarray(upper, dtype=int).reshape(3)
+    counts = np.ones(len(orbit), dtype=np.int64)
+    for axis in range(3):
+        cells = np.arange(lower[axis], upper[axis] + 1)
+        inside = _in_block(orbit[:, axis, np.newaxis] + cells, extent[axis], lower[axis], upper[axis], tolerance)
+        counts *= inside.sum(axis=1)
+    return counts
+
+
+def _tiled_sites(rotations: np.ndarray, orbit: Tuple[np.ndarray, np.ndarray, np.ndarray], extent: npt.ArrayLike,
+                 lower: npt.ArrayLike, upper: Optional[npt.ArrayLike],
+                 tolerance: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tile a home-cell orbit over a block, keeping the generator of every site. The home-cell site u = W position + w + s
+    moved by the lattice vector m is W (position + t) + w with t = W^-1 (s + m).
+    """
+    sites, operators, shifts = orbit
+    orbit_index, moves = tile_orbit(sites, extent, lower, upper, tolerance=tolerance)
+    inverses = np.rint(np.linalg.inv(rotations[operators])).astype(int)
+    cells = np.einsum('nij,nj->ni', inverses[orbit_index], shifts[orbit_index] + moves)
+    return sites[orbit_index] + moves, operators[orbit_index], cells
+
+
+def _is_position(sites: np.ndarray, position: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Whether each site is the given position, whose image is replaced by the position itself
+    """
+    return np.all(np.abs(sites - position) <= tolerance, axis=-1)
+
+
+def _with_position(sites: np.ndarray, operators: np.ndarray, cells: np.ndarray, position: np.ndarray,
+                   identity: Optional[int], tolerance: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Remove the image of the given position from the sites, and put the position first, generated by the identity,
+    unless `identity` is None.
+    """
+    keep = ~_is_position(sites, position, tolerance)
+    if identity is None:
+        return sites[keep], operators[keep], cells[keep]
+    return (np.concatenate([position.reshape(1, 3), sites[keep]]),
+            np.concatenate([[identity], operators[keep]]),
+            np.concatenate([np.zeros((1, 3), dtype=cells.dtype), cells[keep]]))
+
+
+def expand_positions(rotations: npt.ArrayLike, translations: npt.ArrayLike, position: npt.ArrayLike,
+                     extent: npt.ArrayLike,
+                     tolerance: float = DEFAULT_TOLERANCE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Apply the symmetry operators (W, w) to a position and place its images in [0, extent]. The orbit is expanded once
+    in the home cell, then tiled over the supercell by integer translations with `tile_orbit`, so the cost scales
+    with the number of cells times the size of the orbit. The given position is always the first site and is reported
+    with the index of the identity operator (-1 if the operators do not contain the identity).
+
+    :param rotations: (O, 3, 3) rotation matrices W
+    :param translations: (O, 3) translation vectors w
+    :param position: Fractional position of the atom
+    :param extent: Number of unit cells along each axis
+    :param tolerance: Fractional distance within which two sites are the same
+    :return: (N, 3) positions, (N,) operator indices and (N, 3) lattice translations
+    """
+    position = np.asarray(position, dtype=float).reshape(3)
+    rotations = np.asarray(rotations)
+    translations = np.asarray(translations, dtype=float).reshape(-1, 3)
+
+    orbit = home_cell_orbit(rotations, translations, position, tolerance=tolerance)
+    sites, operators, cells = _tiled_sites(rotations, orbit, extent, (0, 0, 0), None, tolerance)
+    return _with_position(sites, operators, cells, position, identity_index(rotations, translations), tolerance)
+
+
+def count_positions(rotations: npt.ArrayLike, translations: npt.ArrayLike, position: npt.ArrayLike,
+                    extent: npt.ArrayLike, tolerance: float = DEFAULT_TOLERANCE,
+                    orbit: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None) -> int:
+    """
+    Number of sites of `expand_positions`, counted without generating them, e.g. to allocate the dataset of a
+    supercell which is generated one block at a time.
+
+    :param orbit: The home-cell orbit of the position, from `home_cell_orbit`, if it is already known
+    """
+    position = np.asarray(position, dtype=float).reshape(3)
+    if orbit is None:
+        orbit = home_cell_orbit(rotations, translations, position, tolerance=tolerance)
+    extent = np.asarray(extent, dtype=int).reshape(3)
+    sites = orbit[0]
+    # The image of an orbit site nearest to the position, which is left out if it is in the supercell
+    images = sites + np.rint(position - sites)
+    replaced = _is_position(images, position, tolerance) & \
+        np.all(_in_block(images, extent, np.zeros(3, dtype=int), extent, tolerance), axis=1)
+    return int(count_tiled_sites(sites, extent, tolerance=tolerance).sum() - replaced.sum() + 1)
+
+
+def cell_blocks(extent: npt.ArrayLike, block: npt.ArrayLike) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Split a supercell into blocks of unit cells. The blocks are ordered with x varying fastest, followed by y and
+    then z.
+
+    :param extent: Number of unit cells along each axis
+    :param block: Number of unit cells along each axis of a block
+    :return: List of (lower, upper) corners of the blocks, in unit cells
+    """
+    extent = np.asarray(extent, dtype=int).reshape(3)
+    block = np.broadcast_to(np.asarray(block, dtype=int), (3,))
+    starts = [np.arange(0, max(e, 1), b) for e, b in zip(extent, block)]
+    blocks = []
+    for z in starts[2]:
+        for y in starts[1]:
+            for x in starts[0]:
+                lower = np.array([x, y, z])
+                blocks.append((lower, np.minimum(lower + block, extent)))
+    return blocks
+
+
+def expand_positions_in_block(rotations: npt.ArrayLike, translations: npt.ArrayLike, position: npt.ArrayLike,
+                              extent: npt.ArrayLike, lower: npt.ArrayLike, upper: npt.ArrayLike,
+                              tolerance: float = DEFAULT_TOLERANCE,
+                              orbit: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+                              ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The sites of `expand_positions` which fall in a block of unit cells, tiled from the home-cell orbit with
+    `tile_orbit`. Blocks tiling the supercell share no sites, and together give the sites of `expand_positions`: the
+    given position is in the block at the origin, even if it is outside the supercell, and its image is in none.
+
+    :param rotations: (O, 3, 3) rotation matrices W
+    :param translations: (O, 3) translation vectors w
+    :param position: Fractional position of the atom
+    :param extent: Number of unit cells along each axis of the supercell
+    :param lower: Lower corner of the block, in unit cells
+    :param upper: Upper corner of the block, in unit cells
+    :param tolerance: Fractional distance within which two sites are the same
+    :param orbit: The home-cell orbit of the position, from `home_cell_orbit`, so that it is not expanded for every
+        block
+    :return: (N, 3) positions, (N,) operator indices and (N, 3) lattice translations
+    """
+    position = np.asarray(position, dtype=float).reshape(3)
+    rotations = np.asarray(rotations)
+    translations = np.asarray(translations, dtype=float).reshape(-1, 3)
+    if orbit is None:
+        orbit = home_cell_orbit(rotations, translations, position, tolerance=tolerance)
+    sites, operators, cells = _tiled_sites(rotations, orbit, extent, lower, upper, tolerance)
+    identity = identity_index(rotations, translations) if not np.any(lower) else None
+    return _with_position(sites, operators, cells, position, identity, tolerance)
+
+
+def home_cell_orbit(rotations: npt.ArrayLike, translations: npt.ArrayLike, position: npt.ArrayLike,
+                    tolerance: float = DEFAULT_TOLERANCE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Apply every symmetry operator to a position and wrap the resulting sites into the home cell [0, 1). Sites which
+    are equivalent under a lattice translation are only kept once.
+
+    :param rotations: (O, 3, 3) rotation matrices W
+    :param translations: (O, 3) translation vectors w
+    :param position: Fractional position of the atom
+    :param tolerance: Fractional distance within which two sites are the same
+    :return: (M, 3) positions in the home cell, (M,) operator indices and (M, 3) lattice translations added by the wrap
+    """
+    position = np.asarray(position, dtype=float).reshape(3)
+    rotations = np.asarray(rotations)
+    translations = np.asarray(translations, dtype=float).reshape(-1, 3)
+
+    sites = np.einsum('oij,j->oi', rotations, position) + translations
+    shifts = -np.floor(sites + tolerance)
+    sites = sites + shifts
+
+    keep = SiteHash.unique(sites, tolerance=tolerance, period=1)
+    return sites[keep], keep, shifts[keep].astype(int)
@@ -0,0 +1,143 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+from itertools import product
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+# Fractional coordinates closer than this (along every axis) are considered to be the same site
+DEFAULT_TOLERANCE = 1e-6
+
+# Sign pattern of the 8 voxels which can hold a site within tolerance of a point
+_OFFSETS = np.array(list(product((0, 1), repeat=3)), dtype=np.int64)
+
+
+class SiteHash:
+    """
+    A hashed voxel grid over fractional coordinates, used to find equivalent sites. Two sites are equivalent when
+    every component of their separation is within `tolerance`. The voxels are twice the tolerance wide, so only the
+    home voxel and its 7 neighbours on the near side of the point need to be searched, giving O(N) expected time to
+    deduplicate N sites.
+
+    If a `period` is given, coordinates are wrapped into [0, period) and separations use the minimum image, so that
+    e.g. 0 and 1 are the same site for a period of 1.
+    """
+
+    def __init__(self, tolerance: float = DEFAULT_TOLERANCE, period: Optional[npt.ArrayLike] = None):
+        """
+        :param tolerance: Maximum separation along each axis for two sites to be equivalent
+        :param period: Optional periodicity along each axis, e.g. (1, 1, 1) for wrap-around in a unit cell
+        """
+        if tolerance <= 0:
+            raise ValueError("Tolerance must be positive")
+        self._tolerance = tolerance
+        if period is None:
+            self._period = None
+            self._n_voxels = None
+            self._voxel = np.full(3, 2 * tolerance)
+        else:
+            self._period = np.broadcast_to(np.asarray(period, dtype=float), (3,)).copy()
+            self._n_voxels = np.maximum(np.floor(self._period / (2 * tolerance)), 1).astype(np.int64)
+            self._voxel = self._period / self._n_voxels
+        self._buckets: Dict[tuple, List[int]] = {}
+        self._positions: List[np.ndarray] = []
+
+    @property
+    def tolerance(self) -> float:
+        return self._tolerance
+
+    @property
+    def period(self) -> Optional[np.ndarray]:
+        return self._period
+
+    @property
+    def positions(self) -> np.ndarray:
+        """
+        The distinct sites stored in the hash, in insertion order
+        """
+        if not self._positions:
+            return np.zeros((0, 3))
+        return np.array(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _prepare(self, points: npt.ArrayLike):
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if self._period is not None:
+            points = np.mod(points, self._period)
+        scaled = points / self._voxel
+        voxels = np.floor(scaled).astype(np.int64)
+        # Search towards the nearer face of the voxel along each axis. The home voxel is the first entry.
+        direction = np.where(scaled - voxels < 0.5, -1, 1)
+        neighbours = voxels[:, np.newaxis, :] + _OFFSETS[np.newaxis, :, :] * direction[:, np.newaxis, :]
+        if self._n_voxels is not None:
+            neighbours = np.mod(neighbours, self._n_voxels)
+        return points, neighbours.tolist()
+
+    def _find(self, point: np.ndarray, neighbours: List[List[int]]) -> int:
+        for voxel in neighbours:
+            for index in self._buckets.get(tuple(voxel), ()):
+                delta = self._positions[index] - point
+                if self._period is not None:
+                    delta -= self._period * np.round(delta / self._period)
+                if np.all(np.abs(delta) <= self._tolerance):
+                    return index
+        return -1
+
+    def query(self, points: npt.ArrayLike) -> np.ndarray:
+        """
+        Find the stored site equivalent to each point.
+
+        :param points: (N, 3) array of fractional coordinates
+        :return: (N,) array of site indices, -1 where there is no equivalent site
+        """
+        points, neighbours = self._prepare(points)
+        found = np.empty(len(points), dtype=np.int64)
+        for i, (point, voxels) in enumerate(zip(points, neighbours)):
+            found[i] = self._find(point, voxels)
+        return found
+
+    def insert(self, points: npt.ArrayLike) -> np.ndarray:
+        """
+        Add points to the hash. Points equivalent to an existing site are not added again.
+
+        :param points: (N, 3) array of fractional coordinates
+        :return: (N,) array with the index of the site each point was matched to or stored as
+        """
+        points, neighbours = self._prepare(points)
+        found = np.empty(len(points), dtype=np.int64)
+        for i, (point, voxels) in enumerate(zip(points, neighbours)):
+            index = self._find(point, voxels)
+            if index < 0:
+                index = len(self._positions)
+                self._positions.append(point)
+                self._buckets.setdefault(tuple(voxels[0]), []).append(index)
+            found[i] = index
+        return found
+
+    @classmethod
+    def unique(cls, points: npt.ArrayLike, tolerance: float = DEFAULT_TOLERANCE,
+               period: Optional[npt.ArrayLike] = None) -> np.ndarray:
+        """
+        Find the first occurrence of every distinct site in an array of points.
+
+        :param points: (N, 3) array of fractional coordinates
+        :param tolerance: Maximum separation along each axis for two sites to be equivalent
+        :param period: Optional periodicity along each axis
+        :return: Sorted indices of the first occurrence of each distinct site
+        """
+        site_hash = cls(tolerance=tolerance, period=period)
+        matches = site_hash.insert(points)
+        _, first = np.unique(matches, return_index=True)
+        return np.sort(first)
@@ -0,0 +1,228 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import functools
+import os
+import re
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+# Tables written by `crysvue/misc/extract_sg.py`
+TABLE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'misc')
+SETTINGS_FILE = 'spacegroup_settings.npy'
+OPERATORS_FILE = 'spacegroup_operators.npy'
+# Translations are stored as multiples of 1/TRANSLATION_DENOMINATOR
+TRANSLATION_DENOMINATOR = 12
+# Number of Hall settings in the tables
+N_HALL_NUMBERS = 530
+
+
+class SpaceGroupSetting(NamedTuple):
+    """
+    A Hall setting of a space group
+    """
+    hall_number: int
+    number: int
+    schoenflies: str
+    hall_symbol: str
+    international: str
+    international_full: str
+    international_short: str
+    choice: str
+    centering: str
+    pointgroup_number: int
+
+
+class SpaceGroupSymmetry:
+    """
+    The operators of a Hall setting, read from the space-group tables. It provides the rotations `W` and translations
+    `w` of a `brille.Symmetry`, in the same order.
+    """
+
+    def __init__(self, hall_number: int):
+        settings, operators = _tables()
+        hall_number = _check_hall_number(hall_number)
+        offset = int(settings['offset'][hall_number])
+        table = operators[offset:offset + int(settings['count'][hall_number])]
+        self._hall_number = hall_number
+        self._W = table['rotation']
+        self._w = table['translation'] / TRANSLATION_DENOMINATOR
+
+    @property
+    def hall_number(self) -> int:
+        return self._hall_number
+
+    @property
+    def setting(self) -> SpaceGroupSetting:
+        return spacegroup_setting(self._hall_number)
+
+    @property
+    def W(self) -> np.ndarray:
+        """
+        (O, 3, 3) int8 rotation matrices, a read-only view of the table
+        """
+        return self._W
+
+    @property
+    def w(self) -> np.ndarray:
+        """
+        (O, 3) translation vectors
+        """
+        return self._w
+
+    @property
+    def size(self) -> int:
+        return len(self._W)
+
+    def __len__(self) -> int:
+        return len(self._W)
+
+    def __repr__(self) -> str:
+        setting = self.setting
+        return f"<SpaceGroupSymmetry {setting.hall_number}: {setting.international} ({setting.hall_symbol})>"
+
+
+@functools.lru_cache(maxsize=None)
+def _tables() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The settings and operators tables, memory-mapped on first use. Plain array views of the mapping are returned, as
+    indexing a `np.memmap` is several times slower.
+    """
+    return (np.asarray(np.load(os.path.join(TABLE_DIRECTORY, SETTINGS_FILE), mmap_mode='r')),
+            np.asarray(np.load(os.path.join(TABLE_DIRECTORY, OPERATORS_FILE), mmap_mode='r')))
+
+
+def _check_hall_number(hall_number: int) -> int:
+    if isinstance(hall_number, bool) or not isinstance(hall_number, (int, np.integer)) or \
+            not 1 <= hall_number <= N_HALL_NUMBERS:
+        raise ValueError(f"Hall number {hall_number} is not in the range 1 to {N_HALL_NUMBERS}")
+    return int(hall_number)
+
+
+def _spaced(symbol: str) -> str:
+    """
+    Symbols are compared exactly up to runs of whitespace, so that 'P  21/c' is 'P 21/c'
+    """
+    return ' '.join(symbol.split())
+
+
+def _compact(symbol: str) -> str:
+    """
+    Hermann-Mauguin symbols are compared without spaces and subscript marks, so that 'P 21/c' is 'P 2_1/c'
+    """
+    return re.sub(r'[\s_]', '', symbol)
+
+
+@functools.lru_cache(maxsize=None)
+def _symbol_index() -> Tuple[Dict[str, int], Dict[str, int], Dict[str, int]]:
+    """
+    Hall number of every Hermann-Mauguin symbol, as spaced and compacted, and of every Hall symbol. A Hermann-Mauguin
+    symbol refers to its first, standard, setting.
+    """
+    settings, _ = _tables()
+    spaced_hm, hm, hall = {}, {}, {}
+    for row in settings[1:]:
+        hall_number = int(row['hall_number'])
+        names = row['international'].decode().split('=') + [row['international_full'].decode(),
+                                                             row['international_short'].decode()]
+        for name in names:
+            spaced_hm.setdefault(_spaced(name), hall_number)
+            hm.setdefault(_compact(name), hall_number)
+        hall.setdefault(_spaced(row['hall_symbol'].decode()), hall_number)
+    return spaced_hm, hm, hall
+
+
+def spacegroup_setting(hall_number: int) -> SpaceGroupSetting:
+    """
+    Description of a Hall setting
+
+    :param hall_number: Hall number, from 1 to 530
+    """
+    settings, _ = _tables()
+    row = settings[_check_hall_number(hall_number)]
+    return SpaceGroupSetting(int(row['hall_number']), int(row['number']),
+                             *[row[name].decode() for name in SpaceGroupSetting._fields[2:9]],
+                             int(row['pointgroup_number']))
+
+
+def spacegroup_settings(it_number: int) -> np.ndarray:
+    """
+    Hall numbers of all the settings of a space group, starting with the standard setting
+
+    :param it_number: International Tables number, from 1 to 230
+    """
+    settings, _ = _tables()
+    # Row 0 is a placeholder, as Hall numbers start at 1
+    return np.flatnonzero(settings['number'][1:] == it_number) + 1
+
+
+def find_hall_number(hm: Optional[str] = None, hall_symbol: Optional[str] = None, it_number: Optional[int] = None,
+                     choice: Optional[str] = None) -> int:
+    """
+    Look up the Hall number of a space-group setting from one of its symbols.
+
+    :param hm: Hermann-Mauguin symbol, full or short, e.g. 'P 21/c', 'P 1 21/c 1' or 'P21/c'
+    :param hall_symbol: Hall symbol, e.g. '-P 2ybc'
+    :param it_number: International Tables number, from 1 to 230
+    :param choice: Setting choice among those of the space group, e.g. 'b1' or '2'. By default the standard setting.
+    :return: Hall number
+    """
+    if sum(value is not None for value in (hm, hall_symbol, it_number)) != 1:
+        raise ValueError("Exactly one of hm, hall_symbol and it_number must be given")
+    _, hm_index, hall_index = _symbol_index()
+    if hall_symbol is not None:
+        hall_number = hall_index.get(_spaced(hall_symbol))
+        if hall_number is None:
+            raise ValueError(f"Hall symbol {hall_symbol} not found")
+        return hall_number
+    if hm is not None:
+        hall_number = hm_index.get(_compact(hm))
+        if hall_number is None:
+            raise ValueError(f"Hermann-Mauguin symbol {hm} not found")
+        it_number = spacegroup_setting(hall_number).number
+        if choice is None:
+            return hall_number
+
+    settings, _ = _tables()
+    candidates = spacegroup_settings(it_number)
+    if not len(candidates):
+        raise ValueError(f"Space group number {it_number} not found")
+    if choice is None:
+        return int(candidates[0])
+    for hall_number in candidates:
+        if settings[hall_number]['choice'].decode() == choice:
+            return int(hall_number)
+    raise ValueError(f"Setting {choice} of space group number {it_number} not found")
+
+
+def lookup_symmetry(symbol: Union[str, int]) -> Optional[SpaceGroupSymmetry]:
+    """
+    The tabulated symmetry of a symbol, if it is a Hall number, a Hall symbol or a Hermann-Mauguin symbol. Some
+    symbols are both: a symbol which is exactly a Hermann-Mauguin symbol, up to whitespace, reads as one, so 'P 2' is
+    P 1 2 1 (Hall number 3) as with `find_hall_number`. Otherwise an exact Hall symbol comes before a Hermann-Mauguin
+    symbol written without its spaces, so 'P 4 2' is the Hall symbol of P 4 2 2 (366) rather than P42 (351). Other
+    symbols, such as lists of operators 'x,y,z;-x,-y,-z', are not tabulated.
+
+    :param symbol: Hall number or symbol
+    :return: The symmetry, or None if the symbol is not in the tables
+    """
+    if isinstance(symbol, (int, np.integer)) and not isinstance(symbol, bool):
+        return SpaceGroupSymmetry(symbol)
+    if not isinstance(symbol, str) or ',' in symbol:
+        return None
+    spaced_hm_index, hm_index, hall_index = _symbol_index()
+    # Hall symbols such as 'P 4 2' compact to another group's Hermann-Mauguin symbol, 'P42', so they are matched before
+    # compacted symbols
+    hall_number = spaced_hm_index.get(_spaced(symbol))
+    if hall_number is None:
+        hall_number = hall_index.get(_spaced(symbol))
+    if hall_number is None:
+        hall_number = hm_index.get(_compact(symbol))
+    return None if hall_number is None else SpaceGroupSymmetry(hall_number)
@@ -0,0 +1,252 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+from typing import Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+# Average number of points in an occupied grid cell
+POINTS_PER_CELL = 256
+
+
+def ragged_ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """
+    Concatenate arange(start, stop) for every (start, stop).
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.asarray(stops, dtype=np.int64) - starts
+    owner = np.repeat(np.arange(len(counts)), counts)
+    return starts[owner] + np.arange(owner.size) - (np.cumsum(counts) - counts)[owner]
+
+
+def slab_planes(normal: npt.ArrayLike, origin: npt.ArrayLike, thickness: float) -> np.ndarray:
+    """
+    Clip planes keeping a slab of a given thickness centred on a point.
+
+    :param normal: Direction across the slab
+    :param origin: Point in the middle of the slab
+    :param thickness: Width of the slab along the normal
+    :return: (2, 4) planes as used by `SpatialGrid.cull`
+    """
+    normal = np.asarray(normal, dtype=float)
+    normal = normal / np.linalg.norm(normal)
+    offset = float(np.dot(normal, origin))
+    return np.array([[*normal, thickness / 2 - offset],
+                     [*-normal, thickness / 2 + offset]])
+
+
+def frustum_planes(matrix: npt.ArrayLike, width: float, height: float) -> np.ndarray:
+    """
+    Clip planes of the region seen by a camera. Points beyond the far plane are kept.
+
+    :param matrix: (4, 4) matrix mapping homogeneous row vectors to canvas pixels, e.g. `transform.map(np.eye(4))`
+    :param width: Width of the canvas in the same pixels
+    :param height: Height of the canvas in the same pixels
+    :return: (5, 4) planes as used by `SpatialGrid.cull`
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    x, y, w = matrix[:, 0], matrix[:, 1], matrix[:, 3]
+    # 0 <= x/w <= width, 0 <= y/w <= height and in front of the camera
+    return np.array([x, width * w - x, y, height * w - y, w])
+
+
+class SpatialGrid:
+    """
+    A uniform grid over a set of points, e.g. the sites of `AtomsLogic.positions` in scene coordinates. The points are
+    sorted by cell, so the points of a cell are a contiguous range of `order`. Each cell keeps the bounding box of its
+    points, grown by their radii, so that whole cells can be culled against clip planes. Moving some points updates
+    the grid in place.
+    """
+
+    def __init__(self, positions: npt.ArrayLike, radii: Optional[npt.ArrayLike] = None,
+                 points_per_cell: int = POINTS_PER_CELL):
+        """
+        :param positions: (N, 3) positions of the points
+        :param radii: (N,) radii of the points, or None for points without extent
+        :param points_per_cell: Average number of points in an occupied cell
+        """
+        positions = np.array(positions, dtype=float).reshape(-1, 3)
+        radii = np.zeros(len(positions)) if radii is None else np.array(radii, dtype=float).reshape(-1)
+        self._positions = positions
+        self._radii = np.broadcast_to(radii, len(positions)).copy()
+
+        n_points = len(positions)
+        self._lower = positions.min(axis=0) if n_points else np.zeros(3)
+        span = (positions.max(axis=0) if n_points else np.zeros(3)) - self._lower
+        # Cells are roughly cubic, so that slab-like supercells are split along their long axes only
+        volume = np.prod(np.maximum(span, span.max() * 1e-3 + 1e-12))
+        edge = (volume * points_per_cell / max(n_points, 1)) ** (1 / 3)
+        self._shape = tuple(np.maximum(np.ceil(span / edge), 1).astype(int).tolist()) if edge > 0 else (1, 1, 1)
+        self._cell_size = np.maximum(span / self._shape, 1e-12)
+
+        self._cells = self.cell_of(positions)
+        self._order = np.argsort(self._cells, kind='stable')
+        self._counts = np.bincount(self._cells, minlength=self.n_cells)
+        self._stops = np.cumsum(self._counts)
+        self._box_lower = np.full((self.n_cells, 3), np.inf)
+        self._box_upper = np.full((self.n_cells, 3), -np.inf)
+        self._max_radii = np.zeros(self.n_cells)
+        self._update_bounds(np.arange(self.n_cells))
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self._shape
+
+    @property
+    def n_cells(self) -> int:
+        return int(np.prod(self._shape))
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self._positions
+
+    @property
+    def radii(self) -> np.ndarray:
+        return self._radii
+
+    @property
+    def order(self) -> np.ndarray:
+        """
+        Indices of the points sorted by cell
+        """
+        return self._order
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        Number of points in each cell
+        """
+        return self._counts
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self._stops - self._counts
+
+    @property
+    def stops(self) -> np.ndarray:
+        return self._stops
+
+    @property
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (n_cells, 3) lower and upper corners of the box around the points of each cell, including their radii. Empty
+        cells have an inverted box.
+        """
+        return self._box_lower, self._box_upper
+
+    @property
+    def centers(self) -> np.ndarray:
+        """
+        Centre of the box of each cell. Empty cells, whose box is inverted, have their centre at the origin.
+        """
+        centers = np.zeros((self.n_cells, 3))
+        occupied = self._counts > 0
+        centers[occupied] = (self._box_lower[occupied] + self._box_upper[occupied]) / 2
+        return centers
+
+    @property
+    def max_radii(self) -> np.ndarray:
+        """
+        Largest radius of the points in each cell
+        """
+        return self._max_radii
+
+    def cell_of(self, positions: npt.ArrayLike) -> np.ndarray:
+        """
+        Flat index of the cell holding each position. Positions outside the grid belong to the nearest edge cell.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        index = np.floor((positions - self._lower) / self._cell_size).astype(np.int64)
+        index = np.clip(index, 0, np.asarray(self._shape) - 1)
+        return np.ravel_multi_index(index.T, self._shape)
+
+    def indices(self, cells: npt.ArrayLike) -> np.ndarray:
+        """
+        Indices of the points in some cells
+
+        :param cells: Cell indices, or a boolean mask over the cells
+        """
+        cells = np.asarray(cells)
+        if cells.dtype == bool:
+            cells = np.flatnonzero(cells)
+        return self._order[ragged_ranges(self.starts[cells], self._stops[cells])]
+
+    def cull(self, planes: npt.ArrayLike) -> np.ndarray:
+        """
+        Cells which may hold a point inside the region bounded by some planes. A point p is inside when
+        dot(plane[:3], p) + plane[3] >= 0 for every plane.
+
+        :param planes: (P, 4) planes, e.g. from `frustum_planes` or `slab_planes`
+        :return: (n_cells,) boolean mask of the occupied cells whose box is not wholly outside a plane
+        """
+        planes = np.asarray(planes, dtype=float).reshape(-1, 4)
+        visible = self._counts > 0
+        # Only the boxes of occupied cells are finite
+        occupied = np.flatnonzero(visible)
+        lower, upper = self._box_lower[occupied], self._box_upper[occupied]
+        # Distance of the box corner furthest along each plane normal
+        furthest = (lower + upper) / 2 @ planes[:, :3].T + planes[:, 3] + (upper - lower) / 2 @ np.abs(planes[:, :3]).T
+        visible[occupied] = np.all(furthest >= 0, axis=1)
+        return visible
+
+    def update(self, indices: npt.ArrayLike, positions: npt.ArrayLike, radii: Optional[npt.ArrayLike] = None) -> None:
+        """
+        Move some points. Only the cells which the points leave or enter are updated, and the order is only changed
+        when a point changes cell.
+
+        :param indices: Indices of the points which moved, or a slice
+        :param positions: New positions of the points
+        :param radii: New radii of the points, or None to keep their radii
+        """
+        indices = np.arange(len(self._positions))[indices] if isinstance(indices, slice) else \
+            np.asarray(indices, dtype=np.int64).reshape(-1)
+        self._positions[indices] = np.asarray(positions, dtype=float).reshape(-1, 3)
+        if radii is not None:
+            self._radii[indices] = radii
+        old_cells = self._cells[indices]
+        new_cells = self.cell_of(self._positions[indices])
+        moved = old_cells != new_cells
+        if moved.any():
+            self._move(indices[moved], old_cells[moved], new_cells[moved])
+        self._update_bounds(np.unique(np.concatenate([old_cells, new_cells])))
+
+    def _move(self, indices: np.ndarray, old_cells: np.ndarray, new_cells: np.ndarray) -> None:
+        """
+        Take points out of the order and insert them again at the end of their new cells, without sorting.
+        """
+        self._cells[indices] = new_cells
+        leaving = np.zeros(len(self._positions), dtype=bool)
+        leaving[indices] = True
+        kept = self._order[~leaving[self._order]]
+        np.subtract.at(self._counts, old_cells, 1)
+        np.add.at(self._counts, new_cells, 1)
+        # The kept points are still sorted by cell, so each moved point goes before the next cell
+        sort = np.argsort(new_cells, kind='stable')
+        slots = np.searchsorted(self._cells[kept], new_cells[sort], side='right')
+        self._order = np.insert(kept, slots, indices[sort])
+        self._stops = np.cumsum(self._counts)
+
+    def _update_bounds(self, cells: np.ndarray) -> None:
+        counts = self._counts[cells]
+        self._box_lower[cells] = np.inf
+        self._box_upper[cells] = -np.inf
+        self._max_radii[cells] = 0
+        cells = cells[counts > 0]
+        if not len(cells):
+            return
+        members = self.indices(cells)
+        offsets = np.cumsum(self._counts[cells]) - self._counts[cells]
+        positions = self._positions[members]
+        radii = self._radii[members, np.newaxis]
+        self._box_lower[cells] = np.minimum.reduceat(positions - radii, offsets)
+        self._box_upper[cells] = np.maximum.reduceat(positions + radii, offsets)
+        self._max_radii[cells] = np.maximum.reduceat(radii[:, 0], offsets)
@@ -5,7 +5,7 @@
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-from typing import Optional
+from typing import Optional, Tuple
 
 import numpy as np
 
@@ -17,3 +17,25 @@ class SpinLogic:
     @property
     def arrow_base_position(self):
         return - np.linalg.norm(self._spin_base_vector) / 2
+
+
+def magnetic_operators(symbol: str) -> Tuple[str, np.ndarray]:
+    """
+    Split the operators of a magnetic space group, written as in magCIF with the time reversal as a fourth component
+    (e.g. 'x,y,z,+1;-x,-y,-z,-1'), into a symmetry string and the time-reversal flags.
+
+    :param symbol: Operators separated by ';'
+    :return: Symmetry string understood by `brille.Symmetry` and the (O,) time-reversal flags as +1/-1
+    """
+    operators = []
+    flags = []
+    for operator in symbol.split(';'):
+        components = [c.strip() for c in operator.split(',')]
+        if len(components) == 3:
+            flags.append(1)
+        elif len(components) == 4:
+            flags.append(-1 if components[3].startswith('-') else 1)
+        else:
+            raise ValueError(f"Operator {operator} is not a magnetic symmetry operator")
+        operators.append(','.join(components[:3]))
+    return ';'.join(operators), np.array(flags, dtype=np.int8)
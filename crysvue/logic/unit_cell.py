@@ -17,77 +17,31 @@ class UnitCellLogic:
             frac_to_abc = np.eye(3)
         if center is None:
             center = np.array(extent)/2
-        points = self.generate_unit_cell(extent=extent, center=center)
-        self._unit_cell_points = np.matmul(points, frac_to_abc)
+        points, edges = self.generate_unit_cell(extent=extent, center=center)
+        self._unit_cell_points = np.matmul(points, frac_to_abc).astype(np.float32)
+        self._unit_cell_edges = edges
 
     def generate_unit_cell(self, extent=(1, 1, 1), center=(0.5, 0.5, 0.5)):
-        points = []
-
-        # Add major lattice points
-        for z in np.arange(extent[2]):
-            for y in np.arange(extent[1]):
-                for x in np.arange(extent[0]):
-                    points.append([x, y, z])
-                    points.append([x + 1, y, z])
-                    points.append([None, None, None])
-
-                    points.append([x, y, z])
-                    points.append([x, y + 1, z])
-                    points.append([None, None, None])
-
-                    points.append([x, y, z])
-                    points.append([x, y, z + 1])
-                    points.append([None, None, None])
-
-                    points.append([x + 1, y + 1, z + 1])
-                    points.append([x + 1, y, z + 1])
-                    points.append([None, None, None])
-
-                    points.append([x + 1, y + 1, z + 1])
-                    points.append([x + 1, y + 1, z])
-                    points.append([None, None, None])
-
-                    points.append([x + 1, y + 1, z + 1])
-                    points.append([x, y + 1, z + 1])
-                    points.append([None, None, None])
-
-        # Draw x lines
-        for x in np.arange(extent[0]):
-            y = extent[1]
-            z = 0
-            points.append([x, y, z])
-            points.append([x + 1, y, z])
-            points.append([None, None, None])
-            z = extent[2]
-            y = 0
-            points.append([x, y, z])
-            points.append([x + 1, y, z])
-            points.append([None, None, None])
-
-        # Draw y lines
-        for y in np.arange(extent[1]):
-            x = 0
-            z = extent[2]
-            points.append([x, y, z])
-            points.append([x, y + 1, z])
-            points.append([None, None, None])
-            x = extent[0]
-            z = 0
-            points.append([x, y, z])
-            points.append([x, y + 1, z])
-            points.append([None, None, None])
-
-        # Draw z lines
-        for z in np.arange(extent[2]):
-            x = 0
-            y = extent[1]
-            points.append([x, y, z])
-            points.append([x, y, z + 1])
-            points.append([None, None, None])
-            x = extent[0]
-            y = 0
-            points.append([x, y, z])
-            points.append([x, y, z + 1])
-            points.append([None, None, None])
-
-        return np.array(points, dtype=np.float32) - np.array(center, dtype=np.float32)
\ No newline at end of file
+        """
+        Generate the lattice points of a grid of unit cells and the edges joining them. Edges shared between
+        neighbouring cells are only generated once.
+
+        :param extent: Number of unit cells along each axis
+        :param center: Fractional coordinate placed at the origin
+        :return: (P, 3) float32 lattice points and (E, 2) uint32 indices of the points at each end of an edge
+        """
+        shape = np.asarray(extent, dtype=int) + 1
+
+        # Lattice points, with x varying fastest
+        z, y, x = np.meshgrid(np.arange(shape[2]), np.arange(shape[1]), np.arange(shape[0]), indexing='ij')
+        points = np.stack([x.ravel(), y.ravel(), z.ravel()], axis=1).astype(np.float32)
+
+        # Join each lattice point to its neighbour along x, y and z
+        index = np.arange(len(points)).reshape(shape[2], shape[1], shape[0])
+        edges = np.concatenate([
+            np.stack([index[:, :, :-1].ravel(), index[:, :, 1:].ravel()], axis=1),
+            np.stack([index[:, :-1, :].ravel(), index[:, 1:, :].ravel()], axis=1),
+            np.stack([index[:-1, :, :].ravel(), index[1:, :, :].ravel()], axis=1),
+        ]).astype(np.uint32)
+
+        return points - np.array(center, dtype=np.float32), edges
@@ -7,6 +7,13 @@ from __future__ import annotations
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
+from typing import Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
 
 def rgb_to_hex(rgb: tuple) -> str:
     """
@@ -27,3 +34,161 @@ def hex_to_rgb(hex_str: str) -> tuple:
     """
     hex_str = hex_str.lstrip('#')
     return tuple(int(hex_str[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def to_rgba(color) -> np.ndarray:
+    """
+    Convert a color to a float RGBA array. Colors can be hex strings ('#rgb', '#rrggbb' or '#rrggbbaa'), RGB(A)
+    sequences in the range 0-1 or 0-255, or any color name understood by vispy.
+
+    The range of numeric colors is decided once for a whole color, and by `to_rgba_array` once for a whole array of
+    colors: integer numpy arrays are in the range 0-255, and other numbers are if any of them is above 1.
+
+    :param color: Color to convert
+    :return: RGBA array of float32 in the range 0-1
+    """
+    if isinstance(color, str):
+        if not color.startswith('#'):
+            from vispy.color import Color
+            return np.asarray(Color(color).rgba, dtype=np.float32)
+        hex_str = color.lstrip('#')
+        if len(hex_str) == 3:
+            hex_str = ''.join(c * 2 for c in hex_str)
+        values = [int(hex_str[i:i + 2], 16) for i in range(0, len(hex_str), 2)]
+        rgba = np.asarray(values, dtype=np.float32) / 255
+    else:
+        integer = isinstance(color, np.ndarray) and color.dtype.kind in 'iu'
+        rgba = np.asarray(color, dtype=np.float32).reshape(-1)
+        if integer or np.any(rgba > 1):
+            rgba = rgba / 255
+    if len(rgba) == 3:
+        rgba = np.append(rgba, np.float32(1))
+    if len(rgba) != 4:
+        raise ValueError(f"Color {color} is not a valid RGB or RGBA color")
+    return rgba
+
+
+# Value of each ASCII code as a hex digit, or -1
+_HEX_DIGITS = np.full(256, -1, dtype=np.int16)
+for _digit in '0123456789abcdefABCDEF':
+    _HEX_DIGITS[ord(_digit)] = int(_digit, 16)
+# Two-digit hex string of each byte value
+_HEX_PAIRS = np.array([f'{value:02x}' for value in range(256)])
+
+
+def hex_to_rgba(hex_strings: npt.ArrayLike) -> np.ndarray:
+    """
+    Convert an array of hex strings ('#rgb', '#rrggbb' or '#rrggbbaa', with or without the '#') to RGBA, all at once.
+    The characters are read through an integer view of the string array, without decoding each string.
+
+    :param hex_strings: (N,) hex strings
+    :return: (N, 4) float32 RGBA array in the range 0-1
+    """
+    colors = np.ascontiguousarray(np.asarray(hex_strings, dtype=str).reshape(-1))
+    # numpy strings are UCS-4, zero padded. The padding keeps every row at least 9 characters wide.
+    codes = colors.view(np.uint32).reshape(len(colors), colors.dtype.itemsize // 4)
+    codes = np.concatenate([codes, np.zeros((len(colors), 9), dtype=np.uint32)], axis=1)
+    hashed = codes[:, 0] == ord('#')
+    lengths = np.count_nonzero(codes, axis=1) - hashed
+    codes = np.take_along_axis(codes, hashed[:, np.newaxis] + np.arange(8), axis=1)
+    digits = _HEX_DIGITS[np.minimum(codes, 255)]
+    # '#rgb' is '#rrggbb', and colors without alpha are opaque
+    short = lengths == 3
+    digits[short] = digits[short][:, [0, 0, 1, 1, 2, 2, 3, 3]]
+    digits[short | (lengths == 6), 6:] = 15
+    valid = np.isin(lengths, (3, 6, 8)) & np.all(digits >= 0, axis=1)
+    if not np.all(valid):
+        raise ValueError(f"Color {colors[~valid][0]} is not a valid hex color")
+    return (16 * digits[:, 0::2] + digits[:, 1::2]).astype(np.float32) / 255
+
+
+def rgba_to_hex(rgba: npt.ArrayLike, alpha: bool = False) -> np.ndarray:
+    """
+    Convert an array of RGB(A) colors in the range 0-1 to hex strings, all at once.
+
+    :param rgba: (N, 3) or (N, 4) colors
+    :param alpha: Whether to include the alpha channel, as '#rrggbbaa'
+    :return: (N,) hex strings
+    """
+    rgba = np.asarray(rgba, dtype=float)
+    rgba = rgba.reshape(-1, rgba.shape[-1])
+    values = np.rint(np.clip(rgba[:, :4 if alpha else 3], 0, 1) * 255).astype(np.uint8)
+    if alpha and values.shape[1] == 3:
+        values = np.concatenate([values, np.full((len(values), 1), 255, dtype=np.uint8)], axis=1)
+    hex_strings = np.full(len(values), '#')
+    for channel in range(values.shape[1]):
+        hex_strings = np.char.add(hex_strings, _HEX_PAIRS[values[:, channel]])
+    return hex_strings
+
+
+def to_rgba_array(colors, n: Optional[int] = None) -> np.ndarray:
+    """
+    Convert several colors to an RGBA array. Numeric arrays and hex strings are converted all at once, and other
+    colors, such as names, once per distinct color.
+
+    :param colors: A single color, a sequence of colors as accepted by `to_rgba`, or an (N, 3) or (N, 4) array in the
+        range 0-1 or 0-255, which is decided for the whole array as described in `to_rgba`
+    :param n: Number of colors to return. A single color is repeated n times.
+    :return: (N, 4) float32 RGBA array in the range 0-1
+    """
+    if isinstance(colors, str) or (not isinstance(colors, np.ndarray) and len(colors) in (3, 4) and
+                                   all(isinstance(c, (int, float, np.number)) for c in colors)):
+        rgba = to_rgba(colors)[np.newaxis]
+    elif isinstance(colors, np.ndarray) and colors.dtype.kind in 'fiu':
+        rgba = _numeric_to_rgba(colors)
+    else:
+        colors = list(colors)
+        if all(isinstance(color, str) for color in colors):
+            names, inverse = np.unique(np.asarray(colors, dtype=str), return_inverse=True)
+            is_hex = np.char.startswith(names, '#')
+            palette = np.empty((len(names), 4), dtype=np.float32)
+            palette[is_hex] = hex_to_rgba(names[is_hex])
+            for i in np.flatnonzero(~is_hex):
+                palette[i] = to_rgba(str(names[i]))
+            rgba = palette[inverse.reshape(-1)]
+        else:
+            rgba = np.array([to_rgba(color) for color in colors], dtype=np.float32).reshape(-1, 4)
+    if n is not None:
+        if len(rgba) == 1:
+            rgba = np.repeat(rgba, n, axis=0)
+        elif len(rgba) != n:
+            raise ValueError(f"Expected {n} colors, got {len(rgba)}")
+    return rgba
+
+
+def _numeric_to_rgba(colors: np.ndarray) -> np.ndarray:
+    integer = colors.dtype.kind in 'iu'
+    colors = np.asarray(colors, dtype=np.float32)
+    if colors.ndim == 1:
+        colors = colors[np.newaxis]
+    if colors.shape[-1] not in (3, 4):
+        raise ValueError(f"Colors of shape {colors.shape} are not RGB or RGBA colors")
+    colors = colors.reshape(-1, colors.shape[-1])
+    # As in `to_rgba`, the range is decided once for all the colors, so that dark colors are not read as 0-1
+    if integer or (colors.size and colors.max() > 1):
+        colors = colors / 255
+    if colors.shape[1] == 3:
+        colors = np.concatenate([colors, np.ones((len(colors), 1), dtype=np.float32)], axis=1)
+    return colors
+
+
+def colormap(values: npt.ArrayLike, colors=('blue', 'red'), limits: Optional[Tuple[float, float]] = None) -> np.ndarray:
+    """
+    Map values of a property, e.g. a charge or an occupancy, to colors by linear interpolation between evenly spaced
+    control colors.
+
+    :param values: (N,) values to map
+    :param colors: Control colors, from the lowest to the highest value
+    :param limits: Values mapped to the first and last control colors. Defaults to the range of the values. Values
+        outside the limits get the end colors.
+    :return: (N, 4) float32 RGBA array
+    """
+    values = np.asarray(values, dtype=float).reshape(-1)
+    stops = to_rgba_array(colors)
+    if limits is None:
+        limits = (values.min(), values.max()) if len(values) else (0, 1)
+    low, high = limits
+    scaled = (values - low) / (high - low) if high != low else np.zeros_like(values)
+    scaled = np.clip(scaled, 0, 1) * (len(stops) - 1)
+    nodes = np.arange(len(stops))
+    return np.stack([np.interp(scaled, nodes, stops[:, channel]) for channel in range(4)], axis=1).astype(np.float32)
@@ -2,36 +2,141 @@
 #  SPDX-License-Identifier: BSD-3-Clause
 #  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
 
+"""
+Build the space-group tables read by `crysvue.logic.spacegroups` from the settings in `spg_database.cpp`. The
+operators of each Hall setting are expanded by brille, which is only needed when the tables are rebuilt:
+
+    python crysvue/misc/extract_sg.py [--source spg_database.cpp] [--output crysvue/misc]
+"""
+
 from __future__ import annotations
 
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-substr ='static const Spacegroup ALL_SPACEGROUPS[] = {'
+import argparse
+import os
+import re
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+substr = 'static const Spacegroup ALL_SPACEGROUPS[] = {'
+
+SETTINGS_FILE = 'spacegroup_settings.npy'
+OPERATORS_FILE = 'spacegroup_operators.npy'
+# Translations are stored as multiples of 1/TRANSLATION_DENOMINATOR
+TRANSLATION_DENOMINATOR = 12
+
+OPERATOR_DTYPE = np.dtype([('rotation', np.int8, (3, 3)), ('translation', np.int8, (3,))])
+
+# A string field, which may contain escaped quotes as in the Hall symbol "P 3 2\""
+_STRING = r'"((?:[^"\\]|\\.)*)"'
+_ENTRY = re.compile(r'\{\s*(\d+)\s*,' + r'\s*'.join([''] + [_STRING + r'\s*,'] * 6) +
+                    r'\s*Bravais::(\w)\s*,\s*(\d+)\s*,\s*(\d+)\s*\}')
+
+
+class Entry(NamedTuple):
+    """
+    A Hall setting of a space group, with the fields of `Spacegroup` in `spg_database.cpp`
+    """
+    number: int
+    schoenflies: str
+    hall_symbol: str
+    international: str
+    international_full: str
+    international_short: str
+    choice: str
+    centering: str
+    pointgroup_number: int
+    hall_number: int
+
+
+def remove_quotes(input_str: str) -> str:
+    return input_str.replace('\\"', '"')
+
+
+def generate_entry(input_str: str) -> Entry:
+    """
+    Parse one row of the `ALL_SPACEGROUPS` table, e.g. `{  2, "Ci^1", "-P 1", ..., Bravais::P,  2,   2}`
+    """
+    match = _ENTRY.search(input_str)
+    if match is None:
+        raise ValueError(f"Not a space group entry: {input_str}")
+    tokens = match.groups()
+    return Entry(int(tokens[0]), *[remove_quotes(token) for token in tokens[1:7]], tokens[7].strip('_'),
+                 int(tokens[8]), int(tokens[9]))
+
+
+def read_entries(path: str) -> List[Entry]:
+    """
+    Parse the settings of the `ALL_SPACEGROUPS` table. The first row, a placeholder for Hall number 0, is kept so
+    that entries can be indexed by Hall number.
+    """
+    with open(path, 'r') as f:
+        data = f.read()
+    data = data[data.find(substr) + len(substr):]
+    data = data[:data.find('};')]
+    entries = [generate_entry(line) for line in data.split('\n') if line.strip()]
+    if [entry.hall_number for entry in entries] != list(range(len(entries))):
+        raise ValueError("Space group entries are not ordered by Hall number")
+    return entries
+
+
+def expand_operators(hall_number: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Operators of a Hall setting as int8 rotations and translations in multiples of 1/TRANSLATION_DENOMINATOR, in the
+    order used by `brille.Symmetry`.
+    """
+    import brille
+
+    symmetry = brille.Symmetry(hall_number)
+    rotations = np.asarray(symmetry.W)
+    translations = np.asarray(symmetry.w, dtype=float).reshape(-1, 3) * TRANSLATION_DENOMINATOR
+    numerators = np.rint(translations)
+    if np.any(np.abs(rotations) > 1) or not np.allclose(numerators, translations, atol=1e-6):
+        raise ValueError(f"Operators of Hall number {hall_number} cannot be stored exactly")
+    return rotations.astype(np.int8), numerators.astype(np.int8)
+
 
+def build_tables(entries: List[Entry]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The settings table, one row per Hall number with the range of its operators, and the operators table.
+    """
+    operators = [expand_operators(entry.hall_number) if entry.hall_number else
+                 (np.zeros((0, 3, 3), dtype=np.int8), np.zeros((0, 3), dtype=np.int8)) for entry in entries]
+    counts = np.array([len(rotations) for rotations, _ in operators])
+    offsets = np.cumsum(counts) - counts
 
-def remove_quotes(input_str: str):
-    tokens = input_str.split('"')
-    return tokens[1] if len(tokens[1]) > 0 else None
+    string_fields = Entry._fields[1:8]
+    widths = {name: max(len(getattr(entry, name)) for entry in entries) for name in string_fields}
+    settings = np.zeros(len(entries), dtype=[('number', np.int16), ('hall_number', np.int16),
+                                             ('pointgroup_number', np.int8), ('offset', np.int32),
+                                             ('count', np.int16)] +
+                                            [(name, f'S{max(widths[name], 1)}') for name in string_fields])
+    for name in Entry._fields:
+        settings[name] = [getattr(entry, name) for entry in entries]
+    settings['offset'] = offsets
+    settings['count'] = counts
 
-def generate_entry(input_str: str):
-    tokens = input_str.split(',')
-    IT_number = int(tokens[0])
-    SchoenfliesSymbol = remove_quotes(tokens[1])
-    HallSymbol = remove_quotes(tokens[2])
-    IT_SG_Name = remove_quotes(tokens[3])
-    HM_SG_Name = remove_quotes(tokens[4])
-    C_IT_SG_Name = remove_quotes(tokens[5])
-    Choice = remove_quotes(tokens[6])
-    Centering = tokens[7][tokens[7].find(':')+2:]  # In the form "' Bravais::X'" where we are interested in X
-    PointGroupNumber = int(tokens[8])
-    HallNumber = int(tokens[9])
+    table = np.zeros(int(counts.sum()), dtype=OPERATOR_DTYPE)
+    table['rotation'] = np.concatenate([rotations for rotations, _ in operators])
+    table['translation'] = np.concatenate([translations for _, translations in operators])
+    return settings, table
 
 
-with open('spg_database.cpp', 'r') as f:
-    data = f.read()
-data = data[data.find(substr)+len(substr):].split('\n')[1:]
-data = [generate_entry(dat[3:-2]) for dat in data]
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--source', default=os.path.join(here, 'spg_database.cpp'))
+    parser.add_argument('--output', default=here)
+    args = parser.parse_args()
 
+    settings, table = build_tables(read_entries(args.source))
+    np.save(os.path.join(args.output, SETTINGS_FILE), settings)
+    np.save(os.path.join(args.output, OPERATORS_FILE), table)
+    print(f"{len(settings) - 1} settings and {len(table)} operators written to {args.output}")
 
 
+if __name__ == '__main__':
+    main()
@@ -28,4 +28,23 @@ class Atoms(VisualBase):
 
     def __init__(self, positions, sizes, colors, symmetry_str, lattice_matrix, extent=(1, 1, 1), center=None, **kwargs):
         VisualBase.__init__(self, positions, sizes, colors, symmetry_str,
-                         extent=extent, center=center, frac_to_abc=lattice_matrix, **kwargs)
\ No newline at end of file
+                         extent=extent, center=center, frac_to_abc=lattice_matrix, **kwargs)
+
+
+class AtomsImpostor(Atoms):
+    _LABEL = 'AtomsImpostor'
+
+
+class Bonds(VisualBase):
+    _LABEL = 'Bonds'
+
+    def __init__(self, positions, sizes, colors, symmetry_str, lattice_matrix, extent=(1, 1, 1), center=None, **kwargs):
+        VisualBase.__init__(self, positions, sizes, colors, symmetry_str,
+                         extent=extent, center=center, frac_to_abc=lattice_matrix, **kwargs)
+
+
+class SpinField(VisualBase):
+    _LABEL = 'SpinField'
+
+    def __init__(self, positions, vectors, **kwargs):
+        VisualBase.__init__(self, positions, vectors, **kwargs)
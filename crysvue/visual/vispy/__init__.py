@@ -2,16 +2,50 @@
 #  SPDX-License-Identifier: BSD-3-Clause
 #  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
 
+"""
+Vispy scene nodes of the crystal visuals. The nodes are created on first access (PEP 562), so that importing this
+package does not import vispy, or read any shader, until a visual is needed.
+"""
+
 from __future__ import annotations
 
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
+import importlib
+from typing import List
+
+# Scene nodes, made from a visual class with `create_visual_node`
+_NODES = {
+    'Atoms':          ('.atoms', 'AtomsVisual'),
+    'AtomsImpostor':  ('.atoms_impostor', 'AtomsImpostorVisual'),
+    'Bonds':          ('.bonds', 'BondsVisual'),
+    'SpinField':      ('.spins', 'SpinFieldVisual'),
+    'UnitCell':       ('.unit_cell', 'UnitCellVisual'),
+}
+# Classes which are already scene nodes
+_CLASSES = {
+    'XYZAxis':        ('.axes', 'XYZAxis'),
+    'ABCAxis':        ('.axes', 'ABCAxis'),
+}
+
+__all__ = list(_NODES) + list(_CLASSES)
+
+
+def __getattr__(name: str):
+    if name in _NODES:
+        module, visual = _NODES[name]
+        from vispy.scene.visuals import create_visual_node
+        value = create_visual_node(getattr(importlib.import_module(module, __name__), visual))
+    elif name in _CLASSES:
+        module, cls = _CLASSES[name]
+        value = getattr(importlib.import_module(module, __name__), cls)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Later lookups find the attribute without calling this function
+    globals()[name] = value
+    return value
+
 
-from vispy.scene.visuals import create_visual_node as _create_visual_node
-from .unit_cell import UnitCellVisual as _UnitCellVisual
-from .atoms import AtomsVisual as _AtomsVisual
-from .axes import XYZAxis, ABCAxis
-#
-Atoms = _create_visual_node(_AtomsVisual)
-UnitCell = _create_visual_node(_UnitCellVisual)
\ No newline at end of file
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -7,44 +7,138 @@ from __future__ import annotations
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-import brille
+import time
+
 import numpy as np
 
-from typing import List, Optional, TYPE_CHECKING
+from typing import Dict, List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     import numpy.typing as npt
+    from concurrent.futures import Executor
 
-from vispy.color import Color
 from vispy.visuals.markers import MarkersVisual
-from crysvue.logic.atoms import AtomsLogic
+from crysvue.logic.atoms import CHUNK_CELLS, AtomsLogic
+
+# Time spent generating blocks of a lazy supercell before each frame, in seconds
+LOAD_SECONDS_PER_FRAME = 0.02
 
 
 class AtomsVisual(MarkersVisual, AtomsLogic):
     def __init__(self, position, size, color, symmetry_str, extent: npt.ArrayLike = (1, 1, 1),
-                 center: Optional[npt.ArrayLike] = None, frac_to_abc: np.ndarray = None, **kwargs):
-        AtomsLogic.__init__(self, position, size, color, symmetry_str)
+                 center: Optional[npt.ArrayLike] = None, frac_to_abc: np.ndarray = None,
+                 executor: Optional[Executor] = None, lazy: bool = False, chunk_cells: npt.ArrayLike = CHUNK_CELLS,
+                 dataset: Optional[Dict[str, np.ndarray]] = None, **kwargs):
+        """
+        If `lazy`, the first block of unit cells is drawn straight away and the others are generated and uploaded into
+        place in the marker buffer before the following frames, see `AtomsLogic.load_chunk`. A `dataset` saved with
+        `crysvue.io.scene.save_scene` is drawn without expanding the atoms again.
+        """
+        AtomsLogic.__init__(self, position, size, color, symmetry_str, extent=extent, executor=executor, lazy=lazy,
+                            chunk_cells=chunk_cells, dataset=dataset)
 
         if frac_to_abc is None:
             frac_to_abc = np.eye(3)
-        frac_to_abc = np.asarray(frac_to_abc)
+        self._frac_to_abc = np.asarray(frac_to_abc)
+        # Level-of-detail controller, see `crysvue.visual.vispy.lod.AtomsLOD`
+        self._lod = None
 
         if center is None:
             center = np.asarray(extent) / 2
-        center = np.asarray(center)
-        extent = np.asarray(extent)
+        self._center = np.asarray(center)
 
-        dataset = self.generate_full_dataset(extent)
-        positions = np.matmul(dataset['positions'] - center, frac_to_abc)
-        sizes = dataset['sizes']
-        colors = [Color(c) for c in dataset['colors']]
+        # The first block with any site is drawn straight away. Sites which are not generated yet have zero size.
+        while self.loading and not AtomsLogic.load_chunk(self):
+            pass
+        sizes = self.sizes if not self.loading else np.where(self.loaded_sites(), self.sizes, 0)
 
-        MarkersVisual.__init__(self, pos=positions,
+        MarkersVisual.__init__(self, pos=self._to_scene(self.positions),
                                size=sizes,
-                               face_color=colors,
+                               face_color=self.colors,
                                antialias=0,
                                spherical=True,
                                edge_color='white',
                                edge_width=0,
                                scaling=True,
                                **kwargs)
+
+    @property
+    def center(self) -> np.ndarray:
+        """
+        Fractional coordinate placed at the origin of the scene
+        """
+        return self._center
+
+    @property
+    def frac_to_abc(self) -> np.ndarray:
+        return self._frac_to_abc
+
+    def _to_scene(self, positions: np.ndarray) -> np.ndarray:
+        return np.matmul(positions - self._center, self._frac_to_abc).astype(np.float32)
+
+    def load_chunk(self) -> Optional[List[slice]]:
+        sites = AtomsLogic.load_chunk(self)
+        for generated in sites or ():
+            # Only the new sites are uploaded, into their place in the marker buffer
+            self._data['a_position'][generated] = self._to_scene(self.positions[generated])
+            self._data['a_size'][generated] = self.sizes[generated]
+            self._sites_moved(generated)
+        return sites
+
+    def _prepare_draw(self, view):
+        if self.loading:
+            # Generate blocks for a while and draw again, until the supercell is complete
+            start = time.perf_counter()
+            while self.loading and time.perf_counter() - start < LOAD_SECONDS_PER_FRAME:
+                self.load_chunk()
+            self.update()
+        if self._lod is not None:
+            self._lod.update()
+            if not self._lod.n_full:
+                return False
+        return MarkersVisual._prepare_draw(self, view)
+
+    def _upload_sites(self, sites: slice):
+        """
+        Re-upload the vertices of a slice of sites, leaving the rest of the marker buffer untouched.
+        """
+        self._vbo.set_subdata(self._data[sites], offset=sites.start)
+        self.update()
+
+    def _sites_moved(self, sites: slice):
+        """
+        Upload a slice of sites whose position or size changed, and move them in the spatial grid of the
+        level-of-detail controller.
+        """
+        self._upload_sites(sites)
+        if self._lod is not None:
+            self._lod.sites_changed(sites)
+
+    def set_atom_color(self, index: int, color) -> slice:
+        sites = AtomsLogic.set_atom_color(self, index, color)
+        self._data['a_bg_color'][sites] = self.colors[sites]
+        self._upload_sites(sites)
+        return sites
+
+    def set_colors(self, colors) -> slice:
+        sites = AtomsLogic.set_colors(self, colors)
+        self._data['a_bg_color'][sites] = self.colors[sites]
+        self._upload_sites(sites)
+        return sites
+
+    def set_atom_size(self, index: int, size: float) -> slice:
+        sites = AtomsLogic.set_atom_size(self, index, size)
+        self._data['a_size'][sites] = self.sizes[sites]
+        self._sites_moved(sites)
+        return sites
+
+    def set_atom_position(self, index: int, position: npt.ArrayLike) -> Optional[slice]:
+        sites = AtomsLogic.set_atom_position(self, index, position)
+        if sites is None:
+            # The orbit changed size, so every offset after this atom has moved
+            self.set_data(pos=self._to_scene(self.positions), size=self.sizes, face_color=self.colors,
+                          edge_color='white', edge_width=0)
+            return None
+        self._data['a_position'][sites] = self._to_scene(self.positions[sites])
+        self._sites_moved(sites)
+        return sites
@@ -0,0 +1,132 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from vispy import gloo, visuals
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+from crysvue.logic.cache import get_symmetry
+from crysvue.logic.expansion import home_cell_orbit
+from crysvue.logic.sites import DEFAULT_TOLERANCE
+from crysvue.misc.color import to_rgba
+from crysvue.visual.vispy.shaders import load_shader
+
+_INSTANCE_DTYPE = [('a_atom', np.float32, 3),
+                   ('a_rot_0', np.float32, 3),
+                   ('a_rot_1', np.float32, 3),
+                   ('a_rot_2', np.float32, 3),
+                   ('a_shift', np.float32, 3),
+                   ('a_color', np.float32, 4),
+                   ('a_size', np.float32)]
+
+
+class AtomsImpostorVisual(visuals.Visual):
+    """
+    Atoms drawn as instanced sphere impostors. Only the asymmetric-unit atoms, the symmetry operators which give
+    distinct sites in the home cell and a linear index per lattice translation are uploaded. The vertex shader
+    generates every equivalent site from these, so the upload no longer grows with the number of sites.
+
+    Instanced rendering needs the 'gl+' backend of vispy, see `crysvue._use_instanced_gl`.
+    """
+
+    def __init__(self, position, size, color, symmetry_str, extent: npt.ArrayLike = (1, 1, 1),
+                 center: Optional[npt.ArrayLike] = None, frac_to_abc: np.ndarray = None,
+                 light_position=(1, -1, 1), light_ambient: float = 0.3, tolerance: float = DEFAULT_TOLERANCE):
+        vcode, fcode = load_shader('atoms_impostor')
+        visuals.Visual.__init__(self, vcode=vcode, fcode=fcode)
+
+        self._cell_buf = gloo.VertexBuffer()
+        self._instance_buf = gloo.VertexBuffer()
+        self._cells = None
+        self._instances = None
+        self._need_upload = False
+        self._tolerance = tolerance
+
+        light_position = np.asarray(light_position, dtype=float)
+        self.shared_program['u_light_position'] = light_position / np.linalg.norm(light_position)
+        self.shared_program['u_light_ambient'] = light_ambient
+        self.shared_program['u_tolerance'] = tolerance
+
+        self._draw_mode = 'points'
+        self.set_gl_state(depth_test=True, blend=True, blend_func=('src_alpha', 'one_minus_src_alpha'))
+
+        self.set_data(position, size, color, symmetry_str, extent=extent, center=center, frac_to_abc=frac_to_abc)
+
+    def set_data(self, position, size, color, symmetry_str, extent: npt.ArrayLike = (1, 1, 1),
+                 center: Optional[npt.ArrayLike] = None, frac_to_abc: np.ndarray = None):
+        symmetry = get_symmetry(symmetry_str)
+        rotations = np.asarray(symmetry.W)
+        shifts = np.asarray(symmetry.w).reshape(-1, 3)
+
+        records = []
+        for pos, sz, c in zip(position, size, color):
+            _, operators, _ = home_cell_orbit(rotations, shifts, pos, tolerance=self._tolerance)
+            instances = np.zeros(len(operators), dtype=_INSTANCE_DTYPE)
+            instances['a_atom'] = pos
+            instances['a_rot_0'] = rotations[operators, 0]
+            instances['a_rot_1'] = rotations[operators, 1]
+            instances['a_rot_2'] = rotations[operators, 2]
+            instances['a_shift'] = shifts[operators]
+            instances['a_color'] = to_rgba(c)
+            instances['a_size'] = sz
+            records.append(instances)
+        self._instances = np.concatenate(records)
+
+        extent = np.asarray(extent, dtype=int)
+        # Translations 0..extent inclusive, so that sites on the upper faces are drawn
+        n_cells = extent + 1
+        self._cells = np.arange(np.prod(n_cells), dtype=np.float32)
+
+        if frac_to_abc is None:
+            frac_to_abc = np.eye(3)
+        frac_to_abc = np.asarray(frac_to_abc, dtype=np.float32)
+        if center is None:
+            center = extent / 2
+        center = np.asarray(center, dtype=np.float32)
+
+        self.shared_program['u_cells'] = n_cells.astype(np.float32)
+        self.shared_program['u_extent'] = extent.astype(np.float32)
+        self.shared_program['u_frac_to_abc'] = frac_to_abc
+        self.shared_program['u_center'] = center
+
+        corners = np.array(np.meshgrid([0, 1], [0, 1], [0, 1], indexing='ij')).reshape(3, -1).T * extent
+        self._bounds = np.matmul(corners - center, frac_to_abc)
+        self._need_upload = True
+        self.update()
+
+    @property
+    def upload_nbytes(self) -> int:
+        """
+        Number of bytes sent to the GPU for the vertex and instance buffers
+        """
+        return self._cells.nbytes + self._instances.nbytes
+
+    def _prepare_transforms(self, view=None):
+        view.view_program.vert['visual_to_framebuffer'] = view.get_transform('visual', 'framebuffer')
+        view.view_program.vert['framebuffer_to_visual'] = view.get_transform('framebuffer', 'visual')
+        view.view_program.vert['framebuffer_to_render'] = view.get_transform('framebuffer', 'render')
+
+    def _prepare_draw(self, view=None):
+        if self._need_upload:
+            self._cell_buf.set_data(self._cells)
+            self._instance_buf.set_data(self._instances)
+            self.shared_program['a_cell'] = self._cell_buf
+            for name in self._instances.dtype.names:
+                attribute = self._instance_buf[name]
+                attribute.divisor = 1
+                self.shared_program[name] = attribute
+            self._need_upload = False
+        return len(self._instances) > 0
+
+    def _compute_bounds(self, axis, view):
+        return self._bounds[:, axis].min(), self._bounds[:, axis].max()
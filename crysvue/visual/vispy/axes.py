@@ -13,7 +13,7 @@ from vispy.scene.visuals import Compound, Text
 from vispy.visuals.markers import MarkersVisual
 from vispy.color import Color
 
-from crysvue.visual.vispy.components import Arrow3D
+from crysvue.visual.vispy.components import ARROW_SEGMENTS, Arrow3D
 from crysvue.logic.axes import AxesLogic
 
 
@@ -39,7 +39,8 @@ class XYZAxis(Compound, AxesLogic):
     A class to represent the XYZ axis in 3D space
     """
 
-    def __init__(self, *args, radius: float = 0.1, labels: Optional[List[str]] = None, **kwargs):
+    def __init__(self, *args, radius: float = 0.1, labels: Optional[List[str]] = None, segments: int = ARROW_SEGMENTS,
+                 **kwargs):
 
         if labels is None:
             labels = ['X', 'Y', 'Z']
@@ -62,7 +63,8 @@ class XYZAxis(Compound, AxesLogic):
         self._arrows = []
         self._texts = []
         for arrow_index, arrow_color in enumerate(self._colors):
-            arr = Arrow3D([0, 0, 0], self._rotation_angles[arrow_index], color=arrow_color, rotate_xy=True)
+            arr = Arrow3D([0, 0, 0], self._rotation_angles[arrow_index], color=arrow_color, rotate_xy=True,
+                          segments=segments)
             self._arrows.append(arr)
             text = Text(self._labels[arrow_index], color=_COLORS['black'])
             text.font_size = 40
@@ -0,0 +1,133 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from vispy import gloo, visuals
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
+from crysvue.logic.bonds import BOND_TOLERANCE, BondsLogic
+from crysvue.misc.color import to_rgba_array
+from crysvue.visual.vispy.shaders import load_shader
+
+_INSTANCE_DTYPE = [('a_start', np.float32, 3),
+                   ('a_end', np.float32, 3),
+                   ('a_color_start', np.float32, 4),
+                   ('a_color_end', np.float32, 4)]
+
+
+def cylinder_template(segments: int = 12):
+    """
+    An open unit cylinder along z, from z=0 to z=1, with its cross section on the unit circle.
+
+    :param segments: Number of sides of the cylinder
+    :return: (2 * segments, 3) float32 vertices and (2 * segments, 3) uint32 triangles
+    """
+    angle = 2 * np.pi * np.arange(segments) / segments
+    ring = np.stack([np.cos(angle), np.sin(angle)], axis=1)
+    vertices = np.concatenate([np.c_[ring, np.zeros(segments)], np.c_[ring, np.ones(segments)]]).astype(np.float32)
+    bottom = np.arange(segments)
+    following = np.roll(bottom, -1)
+    top = bottom + segments
+    faces = np.concatenate([np.stack([bottom, following, top], axis=1),
+                            np.stack([following, following + segments, top], axis=1)]).astype(np.uint32)
+    return vertices, faces
+
+
+class BondsVisual(visuals.Visual, BondsLogic):
+    """
+    Bonds drawn as instanced cylinders. A single cylinder mesh is uploaded once and every bond is an instance of it,
+    given by its two ends and the colors of the atoms at each end.
+
+    Instanced rendering needs the 'gl+' backend of vispy, see `crysvue._use_instanced_gl`.
+    """
+
+    def __init__(self, position, size, color, symmetry_str, extent: npt.ArrayLike = (1, 1, 1),
+                 center: Optional[npt.ArrayLike] = None, frac_to_abc: np.ndarray = None, radius: float = 0.1,
+                 tolerance: float = BOND_TOLERANCE, segments: int = 12, light_position=(1, -1, 1),
+                 light_ambient: float = 0.3):
+        BondsLogic.__init__(self, position, size, symmetry_str, extent=extent, frac_to_abc=frac_to_abc,
+                            tolerance=tolerance)
+        vcode, fcode = load_shader('bonds')
+        visuals.Visual.__init__(self, vcode=vcode, fcode=fcode)
+
+        if center is None:
+            center = np.asarray(extent) / 2
+        self._center = np.asarray(center)
+
+        self._vertex_buf = gloo.VertexBuffer()
+        self._instance_buf = gloo.VertexBuffer()
+        self._index_buf = gloo.IndexBuffer()
+        self._vertices, self._faces = cylinder_template(segments)
+        self._instances = None
+        self._need_upload = False
+
+        light_position = np.asarray(light_position, dtype=float)
+        self.shared_program['u_light_position'] = light_position / np.linalg.norm(light_position)
+        self.shared_program['u_light_ambient'] = light_ambient
+        self.shared_program['u_radius'] = radius
+
+        self._draw_mode = 'triangles'
+        self._index_buffer = self._index_buf
+        self.set_gl_state(depth_test=True, cull_face=False)
+
+        self.set_data(to_rgba_array(color, len(position))[self._bond_parents])
+
+    def _to_scene(self, positions: np.ndarray) -> np.ndarray:
+        return np.matmul(positions - self._center, self._frac_to_abc).astype(np.float32)
+
+    def set_data(self, colors: npt.ArrayLike):
+        """
+        Set the instances from the current bonds.
+
+        :param colors: (N, 4) RGBA color of each site
+        """
+        colors = np.asarray(colors, dtype=np.float32)
+        instances = np.zeros(len(self.bonds), dtype=_INSTANCE_DTYPE)
+        instances['a_start'] = self._to_scene(self._bond_positions[self.bonds[:, 0]])
+        instances['a_end'] = self._to_scene(self._bond_positions[self.bonds[:, 1]])
+        instances['a_color_start'] = colors[self.bonds[:, 0]]
+        instances['a_color_end'] = colors[self.bonds[:, 1]]
+        self._instances = instances
+        self._need_upload = True
+        self.update()
+
+    @property
+    def radius(self) -> float:
+        return float(self.shared_program['u_radius'])
+
+    @radius.setter
+    def radius(self, value: float):
+        self.shared_program['u_radius'] = value
+        self.update()
+
+    def _prepare_transforms(self, view=None):
+        view.view_program.vert['transform'] = view.transforms.get_transform()
+
+    def _prepare_draw(self, view=None):
+        if self._need_upload:
+            self._vertex_buf.set_data(self._vertices)
+            self._index_buf.set_data(self._faces)
+            self._instance_buf.set_data(self._instances)
+            self.shared_program['a_vertex'] = self._vertex_buf
+            for name in self._instances.dtype.names:
+                attribute = self._instance_buf[name]
+                attribute.divisor = 1
+                self.shared_program[name] = attribute
+            self._need_upload = False
+        return len(self._instances) > 0
+
+    def _compute_bounds(self, axis, view):
+        if not len(self._instances):
+            return None
+        ends = np.concatenate([self._instances['a_start'][:, axis], self._instances['a_end'][:, axis]])
+        return ends.min(), ends.max()
@@ -7,14 +7,23 @@ from __future__ import annotations
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-from typing import Optional, TYPE_CHECKING, Union
+import functools
+import weakref
+from typing import Optional, Tuple, TYPE_CHECKING, Union
 
 import numpy as np
 if TYPE_CHECKING:
     import numpy.typing as npt
-from vispy.geometry import create_cone
-from vispy.scene.visuals import Compound, Tube, Mesh
+from vispy import gloo, visuals
+from vispy.geometry import MeshData, create_cone, create_cylinder
+from vispy.scene.visuals import Compound
 from vispy.color import Color
+from crysvue.visual.vispy.shaders import load_shader
+
+# Number of distinct cone and tube geometries to keep
+GEOMETRY_CACHE_SIZE = 64
+# Default number of facets around an arrow
+ARROW_SEGMENTS = 50
 
 
 def Rx(theta):
@@ -53,6 +62,148 @@ def Rz(theta):
                       [0, 0, 1]])
 
 
+class SharedGeometry:
+    """
+    A triangle mesh which is shared by every visual drawing it. The vertex and index buffers are uploaded once per
+    group of GL contexts which share objects.
+    """
+
+    def __init__(self, mesh: MeshData):
+        self.vertices = np.ascontiguousarray(mesh.get_vertices(), dtype=np.float32)
+        self.normals = np.ascontiguousarray(mesh.get_vertex_normals(), dtype=np.float32)
+        self.faces = np.ascontiguousarray(mesh.get_faces(), dtype=np.uint32)
+        for array in (self.vertices, self.normals, self.faces):
+            array.setflags(write=False)
+        self._buffers = weakref.WeakKeyDictionary()
+
+    def buffers(self, shared) -> Tuple[gloo.VertexBuffer, gloo.VertexBuffer, gloo.IndexBuffer]:
+        """
+        Return the position, normal and index buffers for a GL share group, creating them on first use.
+
+        :param shared: The `GLShared` object of the context the geometry is drawn in
+        """
+        if shared not in self._buffers:
+            self._buffers[shared] = (gloo.VertexBuffer(self.vertices), gloo.VertexBuffer(self.normals),
+                                     gloo.IndexBuffer(self.faces))
+        return self._buffers[shared]
+
+
+@functools.lru_cache(maxsize=GEOMETRY_CACHE_SIZE)
+def cone_geometry(segments: int, radius: float, length: float) -> SharedGeometry:
+    """
+    A cone along z with its base at the origin, tessellated once per (segments, radius, length).
+    """
+    return SharedGeometry(create_cone(segments, radius, length))
+
+
+@functools.lru_cache(maxsize=GEOMETRY_CACHE_SIZE)
+def tube_geometry(segments: int, radius: float, length: float) -> SharedGeometry:
+    """
+    An open tube along z from the origin, tessellated once per (segments, radius, length).
+    """
+    return SharedGeometry(create_cylinder(2, segments, radius=(radius, radius), length=length))
+
+
+def lod_segments(pixels: float, minimum: int = 6, maximum: int = ARROW_SEGMENTS) -> int:
+    """
+    Number of facets for an arrow drawn a given number of pixels wide, so that each facet spans a few pixels. Distant
+    or numerous arrows can use it to drop facets which would not be seen.
+
+    :param pixels: On-screen width of the arrow
+    :param minimum: Fewest facets to use
+    :param maximum: Most facets to use
+    """
+    return int(np.clip(np.ceil(np.pi * pixels / 3), minimum, maximum))
+
+
+class GeometryVisual(visuals.Visual):
+    """
+    Draws a `SharedGeometry` with its own placement. Only the placement matrix and the color belong to the visual.
+    It is lit like a smooth shaded vispy `Mesh`, with the defaults of vispy's `ShadingFilter`.
+    """
+
+    def __init__(self, geometry: SharedGeometry, model: Optional[np.ndarray] = None, color: Union[str, Color] = 'black',
+                 light_dir=(10, 5, -5), ambient_light: float = 0.25, diffuse_light: float = 0.7,
+                 specular_light: float = 0.25, shininess: float = 100):
+        vcode, fcode = load_shader('geometry')
+        visuals.Visual.__init__(self, vcode=vcode, fcode=fcode)
+        self._geometry = None
+        self._shared = None
+        light_dir = np.asarray(light_dir, dtype=float)
+        self.shared_program['u_light_dir'] = light_dir / np.linalg.norm(light_dir)
+        self.shared_program['u_ambient_light'] = ambient_light
+        self.shared_program['u_diffuse_light'] = diffuse_light
+        self.shared_program['u_specular_light'] = specular_light
+        self.shared_program['u_shininess'] = shininess
+        self.color = color
+        self.model = np.eye(4) if model is None else model
+        self._draw_mode = 'triangles'
+        self.set_gl_state(depth_test=True, cull_face=False)
+        self.geometry = geometry
+
+    @property
+    def geometry(self) -> SharedGeometry:
+        return self._geometry
+
+    @geometry.setter
+    def geometry(self, value: SharedGeometry):
+        self._geometry = value
+        # Buffers are bound on the next draw, when the context is known
+        self._shared = None
+        self.update()
+
+    @property
+    def model(self) -> np.ndarray:
+        return self._model
+
+    @model.setter
+    def model(self, value: np.ndarray):
+        self._model = np.asarray(value, dtype=np.float32)
+        self.shared_program['u_model'] = self._model
+        self.update()
+
+    @property
+    def color(self) -> Color:
+        return self._color
+
+    @color.setter
+    def color(self, value: Union[str, Color]):
+        self._color = Color(value)
+        self.shared_program['u_color'] = self._color.rgba
+        self.update()
+
+    def _prepare_transforms(self, view=None):
+        transforms = view.transforms
+        view.view_program.vert['transform'] = transforms.get_transform()
+        view.view_program.vert['visual_to_scene'] = transforms.get_transform('visual', 'scene')
+        view.view_program.vert['scene_to_doc'] = transforms.get_transform('scene', 'document')
+        view.view_program.vert['doc_to_scene'] = transforms.get_transform('document', 'scene')
+
+    def _prepare_draw(self, view=None):
+        shared = gloo.get_current_canvas().context.shared
+        if shared is not self._shared:
+            positions, normals, index = self._geometry.buffers(shared)
+            self.shared_program['a_position'] = positions
+            self.shared_program['a_normal'] = normals
+            self._index_buffer = index
+            self._shared = shared
+
+    def _compute_bounds(self, axis, view):
+        vertices = np.c_[self._geometry.vertices, np.ones(len(self._geometry.vertices))] @ self._model
+        return vertices[:, axis].min(), vertices[:, axis].max()
+
+
+def _placement(rotation: np.ndarray, position: np.ndarray, offset: float = 0) -> np.ndarray:
+    """
+    Rigid transform which moves a point by `offset` along z, rotates it and then translates it to `position`, for
+    row vectors as used by vispy.
+    """
+    model = np.eye(4)
+    model[:3, :3] = rotation
+    model[3, :3] = np.matmul([0, 0, offset], rotation) + position
+    return model
+
+
 class Arrow3D(Compound):
 
     """
@@ -63,7 +214,8 @@ class Arrow3D(Compound):
     """
     def __init__(self, position: Optional[npt.ArrayLike] = None, direction: Optional[npt.ArrayLike] = None,
                  length: float = 0.75, radius: float = 0.1, cone_length: float = 0.25, cone_radius: float = 0.2,
-                 color: Union[str, Color] = 'black', centered: bool = False, rotate_xy: bool = False, **kwargs):
+                 color: Union[str, Color] = 'black', centered: bool = False, rotate_xy: bool = False,
+                 segments: int = ARROW_SEGMENTS, **kwargs):
 
         if direction is None:
             direction = [0, 0]
@@ -92,14 +244,29 @@ class Arrow3D(Compound):
         if centered:
             offset = -self._length/2
 
-        points = np.matmul(np.array([[0, 0, offset], [0, 0, offset + self._length]]), self._rotation) + self._position
-        _cone = create_cone(50, self._cone_radius, self._cone_length)
-
-        self._tube = Tube(points, radius=self._radius, color=self._color)
-        self._cone_mesh = Mesh(np.matmul(_cone._vertices, self._rotation) + points[1, :], _cone._faces, shading='smooth', color=self._color)
+        # The geometry is shared between arrows, each arrow only places it
+        self._segments = segments
+        self._tube = GeometryVisual(tube_geometry(segments, self._radius, self._length),
+                                    _placement(self._rotation, self._position, offset), color=self._color)
+        self._cone_mesh = GeometryVisual(cone_geometry(segments, self._cone_radius, self._cone_length),
+                                         _placement(self._rotation, self._position, offset + self._length),
+                                         color=self._color)
 
         super().__init__([self._cone_mesh, self._tube], **kwargs)
 
+    @property
+    def segments(self) -> int:
+        """
+        Number of facets around the arrow. Fewer facets can be used for distant or numerous arrows.
+        """
+        return self._segments
+
+    @segments.setter
+    def segments(self, value: int):
+        self._segments = value
+        self._tube.geometry = tube_geometry(value, self._radius, self._length)
+        self._cone_mesh.geometry = cone_geometry(value, self._cone_radius, self._cone_length)
+
     @property
     def total_length(self):
         return self._length + self._cone_length
@@ -0,0 +1,255 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+from typing import Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+from vispy import gloo, visuals
+from vispy.scene.visuals import create_visual_node
+
+from crysvue.logic.spatial import SpatialGrid, frustum_planes, slab_planes
+from crysvue.visual.vispy.shaders import load_shader
+
+if TYPE_CHECKING:
+    from vispy.scene import ViewBox
+    from crysvue.visual.vispy.atoms import AtomsVisual
+
+# Level of each block of atoms
+LOD_FULL = 2
+LOD_FLAT = 1
+LOD_HIDDEN = 0
+
+# Average number of atoms in a cell of the spatial grid, which is given a single level
+ATOMS_PER_BLOCK = 256
+
+
+class FlatAtomsVisual(visuals.Visual):
+    """
+    Atoms drawn as flat, unlit discs. The vertex buffer of an `AtomsVisual` is reused, so only an index buffer
+    selecting the atoms to draw belongs to this visual.
+    """
+
+    def __init__(self, atoms: AtomsVisual):
+        vcode, fcode = load_shader('flat_atoms')
+        visuals.Visual.__init__(self, vcode=vcode, fcode=fcode)
+        self._atoms = atoms
+        self._indices = np.zeros(0, dtype=np.uint32)
+        self._index_buf = gloo.IndexBuffer()
+        self._need_upload = False
+        self._draw_mode = 'points'
+        self._index_buffer = self._index_buf
+        self.set_gl_state(depth_test=True, blend=False)
+
+    def set_indices(self, indices: np.ndarray):
+        self._indices = np.ascontiguousarray(indices, dtype=np.uint32)
+        self._need_upload = True
+        self.update()
+
+    def _prepare_transforms(self, view=None):
+        view.view_program.vert['visual_to_framebuffer'] = view.get_transform('visual', 'framebuffer')
+        view.view_program.vert['framebuffer_to_visual'] = view.get_transform('framebuffer', 'visual')
+        view.view_program.vert['framebuffer_to_render'] = view.get_transform('framebuffer', 'render')
+
+    def _prepare_draw(self, view=None):
+        if self._atoms._lod is not None:
+            self._atoms._lod.update()
+        if not len(self._indices):
+            return False
+        if self._need_upload:
+            vbo = self._atoms._vbo
+            for name in ('a_position', 'a_bg_color', 'a_size'):
+                self.shared_program[name] = vbo[name]
+            self._index_buf.set_data(self._indices)
+            self._need_upload = False
+
+    def _compute_bounds(self, axis, view):
+        return self._atoms._compute_bounds(axis, view)
+
+
+FlatAtoms = create_visual_node(FlatAtomsVisual)
+
+
+class AtomsLOD:
+    """
+    Level of detail and culling for an `Atoms` visual. The atoms are indexed by a `SpatialGrid` and, before each frame
+    is drawn, every cell of the grid is given a level. Cells outside the camera frustum or the clip planes are not
+    drawn, and the on-screen size of the largest atom of the others decides whether they are drawn as spherical
+    markers, as flat points, or not at all. Only index buffers are uploaded when the levels change, the vertex data of
+    the atoms is shared by both representations.
+    """
+
+    def __init__(self, atoms, view: ViewBox, full_pixels: float = 6.0, min_pixels: Optional[float] = 1.0,
+                 atoms_per_block: int = ATOMS_PER_BLOCK, cull: bool = True, clip_planes: Optional[np.ndarray] = None):
+        """
+        :param atoms: `Atoms` visual node, already in the scene of `view`
+        :param view: View box holding the atoms, e.g. `CrystalCanvas.view`
+        :param full_pixels: Atoms at least this many pixels wide are drawn as spherical markers
+        :param min_pixels: Atoms narrower than this are not drawn. If None they are drawn as flat points.
+        :param atoms_per_block: Average number of atoms in a cell of the grid
+        :param cull: Whether to skip the cells outside the camera frustum
+        :param clip_planes: (P, 4) planes in the coordinates of the atoms visual, see `set_clip_planes`
+        """
+        self._atoms = atoms
+        self._view = view
+        self.full_pixels = full_pixels
+        self.min_pixels = min_pixels
+        self.cull = cull
+        self._clip_planes = None
+        self._atoms_per_block = atoms_per_block
+        self._levels = None
+        self._n_full = 0
+        self._full_buf = gloo.IndexBuffer()
+        self._flat = FlatAtoms(atoms, parent=atoms.parent)
+        self._build_grid()
+        if clip_planes is not None:
+            self.set_clip_planes(clip_planes)
+
+        # Levels are chosen when either visual is drawn, which follows the camera, resizes and pixel scale
+        atoms._lod = self
+        atoms.events.data_updated.connect(self._on_data_updated)
+        self.update()
+
+    @property
+    def flat_visual(self):
+        return self._flat
+
+    @property
+    def grid(self) -> SpatialGrid:
+        return self._grid
+
+    @property
+    def n_full(self) -> int:
+        """
+        Number of atoms drawn as spherical markers
+        """
+        return self._n_full
+
+    @property
+    def levels(self) -> np.ndarray:
+        """
+        Current level of each cell of the grid, one of LOD_FULL, LOD_FLAT and LOD_HIDDEN
+        """
+        return self._levels
+
+    @property
+    def clip_planes(self) -> Optional[np.ndarray]:
+        return self._clip_planes
+
+    def set_clip_planes(self, planes: Optional[np.ndarray]):
+        """
+        Only draw the atoms inside some planes, as used by `SpatialGrid.cull`. Whole cells are kept or dropped, so
+        atoms a little outside the planes may still be drawn.
+
+        :param planes: (P, 4) planes in the coordinates of the atoms visual, or None to draw every atom
+        """
+        self._clip_planes = None if planes is None else np.asarray(planes, dtype=float).reshape(-1, 4)
+        self._atoms.update()
+
+    def set_slab(self, normal, origin, thickness: float):
+        """
+        Only draw the atoms in a slab, e.g. to inspect a layer of a large supercell.
+
+        :param normal: Direction across the slab
+        :param origin: Point in the middle of the slab, in the coordinates of the atoms visual
+        :param thickness: Width of the slab along the normal
+        """
+        self.set_clip_planes(slab_planes(normal, origin, thickness))
+
+    def counts(self) -> Tuple[int, int, int]:
+        """
+        Number of atoms drawn as spheres, drawn as flat points and hidden
+        """
+        sizes = self._grid.counts
+        return tuple(int(sizes[self._levels == level].sum()) for level in (LOD_FULL, LOD_FLAT, LOD_HIDDEN))
+
+    def _build_grid(self):
+        data = self._atoms._data
+        self._grid = SpatialGrid(data['a_position'], data['a_size'].astype(float) / 2,
+                                 points_per_cell=self._atoms_per_block)
+        self._levels = None
+
+    def _on_data_updated(self, event=None):
+        self._build_grid()
+        self.update()
+
+    def sites_changed(self, sites: slice):
+        """
+        Update the grid after the position or size of some sites changed, without rebuilding it
+
+        :param sites: Slice of the sites which changed
+        """
+        data = self._atoms._data[sites]
+        self._grid.update(sites, data['a_position'], data['a_size'].astype(float) / 2)
+        self._levels = None
+        self.update()
+
+    def block_pixels(self) -> np.ndarray:
+        """
+        On-screen width in pixels of the largest atom of each cell of the grid
+        """
+        # The scene graph is up to date between draws, unlike the transform system of the visual
+        transform = self._atoms.node_transform(self._view.canvas.scene)
+        centers = self._grid.centers
+        if not len(centers):
+            return np.zeros(0)
+        # Project the ends of a diameter along each axis; the widest projection is the on-screen width
+        offsets = np.eye(3)[:, np.newaxis, :] * self._grid.max_radii[np.newaxis, :, np.newaxis]
+        ends = np.concatenate([centers - offsets, centers + offsets]).reshape(-1, 3)
+        mapped = transform.map(ends)
+        mapped = mapped[:, :2] / mapped[:, 3:4] * self._view.canvas.pixel_scale
+        mapped = mapped.reshape(2, 3, len(centers), 2)
+        return np.linalg.norm(mapped[1] - mapped[0], axis=-1).max(axis=0)
+
+    def visible_cells(self) -> np.ndarray:
+        """
+        Boolean mask of the cells of the grid which intersect the camera frustum and the clip planes
+        """
+        planes = [np.zeros((0, 4))]
+        if self.cull:
+            # Visual to canvas pixels, as a matrix acting on homogeneous row vectors
+            matrix = self._atoms.node_transform(self._view.canvas.scene).map(np.eye(4))
+            planes.append(frustum_planes(matrix, *self._view.canvas.size))
+        if self._clip_planes is not None:
+            planes.append(self._clip_planes)
+        return self._grid.cull(np.concatenate(planes))
+
+    def update(self, event=None):
+        """
+        Choose the level of every cell for the current camera. The index buffers are only uploaded when a level
+        changes.
+        """
+        if self._atoms._lod is not self:
+            return
+        pixels = self.block_pixels()
+        levels = np.full(len(pixels), LOD_FLAT, dtype=np.int8)
+        levels[pixels >= self.full_pixels] = LOD_FULL
+        if self.min_pixels is not None:
+            levels[pixels < self.min_pixels] = LOD_HIDDEN
+        levels[~self.visible_cells()] = LOD_HIDDEN
+        if self._levels is not None and np.array_equal(levels, self._levels):
+            return
+        self._levels = levels
+
+        full = self._grid.indices(levels == LOD_FULL)
+        flat = self._grid.indices(levels == LOD_FLAT)
+        self._full_buf.set_data(np.ascontiguousarray(full, dtype=np.uint32))
+        self._atoms._index_buffer = self._full_buf
+        self._n_full = len(full)
+        self._flat.set_indices(flat)
+        self._atoms.update()
+
+    def detach(self):
+        """
+        Stop adjusting the level of detail and draw every atom at full quality again
+        """
+        self._atoms._lod = None
+        self._atoms.events.data_updated.disconnect(self._on_data_updated)
+        self._atoms._index_buffer = None
+        self._atoms.update()
+        self._flat.parent = None
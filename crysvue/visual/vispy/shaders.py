@@ -0,0 +1,30 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+from __future__ import annotations
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import functools
+import os
+from typing import Tuple
+
+SHADER_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gloo')
+
+
+@functools.lru_cache(maxsize=None)
+def load_shader(name: str) -> Tuple[str, str]:
+    """
+    Vertex and fragment sources of a shader in the `gloo` directory, read when the first visual using them is
+    created rather than when its module is imported.
+
+    :param name: Name of the shader files, e.g. 'unit_cell' for `unit_cell.glv` and `unit_cell.glf`
+    :return: Vertex and fragment shader sources
+    """
+    sources = []
+    for extension in ('glv', 'glf'):
+        with open(os.path.join(SHADER_DIRECTORY, f'{name}.{extension}')) as f:
+            sources.append(f.read())
+    return sources[0], sources[1]
@@ -6,12 +6,220 @@ from __future__ import annotations
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple, TYPE_CHECKING, Union
 
 import numpy as np
+from vispy import gloo, visuals
+
+if TYPE_CHECKING:
+    import numpy.typing as npt
+
 from crysvue.visual.vispy.components import Arrow3D
 from crysvue.logic.spins import SpinLogic
+from crysvue.misc.color import to_rgba, to_rgba_array
+from crysvue.visual.vispy.shaders import load_shader
+
+_TEMPLATE_DTYPE = [('a_radial', np.float32, 2),
+                   ('a_along', np.float32),
+                   ('a_normal', np.float32, 3)]
+
+_BASE_DTYPE = [('a_base', np.float32, 3),
+               ('a_color', np.float32, 4)]
+
+_COLOR_MODES = {'magnitude': 1, 'direction': 2}
+
 
 class Spin(Arrow3D, SpinLogic):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+
+
+def arrow_template(segments: int = 12, radius: float = 0.05, head_radius: float = 0.12,
+                   head_fraction: float = 0.3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    A closed arrow along z, with a shaft and a cone for its head. The position along the arrow is given as a fraction
+    of its length, so that one template serves arrows of every length, while the radii are absolute.
+
+    :param segments: Number of sides of the shaft and head
+    :param radius: Radius of the shaft
+    :param head_radius: Radius of the base of the head
+    :param head_fraction: Fraction of the arrow taken by the head
+    :return: Template vertices with `_TEMPLATE_DTYPE` and (F, 3) uint32 triangles
+    """
+    angle = 2 * np.pi * np.arange(segments) / segments
+    ring = np.stack([np.cos(angle), np.sin(angle)], axis=1)
+    zeros = np.zeros(segments)
+    ones = np.ones(segments)
+    neck = 1 - head_fraction
+
+    # Rings of vertices: (radius, along, normal). Rings are repeated where the normal changes.
+    rings = [
+        (radius, zeros, np.c_[ring, zeros]),             # shaft, tail end
+        (radius, zeros + neck, np.c_[ring, zeros]),      # shaft, head end
+        (0, zeros, np.c_[0 * ring, -ones]),              # tail cap centre
+        (radius, zeros, np.c_[0 * ring, -ones]),         # tail cap rim
+        (0, zeros + neck, np.c_[0 * ring, -ones]),       # head underside centre
+        (head_radius, zeros + neck, np.c_[0 * ring, -ones]),  # head underside rim
+        (head_radius, zeros + neck, np.c_[ring, 0.5 * ones]),  # head cone base
+        (0, ones, np.c_[ring, 0.5 * ones]),              # head cone tip
+    ]
+    vertices = np.zeros(len(rings) * segments, dtype=_TEMPLATE_DTYPE)
+    for i, (r, along, normal) in enumerate(rings):
+        block = slice(i * segments, (i + 1) * segments)
+        vertices['a_radial'][block] = r * ring
+        vertices['a_along'][block] = along
+        vertices['a_normal'][block] = normal / np.linalg.norm(normal, axis=1, keepdims=True)
+
+    def band(first: int, second: int) -> np.ndarray:
+        a = first * segments + np.arange(segments)
+        b = np.roll(a, -1)
+        c = second * segments + np.arange(segments)
+        d = np.roll(c, -1)
+        return np.concatenate([np.stack([a, b, c], axis=1), np.stack([b, d, c], axis=1)])
+
+    faces = np.concatenate([band(0, 1), band(2, 3), band(4, 5), band(6, 7)]).astype(np.uint32)
+    return vertices, faces
+
+
+class SpinFieldVisual(visuals.Visual):
+    """
+    A field of arrows, e.g. the magnetic moments of a supercell, drawn as instances of one arrow mesh in a single draw
+    call. The base positions and colors, and the vectors, are held in separate instance buffers, so that changing the
+    vectors only uploads the vector buffer. Colors by magnitude or direction are evaluated in the shader.
+
+    Instanced rendering needs the 'gl+' backend of vispy, see `crysvue._use_instanced_gl`.
+    """
+
+    def __init__(self, positions: npt.ArrayLike, vectors: npt.ArrayLike,
+                 color: Union[str, npt.ArrayLike] = 'direction', scale: float = 1.0, pivot: str = 'middle',
+                 radius: float = 0.05, head_radius: float = 0.12, head_fraction: float = 0.3, segments: int = 12,
+                 color_low='blue', color_high='red', magnitude_range: Optional[Tuple[float, float]] = None,
+                 light_position=(1, -1, 1), light_ambient: float = 0.3):
+        """
+        :param positions: (N, 3) base position of each arrow
+        :param vectors: (N, 3) vector of each arrow
+        :param color: 'direction', 'magnitude', a single color or an (N, 4) color per arrow
+        :param scale: Length of an arrow per unit of its vector
+        :param pivot: Point of the arrow at its base position, 'tail' or 'middle'
+        :param radius: Radius of the shaft
+        :param head_radius: Radius of the base of the head
+        :param head_fraction: Fraction of the arrow taken by the head
+        :param segments: Number of sides of the arrows
+        :param color_low: Color of the smallest magnitude when coloring by magnitude
+        :param color_high: Color of the largest magnitude when coloring by magnitude
+        :param magnitude_range: Magnitudes mapped to `color_low` and `color_high`. The range of the vectors if None.
+        """
+        vcode, fcode = load_shader('spin_field')
+        visuals.Visual.__init__(self, vcode=vcode, fcode=fcode)
+
+        self._template_buf = gloo.VertexBuffer()
+        self._base_buf = gloo.VertexBuffer()
+        self._vector_buf = gloo.VertexBuffer(divisor=1)
+        self._index_buf = gloo.IndexBuffer()
+        self._template, self._faces = arrow_template(segments, radius, head_radius, head_fraction)
+        self._bases = None
+        self._vectors = None
+        self._magnitude_range = magnitude_range
+        self._need_upload = False
+        self._need_vector_upload = False
+
+        light_position = np.asarray(light_position, dtype=float)
+        self.shared_program['u_light_position'] = light_position / np.linalg.norm(light_position)
+        self.shared_program['u_light_ambient'] = light_ambient
+        self.shared_program['u_color_low'] = to_rgba(color_low)
+        self.shared_program['u_color_high'] = to_rgba(color_high)
+        self.scale = scale
+        self.pivot = pivot
+
+        self._draw_mode = 'triangles'
+        self._index_buffer = self._index_buf
+        self.set_gl_state(depth_test=True, cull_face=False)
+
+        self.set_data(positions, vectors, color)
+
+    def set_data(self, positions: npt.ArrayLike, vectors: npt.ArrayLike,
+                 color: Union[str, npt.ArrayLike] = 'direction'):
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        bases = np.zeros(len(positions), dtype=_BASE_DTYPE)
+        bases['a_base'] = positions
+        if isinstance(color, str) and color in _COLOR_MODES:
+            self.shared_program['u_color_mode'] = float(_COLOR_MODES[color])
+        else:
+            self.shared_program['u_color_mode'] = 0.0
+            bases['a_color'] = to_rgba_array(color, len(positions))
+        self._bases = bases
+        self._need_upload = True
+        self.set_vectors(vectors)
+
+    def set_vectors(self, vectors: npt.ArrayLike):
+        """
+        Change the vectors of the arrows. Only the vector buffer is uploaded.
+
+        :param vectors: (N, 3) vector of each arrow
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, 3)
+        if len(vectors) != len(self._bases):
+            raise ValueError("Number of vectors must match number of positions")
+        self._vectors = vectors
+        if self._magnitude_range is None:
+            magnitude = np.linalg.norm(vectors, axis=1)
+            magnitude_range = (magnitude.min(), magnitude.max()) if len(magnitude) else (0, 1)
+        else:
+            magnitude_range = self._magnitude_range
+        self.shared_program['u_magnitude_range'] = np.asarray(magnitude_range, dtype=np.float32)
+        self._need_vector_upload = True
+        self.update()
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors
+
+    @property
+    def scale(self) -> float:
+        return self._scale
+
+    @scale.setter
+    def scale(self, value: float):
+        self._scale = value
+        self.shared_program['u_scale'] = value
+        self.update()
+
+    @property
+    def pivot(self) -> str:
+        return self._pivot
+
+    @pivot.setter
+    def pivot(self, value: str):
+        if value not in ('tail', 'middle'):
+            raise ValueError(f"Pivot {value} not recognised")
+        self._pivot = value
+        self.shared_program['u_pivot'] = 0.0 if value == 'tail' else 0.5
+        self.update()
+
+    def _prepare_transforms(self, view=None):
+        view.view_program.vert['transform'] = view.transforms.get_transform()
+
+    def _prepare_draw(self, view=None):
+        if self._need_upload:
+            self._template_buf.set_data(self._template)
+            self._index_buf.set_data(self._faces)
+            self._base_buf.set_data(self._bases)
+            for name in self._template.dtype.names:
+                self.shared_program[name] = self._template_buf[name]
+            for name in self._bases.dtype.names:
+                attribute = self._base_buf[name]
+                attribute.divisor = 1
+                self.shared_program[name] = attribute
+            self._need_upload = False
+        if self._need_vector_upload:
+            self._vector_buf.set_data(self._vectors)
+            self.shared_program['a_vector'] = self._vector_buf
+            self._need_vector_upload = False
+        return len(self._bases) > 0
+
+    def _compute_bounds(self, axis, view):
+        if not len(self._bases):
+            return None
+        reach = np.linalg.norm(self._vectors, axis=1).max() * self._scale
+        positions = self._bases['a_base'][:, axis]
+        return positions.min() - reach, positions.max() + reach
@@ -7,19 +7,11 @@ from __future__ import annotations
 __author__ = "github.com/wardsimon"
 __version__ = "0.1.0"
 
-import os
-
 import numpy as np
 from vispy import gloo, visuals
 
-
-with open(os.path.join(os.path.dirname(__file__), 'gloo', 'unit_cell.glv')) as f:
-    _UNIT_CELL_VERT = f.read()
-
-with open(os.path.join(os.path.dirname(__file__), 'gloo', 'unit_cell.glf')) as f:
-    _UNIT_CELL_FRAG = f.read()
-
 from crysvue.logic.unit_cell import UnitCellLogic
+from crysvue.visual.vispy.shaders import load_shader
 
 
 class UnitCellVisual(visuals.Visual, UnitCellLogic):
@@ -30,9 +22,11 @@ class UnitCellVisual(visuals.Visual, UnitCellLogic):
 
     def __init__(self, extent=(1, 1, 1), center=None, color=(0.5, 0.5, 0.5, 1), frac_to_abc: np.ndarray = None):
         UnitCellLogic.__init__(self, extent=extent, center=center, frac_to_abc=frac_to_abc)
-        visuals.Visual.__init__(self, vcode=_UNIT_CELL_VERT, fcode=_UNIT_CELL_FRAG)
+        vcode, fcode = load_shader('unit_cell')
+        visuals.Visual.__init__(self, vcode=vcode, fcode=fcode)
 
         self.pos_buf = gloo.VertexBuffer()
+        self.index_buf = gloo.IndexBuffer()
 
         # The Visual superclass contains a MultiProgram, which is an object
         # that behaves like a normal shader program (you can assign shader
@@ -44,18 +38,39 @@ class UnitCellVisual(visuals.Visual, UnitCellLogic):
         # views:
         self.shared_program['a_pos'] = self.pos_buf
         self.shared_program.frag['color'] = color
+        self._color = color
 
         self._need_upload = False
 
         # Visual keeps track of draw mode, index buffer, and GL state. These
         # are shared between all views.
-        self._draw_mode = 'line_strip'
+        self._draw_mode = 'lines'
+        self._index_buffer = self.index_buf
         self.set_gl_state('translucent', depth_test=False)
 
-        self.set_data(self._unit_cell_points)
+        self.set_data(self._unit_cell_points, self._unit_cell_edges)
+
+    @property
+    def color(self):
+        return self._color
+
+    @property
+    def points(self) -> np.ndarray:
+        """
+        (P, 3) lattice points in scene coordinates
+        """
+        return self._pos
+
+    @property
+    def edges(self) -> np.ndarray:
+        """
+        (E, 2) indices of the points at each end of an edge
+        """
+        return self._edges
 
-    def set_data(self, pos):
+    def set_data(self, pos, edges):
         self._pos = pos
+        self._edges = edges
         self._need_upload = True
 
     def _prepare_transforms(self, view=None):
@@ -70,4 +85,5 @@ class UnitCellVisual(visuals.Visual, UnitCellLogic):
             # to use the *view* argument in this example. This will be true
             # for most visuals.
             self.pos_buf.set_data(self._pos.astype(np.float32))
+            self.index_buf.set_data(self._edges.astype(np.uint32))
             self._need_upload = False
@@ -0,0 +1,113 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import crysvue.batch
+import crysvue.logic.cache
+from crysvue import Canvas
+from crysvue.batch import Structure, render_structures, save_thumbnails
+from crysvue.logic.cache import cache_info, clear_caches
+
+STRUCTURES = [
+    Structure(4 * np.eye(3), [[0.0, 0.0, 0.0], [0.5, 0.5, 0.5]], ['Na', 'Cl'], 523, name='rock salt'),
+    Structure(3 * np.eye(3), [[0.1, 0.2, 0.3]], ['Fe'], 2, name='triclinic'),
+    Structure(np.diag([3.0, 4.0, 5.0]), [[0.12, 0.23, 0.34], [0.0, 0.0, 0.0]], ['O', 'Cu'], 81, name='monoclinic'),
+]
+
+
+@pytest.fixture
+def canvases(monkeypatch):
+    # Every canvas created by the batch renderer
+    created = []
+
+    class CountingCanvas(Canvas):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    try:
+        Canvas(display='offscreen', size=(16, 16))
+    except RuntimeError as e:
+        pytest.skip(str(e))
+    monkeypatch.setattr(crysvue.batch, 'Canvas', CountingCanvas)
+    clear_caches()
+    yield created
+    clear_caches()
+
+
+@pytest.fixture
+def expansions(monkeypatch):
+    # The thread of every orbit expansion. The cache counters are shared by the worker threads, so they cannot tell
+    # an expansion while the visuals are built from a prefetch running at the same time.
+    threads = []
+    expand_positions = crysvue.logic.cache.expand_positions
+
+    def recording(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return expand_positions(*args, **kwargs)
+
+    monkeypatch.setattr(crysvue.logic.cache, 'expand_positions', recording)
+    return threads
+
+
+def _check_images(results, size):
+    assert [structure for structure, _ in results] == STRUCTURES
+    for _, image in results:
+        assert image.shape == (size[1], size[0], 4)
+        assert image.dtype == np.uint8
+        # Something is drawn over the background
+        assert np.any(image != image[0, 0])
+
+
+def test_render_in_this_process(canvases, expansions):
+    size = (48, 32)
+    results = list(render_structures(STRUCTURES, size=size, processes=0))
+    _check_images(results, size)
+    assert len(canvases) == 1
+    # Each orbit is expanded while the atoms are built
+    assert len(expansions) == sum(len(structure.positions) for structure in STRUCTURES)
+    assert all(thread is threading.main_thread() for thread in expansions)
+
+
+def test_render_with_a_thread_pool(canvases, expansions):
+    size = (48, 32)
+    with ThreadPoolExecutor(2) as executor:
+        results = list(render_structures(STRUCTURES, size=size, executor=executor, prefetch=1))
+    _check_images(results, size)
+    # One canvas is reused for every structure, and every orbit is expanded once, ahead of rendering
+    assert len(canvases) == 1
+    assert len(expansions) == sum(len(structure.positions) for structure in STRUCTURES)
+    assert not any(thread is threading.main_thread() for thread in expansions)
+    assert cache_info()['orbit'].misses == len(expansions)
+    # The same structures render the same images without prefetching
+    clear_caches()
+    for (_, prefetched), (_, image) in zip(results, render_structures(STRUCTURES, size=size, processes=0)):
+        assert np.array_equal(prefetched, image)
+
+
+def _png_size(path: str) -> tuple:
+    # Width and height from the IHDR chunk, which follows the 8 byte signature
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    assert header[:8] == b'\x89PNG\r\n\x1a\n' and header[12:16] == b'IHDR'
+    return struct.unpack('>II', header[16:24])
+
+
+def test_save_thumbnails(canvases, tmp_path):
+    directory = str(tmp_path / 'thumbnails')
+    paths = save_thumbnails(STRUCTURES, directory, name_format='{index:02d}_{name}.png', size=(40, 30), processes=0)
+    assert [os.path.basename(path) for path in paths] == ['00_rock salt.png', '01_triclinic.png',
+                                                          '02_monoclinic.png']
+    assert all(_png_size(path) == (40, 30) for path in paths)
+    assert len(canvases) == 1
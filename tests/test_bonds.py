@@ -0,0 +1,62 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import numpy as np
+import pytest
+
+from crysvue.io.cif import lattice_matrix
+from crysvue.logic.bonds import BOND_TOLERANCE, BondsLogic, find_bonds
+from crysvue.logic.cache import clear_caches
+
+
+def _brute_force(positions, radii, frac_to_abc, tolerance=BOND_TOLERANCE, period=None):
+    delta = positions[np.newaxis] - positions[:, np.newaxis]
+    if period is not None:
+        delta -= period * np.round(delta / period)
+    distance = np.linalg.norm(delta @ frac_to_abc, axis=-1)
+    bonded = distance <= radii[:, np.newaxis] + radii[np.newaxis] + tolerance
+    i, j = np.nonzero(np.triu(bonded, k=1))
+    return np.stack([i, j], axis=1)
+
+
+# Hall numbers: 1 P 1, 2 P -1, 81 P 1 21/c 1, 488 P 63/m m c and 523 F m -3 m
+STRUCTURES = {
+    'P1': (1, lattice_matrix(4.1, 4.7, 5.3, 81, 97, 104), [[0.1, 0.2, 0.3], [0.6, 0.4, 0.8]], [1.4, 1.7]),
+    'P-1': (2, lattice_matrix(4.3, 5.1, 5.6, 76, 88, 111), [[0.15, 0.3, 0.2], [0.5, 0.1, 0.7]], [1.7, 1.4]),
+    'P21/c': (81, lattice_matrix(5.2, 6.3, 7.1, 90, 117, 90), [[0.12, 0.23, 0.34], [0.4, 0.05, 0.1]], [1.1, 0.9]),
+    'P63/mmc': (488, lattice_matrix(3.2, 3.2, 5.2, 90, 90, 120), [[1 / 3, 2 / 3, 0.25], [0, 0, 0]], [1.4, 1.0]),
+    'Fm-3m': (523, lattice_matrix(5.6, 5.6, 5.6, 90, 90, 90), [[0, 0, 0], [0.5, 0.5, 0.5], [0.25, 0.25, 0.25]],
+              [1.4, 1.8, 0.7]),
+}
+
+
+@pytest.mark.parametrize('name', STRUCTURES)
+@pytest.mark.parametrize('extent', [(1, 1, 1), (2, 2, 2)])
+def test_bonds_match_brute_force(name, extent):
+    clear_caches()
+    hall, frac_to_abc, positions, radii = STRUCTURES[name]
+    logic = BondsLogic(positions, radii, hall, extent=extent, frac_to_abc=frac_to_abc)
+    expected = _brute_force(logic._bond_positions, logic._bond_radii, frac_to_abc)
+    assert len(expected)
+    assert np.array_equal(logic.bonds, expected)
+    assert np.all(logic.bond_lengths <= 2 * max(radii) + BOND_TOLERANCE + 1e-9)
+
+
+@pytest.mark.parametrize('name', STRUCTURES)
+def test_find_bonds_matches_brute_force(name):
+    hall, frac_to_abc, positions, radii = STRUCTURES[name]
+    logic = BondsLogic(positions, radii, hall, extent=(3, 3, 3), frac_to_abc=frac_to_abc)
+    sites, site_radii = logic._bond_positions, logic._bond_radii
+    assert np.array_equal(find_bonds(sites, site_radii, frac_to_abc), _brute_force(sites, site_radii, frac_to_abc))
+    # Periodic search over the supercell, which bonds sites across its faces
+    period = np.array([3, 3, 3])
+    inside = np.all((sites >= 0) & (sites < period), axis=1)
+    sites, site_radii = sites[inside], site_radii[inside]
+    bonds, images = find_bonds(sites, site_radii, frac_to_abc, period=period, return_images=True)
+    assert np.array_equal(bonds, _brute_force(sites, site_radii, frac_to_abc, period=period))
+    delta = (sites[bonds[:, 1]] + images - sites[bonds[:, 0]]) @ frac_to_abc
+    assert np.all(np.linalg.norm(delta, axis=1) <= site_radii[bonds].sum(axis=1) + BOND_TOLERANCE + 1e-9)
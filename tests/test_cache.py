@@ -0,0 +1,77 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from crysvue.logic.cache import LRUCache, cache_info, clear_caches, expand_orbits_cached, expand_positions_cached, \
+    get_symmetry
+from crysvue.logic.expansion import expand_positions
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    clear_caches()
+    yield
+    clear_caches()
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=3 * 80)
+    for key in 'abc':
+        cache.put(key, np.zeros(10))
+    assert cache.get('a') is not None
+    cache.put('d', np.zeros(10))
+    # 'b' is the least recently used entry once 'a' has been read
+    assert 'b' not in cache and all(key in cache for key in 'acd')
+    assert cache.cache_info() == (1, 0, 240, 240)
+    # A value larger than the budget is not stored, and replacing a value frees its size
+    cache.put('e', np.zeros(100))
+    assert 'e' not in cache
+    cache.put('a', np.zeros(5))
+    assert cache.cache_info().currsize == 200
+    # Lowering the budget evicts down to the most recently stored entry
+    cache.max_bytes = 100
+    assert len(cache) == 1 and 'a' in cache
+    assert cache.get('b') is None
+    cache.clear()
+    assert len(cache) == 0 and cache.cache_info() == (0, 0, 100, 0)
+
+
+def test_symmetry_is_parsed_once():
+    assert get_symmetry(523) is get_symmetry(523)
+    assert get_symmetry('x,y,z;-x,-y,-z') is get_symmetry('x,y,z;-x,-y,-z')
+    info = cache_info()['symmetry']
+    assert (info.hits, info.misses) == (2, 2)
+
+
+def test_expanded_orbits_are_shared_and_read_only():
+    symmetry = get_symmetry(81)
+    orbit = expand_positions_cached(81, [0.1, 0.2, 0.3], (2, 2, 2))
+    for expected, array in zip(expand_positions(symmetry.W, symmetry.w, [0.1, 0.2, 0.3], (2, 2, 2)), orbit):
+        assert np.array_equal(array, expected)
+        assert not array.flags.writeable
+    # Positions equal to within the tolerance share an entry, other extents do not
+    assert expand_positions_cached(81, [0.1, 0.2, 0.3 + 1e-9], (2, 2, 2)) is orbit
+    assert expand_positions_cached(81, [0.1, 0.2, 0.3], (1, 2, 2)) is not orbit
+    info = cache_info()['orbit']
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_expand_orbits_in_threads_keeps_order():
+    positions = np.random.default_rng(0).random((6, 3))
+    serial = expand_orbits_cached(523, positions, (1, 1, 1))
+    clear_caches()
+    with ThreadPoolExecutor(3) as executor:
+        threaded = expand_orbits_cached(523, positions, (1, 1, 1), executor=executor)
+    for a, b in zip(serial, threaded):
+        for x, y in zip(a, b):
+            assert np.array_equal(x, y)
+    # Every orbit is now cached
+    assert all(x is y for x, y in zip(expand_orbits_cached(523, positions, (1, 1, 1)), threaded))
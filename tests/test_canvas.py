@@ -0,0 +1,33 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import pytest
+
+from crysvue import Canvas
+
+
+@pytest.fixture
+def canvas():
+    try:
+        return Canvas(display='offscreen', size=(64, 64))
+    except RuntimeError as e:
+        pytest.skip(str(e))
+
+
+def test_clear_disconnects_axes(canvas):
+    from crysvue.visual.vispy.axes import XYZAxis
+
+    crystal_canvas = canvas._canvas
+    callbacks = len(crystal_canvas.events.resize.callbacks)
+    for _ in range(3):
+        crystal_canvas.add_visual('xyzaxis', XYZAxis())
+        assert len(crystal_canvas.events.resize.callbacks) == callbacks + 1
+        canvas.clear()
+        assert len(crystal_canvas.events.resize.callbacks) == callbacks
+        assert not crystal_canvas.view.camera._linked_cameras
+        assert crystal_canvas.central_widget._widgets == [crystal_canvas.view]
+    assert canvas.render().shape == (64, 64, 4)
@@ -0,0 +1,189 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import gzip
+import io
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from crysvue.io.cif import element_symbols, index_blocks, iter_blocks, iter_structures, lattice_matrix, \
+    parse_floats, parse_operator, read_block, resolve_symmetry
+from crysvue.logic.spacegroups import SpaceGroupSymmetry, spacegroup_setting
+
+HEADER = """# collection
+data_global
+_publ_section_title
+;
+A title with a line that starts like a block
+data_notablock
+;
+_journal_name_full 'J. Don't Panic'
+
+data_NaCl
+_cell_length_a 5.6402(3)
+_cell_length_b 5.6402(3)
+_cell_length_c 5.6402(3)
+_cell_angle_alpha 90
+_cell_angle_beta 90.0
+_cell_angle_gamma 90
+_symmetry_space_group_name_H-M 'F m -3 m'
+_symmetry_Int_Tables_number 225
+loop_
+_atom_site_label
+_atom_site_type_symbol
+_atom_site_fract_x
+_atom_site_fract_y
+_atom_site_fract_z
+_atom_site_occupancy
+Na1 Na+ 0 0 0 1.
+Cl1 Cl- 0.5 0.5 0.5 ?
+
+data_p21n
+_cell_length_a 7.1
+_cell_length_b 8.2
+_cell_length_c 9.3
+_cell_angle_alpha 90
+_cell_angle_beta 101.5(1)
+_cell_angle_gamma 90
+loop_
+_symmetry_equiv_pos_as_xyz
+x,y,z
+-x+1/2,y+1/2,-z+1/2
+-x,-y,-z
+x-1/2,-y-1/2,z-1/2
+loop_
+_atom_site_label
+_atom_site_fract_x
+_atom_site_fract_y
+_atom_site_fract_z
+_atom_site_calc_flag
+Fe1 0.1(2) 0.2 0.3 d
+OW2 0.4 0.5 0.6 d
+D3 0.7 0.8 0.9 calc
+Q1 0.1 0.1 0.1 dum
+
+data_Si_origin2
+_cell.length_a 5.431
+_cell.length_b 5.431
+_cell.length_c 5.431
+_cell.angle_alpha 90
+_cell.angle_beta 90
+_cell.angle_gamma 90
+_space_group.name_H-M_alt 'F d -3 m'
+loop_
+_atom_site.label
+_atom_site.fract_x
+_atom_site.fract_y
+_atom_site.fract_z
+Si1 0.125 0.125 0.125
+loop_
+_space_group_symop.operation_xyz
+"""
+
+
+def _xyz(rotation, translation) -> str:
+    rows = []
+    for coefficients, shift in zip(rotation, translation):
+        terms = ''.join(f"{'+' if c > 0 else '-'}{axis}" for c, axis in zip(coefficients, 'xyz') if c)
+        fraction = Fraction(float(shift)).limit_denominator(12)
+        rows.append(terms.lstrip('+') + (f'+{fraction}' if fraction else ''))
+    return ', '.join(rows)
+
+
+@pytest.fixture(scope='module')
+def cif_text() -> str:
+    # Origin choice 2 of F d -3 m, given by its operators as 'F d -3 m' alone is origin choice 1
+    symmetry = SpaceGroupSymmetry(526)
+    return HEADER + ''.join(f"'{_xyz(W, w)}'\n" for W, w in zip(symmetry.W, symmetry.w))
+
+
+@pytest.fixture
+def cif_path(tmp_path, cif_text):
+    path = tmp_path / 'structures.cif'
+    path.write_text(cif_text)
+    return path
+
+
+def test_iter_blocks(cif_path):
+    blocks = list(iter_blocks(cif_path))
+    assert [block.name for block in blocks] == ['global', 'NaCl', 'p21n', 'Si_origin2']
+    assert blocks[0].items == {'_publ_section_title': 'A title with a line that starts like a block\ndata_notablock',
+                               '_journal_name_full': "J. Don't Panic"}
+    assert not blocks[0].has_atom_sites and all(block.has_atom_sites for block in blocks[1:])
+    # CIF 2 tags are read with '_' in place of '.'
+    assert blocks[3].get('_cell_length_a') == '5.431'
+    assert list(blocks[1].loop('_atom_site_label')['_atom_site_type_symbol']) == ['Na+', 'Cl-']
+
+
+def test_index_and_read_blocks(cif_path):
+    blocks = index_blocks(cif_path)
+    assert [name for name, _ in blocks] == ['global', 'NaCl', 'p21n', 'Si_origin2']
+    for name, offset in blocks:
+        assert next(iter_blocks(cif_path, offset)).name == name
+    assert read_block(cif_path).name == 'NaCl'
+    assert read_block(cif_path, 'p21n').name == 'p21n'
+    with pytest.raises(KeyError):
+        read_block(cif_path, 'missing')
+
+
+def test_gzipped_and_open_files(tmp_path, cif_text):
+    path = tmp_path / 'structures.cif.gz'
+    with gzip.open(path, 'wt') as f:
+        f.write(cif_text)
+    assert [block.name for block in iter_blocks(path)] == [block.name for block in iter_blocks(io.StringIO(cif_text))]
+    assert [name for name, _ in index_blocks(path)] == ['global', 'NaCl', 'p21n', 'Si_origin2']
+
+
+def test_atom_sites(cif_path):
+    sites = read_block(cif_path, 'NaCl').atom_sites
+    assert list(sites['symbol']) == ['Na', 'Cl']
+    assert np.array_equal(sites['positions'], [[0, 0, 0], [0.5, 0.5, 0.5]])
+    # An unknown occupancy is taken as full
+    assert np.array_equal(sites['occupancy'], [1, 1])
+    # Uncertainties are dropped, elements are found from the labels and dummy atoms are left out
+    sites = read_block(cif_path, 'p21n').atom_sites
+    assert list(sites['label']) == ['Fe1', 'OW2', 'D3']
+    assert list(sites['symbol']) == ['Fe', 'O', 'H']
+    assert np.allclose(sites['positions'][0], [0.1, 0.2, 0.3])
+
+
+def test_symmetry_of_blocks(cif_path):
+    structures = {structure.name: structure for structure in iter_structures(cif_path)}
+    assert list(structures) == ['NaCl', 'p21n', 'Si_origin2']
+    assert spacegroup_setting(structures['NaCl'].symmetry_str).number == 225
+    assert spacegroup_setting(structures['p21n'].symmetry_str).number == 14
+    setting = spacegroup_setting(structures['Si_origin2'].symmetry_str)
+    assert (setting.number, setting.choice) == (227, '2')
+    unit_cell, atoms = read_block(cif_path, 'Si_origin2').to_visuals(extent=(2, 2, 2))
+    assert (type(unit_cell).__name__, type(atoms).__name__) == ('UnitCell', 'Atoms')
+    block = read_block(cif_path, 'p21n')
+    assert np.allclose(block.cell, [7.1, 8.2, 9.3, 90, 101.5, 90])
+    assert np.allclose(np.linalg.norm(block.lattice_matrix, axis=1), [7.1, 8.2, 9.3])
+
+
+def test_resolve_symmetry():
+    assert resolve_symmetry() == 1
+    assert resolve_symmetry(hall='-P 2ybc') == 81
+    assert spacegroup_setting(resolve_symmetry(hm='P 21/c')).number == 14
+    # Operators which match no tabulated setting are kept as they are
+    assert resolve_symmetry(operators=['x, y, z', '-x, -y, z+1/5']) == 'x,y,z;-x,-y,z+1/5'
+    with pytest.raises(ValueError):
+        resolve_symmetry(hm='Q 9')
+
+
+def test_values():
+    rotation, translation = parse_operator('-x+1/2, y-z, -2*z+3/4')
+    assert np.array_equal(rotation, [[-1, 0, 0], [0, 1, -1], [0, 0, -2]])
+    assert np.allclose(translation, [0.5, 0, 0.75])
+    assert np.array_equal(parse_floats(['5.431(2)', '-1', '?', '.']), [5.431, -1, np.nan, np.nan], equal_nan=True)
+    assert list(element_symbols(['Fe3+', 'O1a', 'CA', 'Ca2', 'D'])) == ['Fe', 'O', 'C', 'Ca', 'H']
+    matrix = lattice_matrix(3, 4, 5, 80, 95, 110)
+    a, b, c = matrix
+    assert np.allclose(np.linalg.norm(matrix, axis=1), [3, 4, 5])
+    assert np.allclose(np.degrees(np.arccos([b @ c / 20, a @ c / 15, a @ b / 12])), [80, 95, 110])
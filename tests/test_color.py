@@ -0,0 +1,87 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import numpy as np
+import pytest
+
+from crysvue.logic.atoms import AtomsLogic
+from crysvue.misc.color import colormap, hex_to_rgba, rgba_to_hex, to_rgba, to_rgba_array
+
+
+def test_hex_to_rgba():
+    rgba = hex_to_rgba(['#f00', '0f0', '#0000ff', '#00ff0080', 'FFFFFF'])
+    assert np.allclose(rgba, [[1, 0, 0, 1], [0, 1, 0, 1], [0, 0, 1, 1], [0, 1, 0, 128 / 255], [1, 1, 1, 1]])
+    assert rgba.dtype == np.float32
+    # The short form repeats each digit
+    assert np.allclose(hex_to_rgba(['#a3c']), hex_to_rgba(['#aa33cc']))
+
+
+@pytest.mark.parametrize('invalid', ['#ff00', '#gg0000', '#', 'red', '#ff0000ff00'])
+def test_hex_to_rgba_rejects_invalid(invalid):
+    with pytest.raises(ValueError):
+        hex_to_rgba(['#000000', invalid])
+
+
+def test_rgba_to_hex_round_trip():
+    rng = np.random.default_rng(5)
+    values = rng.integers(0, 256, (100, 4))
+    hex_strings = rgba_to_hex(values / 255, alpha=True)
+    assert np.array_equal(np.rint(hex_to_rgba(hex_strings) * 255), values)
+    assert list(rgba_to_hex([[1, 0, 0], [0, 0.5, 1]])) == ['#ff0000', '#0080ff']
+    assert list(rgba_to_hex([[1, 0, 0]], alpha=True)) == ['#ff0000ff']
+
+
+def test_to_rgba_array_mixed_colors():
+    colors = ['red', '#00ff00', (0, 0, 1), (255, 255, 0, 127.5), 'red']
+    rgba = to_rgba_array(colors)
+    expected = [[1, 0, 0, 1], [0, 1, 0, 1], [0, 0, 1, 1], [1, 1, 0, 0.5], [1, 0, 0, 1]]
+    assert np.allclose(rgba, expected)
+    assert np.allclose(rgba, [to_rgba(color) for color in colors])
+    # A single color is repeated
+    assert np.allclose(to_rgba_array('blue', 3), [[0, 0, 1, 1]] * 3)
+    with pytest.raises(ValueError):
+        to_rgba_array(['red', 'blue'], 3)
+
+
+def test_numeric_range_is_decided_per_array():
+    # A dark color next to a bright one is in the same range as it
+    assert np.allclose(to_rgba_array(np.array([[1.0, 1.0, 1.0], [255.0, 0.0, 0.0]])),
+                       [[1 / 255, 1 / 255, 1 / 255, 1], [1, 0, 0, 1]])
+    assert np.allclose(to_rgba_array(np.array([[1.0, 0.5, 0.0], [0.2, 0.2, 0.2]])),
+                       [[1, 0.5, 0, 1], [0.2, 0.2, 0.2, 1]])
+    # Integer arrays are always in the range 0-255
+    assert np.allclose(to_rgba_array(np.array([[1, 0, 0], [0, 0, 0]])), [[1 / 255, 0, 0, 1], [0, 0, 0, 1]])
+    assert np.allclose(to_rgba(np.array([1, 0, 0, 255])), [1 / 255, 0, 0, 1])
+    assert np.allclose(to_rgba((1, 0, 0)), [1, 0, 0, 1])
+
+
+def test_colormap_limits():
+    values = [0.0, 5.0, 10.0]
+    assert np.allclose(colormap(values), [[0, 0, 1, 1], [0.5, 0, 0.5, 1], [1, 0, 0, 1]])
+    # Values outside the limits get the end colors
+    assert np.allclose(colormap([-10.0, 2.0, 20.0], limits=(0, 4)), [[0, 0, 1, 1], [0.5, 0, 0.5, 1], [1, 0, 0, 1]])
+    # Equal limits map everything to the first color
+    assert np.allclose(colormap([3.0, 3.0]), [[0, 0, 1, 1]] * 2)
+    assert np.allclose(colormap([0.0, 1.0, 2.0], colors=('black', 'white', 'red')),
+                       [[0, 0, 0, 1], [1, 1, 1, 1], [1, 0, 0, 1]])
+
+
+def test_set_colors_gathers_from_the_palette():
+    atoms = AtomsLogic([[0, 0, 0], [0.5, 0.5, 0.5], [0.25, 0.25, 0.25]], [0.3, 0.4, 0.2], ['red', 'blue', 'red'],
+                       523, extent=(2, 2, 2))
+    # Atoms of the same color share a palette entry
+    assert len(atoms._palette) == 2
+    changed = atoms.set_colors(colormap([1.0, 2.0, 3.0]))
+    assert changed == slice(0, len(atoms.positions))
+    rgba = colormap([1.0, 2.0, 3.0])
+    assert len(atoms._palette) == 3
+    assert np.allclose(atoms.colors, rgba[atoms.parents])
+    for index, atom in enumerate(atoms.atoms):
+        assert np.allclose(atom.rgba, rgba[index])
+    atoms.set_colors('green')
+    assert len(atoms._palette) == 1
+    assert np.allclose(atoms.colors, to_rgba('green'))
@@ -0,0 +1,78 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import brille
+import numpy as np
+import pytest
+
+from crysvue.logic.expansion import cell_blocks, count_tiled_sites, expand_positions, home_cell_orbit, \
+    lattice_translations, tile_orbit
+
+
+def _brute_force(symmetry, position, extent, tolerance=1e-6):
+    reach = max(extent) + 2
+    t = np.stack(np.meshgrid(*[np.arange(-reach, reach + 1)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+    sites = (np.einsum('oij,tj->toi', symmetry.W, position + t) + symmetry.w).reshape(-1, 3)
+    sites = sites[np.all((sites >= -tolerance) & (sites <= np.asarray(extent) + tolerance), axis=1)]
+    return set(map(tuple, np.round(sites, 6).tolist()))
+
+
+@pytest.mark.parametrize('symbol, position, extent', [
+    (1, [0.1, 0.2, 0.3], (2, 1, 3)),
+    (2, [0, 0, 0], (2, 2, 2)),
+    (81, [0.1, 0.2, 0.3], (3, 2, 2)),
+    (81, [0, 0.5, 0.5], (2, 2, 2)),
+    (488, [1 / 3, 2 / 3, 0.25], (3, 3, 2)),
+    (523, [0.25, 0.25, 0.25], (2, 2, 2)),
+    (523, [0.1, 0.2, 0.3], (1, 1, 1)),
+])
+def test_expand_positions_matches_brute_force(symbol, position, extent):
+    symmetry = brille.Symmetry(symbol)
+    position = np.asarray(position, dtype=float)
+    positions, operators, cells = expand_positions(symmetry.W, symmetry.w, position, extent)
+    assert np.array_equal(positions[0], position)
+    # Every site is reproduced by its generator, once, and no image in the supercell is missed
+    generated = np.einsum('nij,nj->ni', symmetry.W[operators], position + cells) + symmetry.w[operators]
+    assert np.allclose(generated, positions)
+    found = set(map(tuple, np.round(positions, 6).tolist()))
+    assert len(found) == len(positions)
+    assert found == _brute_force(symmetry, position, extent)
+
+
+def test_home_cell_orbit():
+    symmetry = brille.Symmetry(523)
+    for position, multiplicity in (([0, 0, 0], 4), ([0.25, 0.25, 0.25], 8), ([0.07, 0.18, 0.31], 192)):
+        sites, operators, shifts = home_cell_orbit(symmetry.W, symmetry.w, position)
+        assert len(sites) == multiplicity
+        assert np.all((sites >= 0) & (sites < 1))
+        assert np.allclose(np.einsum('nij,j->ni', symmetry.W[operators], position) + symmetry.w[operators] + shifts,
+                           sites)
+
+
+def test_blocks_tile_the_supercell():
+    # Sites of a home-cell orbit are wrapped into [-tolerance, 1 - tolerance)
+    orbit = np.array([[0, 0, 0], [0.5, 0.5, 0], [0.25, 0.75, 0.5], [-1e-9, 0.5, 0.5]])
+    extent = np.array([5, 3, 4])
+    orbit_index, cells = tile_orbit(orbit, extent)
+    assert len(orbit_index) == count_tiled_sites(orbit, extent).sum()
+    everything = sorted(map(tuple, np.round(orbit[orbit_index] + cells, 6).tolist()))
+    assert len(set(everything)) == len(everything)
+
+    blocks = []
+    for lower, upper in cell_blocks(extent, (2, 2, 3)):
+        orbit_index, cells = tile_orbit(orbit, extent, lower, upper)
+        assert np.array_equal(np.bincount(orbit_index, minlength=len(orbit)),
+                              count_tiled_sites(orbit, extent, lower, upper))
+        blocks.extend(map(tuple, np.round(orbit[orbit_index] + cells, 6).tolist()))
+    assert sorted(blocks) == everything
+
+
+def test_lattice_translations():
+    translations = lattice_translations((2, 1, 1))
+    assert len(translations) == 4 * 3 * 3
+    assert np.array_equal(translations[:4], [[-1, -1, -1], [0, -1, -1], [1, -1, -1], [2, -1, -1]])
+    assert np.array_equal(translations[-1], [2, 1, 1])
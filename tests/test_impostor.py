@@ -0,0 +1,72 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import numpy as np
+import pytest
+
+from crysvue import Canvas
+from crysvue.logic.cache import get_symmetry
+from crysvue.logic.expansion import expand_positions
+from crysvue.visual.generic import AtomsImpostor
+from crysvue.visual.vispy.atoms_impostor import AtomsImpostorVisual
+
+
+def _drawn_sites(visual: AtomsImpostorVisual, extent) -> list:
+    # The vertex shader, for every instance and lattice translation: the site is generated in the home cell,
+    # translated, and dropped if it is beyond the extent
+    instances = visual._instances
+    rotations = np.stack([instances['a_rot_0'], instances['a_rot_1'], instances['a_rot_2']], axis=1).astype(float)
+    tolerance = visual._tolerance
+    sites = np.einsum('nij,nj->ni', rotations, instances['a_atom'].astype(float)) + instances['a_shift']
+    sites = sites - np.floor(sites + tolerance)
+    cells = np.stack(np.unravel_index(visual._cells.astype(int), np.asarray(extent)[::-1] + 1)[::-1], axis=1)
+    sites = (sites[:, np.newaxis] + cells[np.newaxis]).reshape(-1, 3)
+    atoms = np.repeat(np.arange(len(instances)), len(cells))
+    kept = np.all(sites <= np.asarray(extent) + tolerance, axis=1)
+    return sorted(zip(instances['a_size'][atoms[kept]].astype(float).round(4).tolist(),
+                      map(tuple, np.round(sites[kept], 4).tolist())))
+
+
+@pytest.mark.parametrize('hall_number, positions, extent', [
+    (2, [[0.1, 0.2, 0.3], [0.0, 0.5, 0.5]], (2, 1, 3)),
+    (81, [[0.12, 0.23, 0.34], [0.0, 0.0, 0.0]], (3, 2, 2)),
+    (488, [[1 / 3, 2 / 3, 0.25], [0.1, 0.2, 0.3]], (2, 2, 1)),
+    (523, [[0.0, 0.0, 0.0], [0.25, 0.25, 0.25], [0.07, 0.18, 0.31]], (2, 2, 2)),
+])
+def test_instances_cover_the_expanded_sites(hall_number, positions, extent):
+    sizes = [0.3 + 0.1 * i for i in range(len(positions))]
+    visual = AtomsImpostorVisual(positions, sizes, ['red'] * len(positions), hall_number, extent=extent)
+    symmetry = get_symmetry(hall_number)
+    expected = []
+    for position, size in zip(positions, sizes):
+        sites, _, _ = expand_positions(symmetry.W, symmetry.w, position, extent)
+        expected += [(round(size, 4), site) for site in map(tuple, np.round(sites, 4).tolist())]
+    # Every site is drawn exactly once
+    assert _drawn_sites(visual, extent) == sorted(expected)
+
+
+@pytest.fixture
+def canvas():
+    try:
+        return Canvas(display='offscreen', size=(64, 64))
+    except RuntimeError as e:
+        pytest.skip(str(e))
+
+
+def test_render_impostors(canvas):
+    background = canvas.render()
+    canvas.add_visual(AtomsImpostor(positions=np.array([[0.0, 0.0, 0.0], [0.5, 0.5, 0.5]]), sizes=[0.8, 1.0],
+                                    colors=['#ff0000', '#0000ff'], symmetry_str=523, lattice_matrix=4 * np.eye(3),
+                                    extent=(2, 2, 2)))
+    canvas.reset_camera()
+    image = canvas.render()
+    assert image.shape == (64, 64, 4)
+    # Red and blue spheres are drawn over the white background
+    drawn = np.any(image != background, axis=-1)
+    assert drawn.sum() > 0.1 * drawn.size
+    assert np.any(image[..., 0] > 2 * image[..., 2].astype(int) + 50)
+    assert np.any(image[..., 2] > 2 * image[..., 0].astype(int) + 50)
@@ -0,0 +1,61 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import numpy as np
+import pytest
+
+from crysvue.logic.atoms import AtomsLogic
+from crysvue.logic.cache import clear_caches, get_symmetry
+from crysvue.logic.expansion import count_positions, expand_positions
+
+
+def _sites(atoms: AtomsLogic) -> list:
+    columns = np.concatenate([atoms.positions, atoms.operators[:, np.newaxis], atoms.translations,
+                              atoms.parents[:, np.newaxis]], axis=1)
+    return sorted(map(tuple, np.round(columns, 4).tolist()))
+
+
+@pytest.mark.parametrize('symmetry, positions, extent, chunk_cells', [
+    (523, [[0, 0, 0], [0.5, 0.5, 0.5]], (3, 3, 3), 2),
+    # Positions outside [0, 1) are kept as given, as well as their images inside the supercell
+    (523, [[1.2, -0.3, 0.5], [0.25, 0.25, 0.25]], (2, 3, 2), 1),
+    (1, [[1.5, 2.5, -0.5]], (2, 2, 2), 1),
+    (82, [[0.1, 0.2, 0.3], [0, 0, 0], [-0.1, 1.0, 0.5]], (4, 2, 3), (3, 1, 2)),
+])
+def test_lazy_matches_eager(symmetry, positions, extent, chunk_cells):
+    clear_caches()
+    sizes, colors = [0.3] * len(positions), ['red'] * len(positions)
+    eager = AtomsLogic(positions, sizes, colors, symmetry, extent=extent)
+    lazy = AtomsLogic(positions, sizes, colors, symmetry, extent=extent, lazy=True, chunk_cells=chunk_cells)
+    assert lazy.loading
+    lazy.load_all()
+    assert not lazy.loading
+    assert lazy.loaded_sites().all()
+    assert np.array_equal(lazy.offsets, eager.offsets)
+    assert _sites(lazy) == _sites(eager)
+    # The given position is the first site of each atom
+    assert np.allclose(lazy.positions[lazy.offsets[:-1]], positions)
+
+
+def test_chunks_are_written_in_place():
+    atoms = AtomsLogic([[0, 0, 0], [0.5, 0.5, 0.5]], [0.3, 0.4], ['red', 'blue'], 523, extent=(4, 4, 4), lazy=True,
+                       chunk_cells=2)
+    generated = np.zeros(len(atoms.positions), dtype=int)
+    while atoms.loading:
+        for sites in atoms.load_chunk() or ():
+            generated[sites] += 1
+    # Every site is generated by exactly one block
+    assert np.all(generated == 1)
+
+
+@pytest.mark.parametrize('position', [[0, 0, 0], [0.1, 0.2, 0.3], [1.2, -0.3, 0.5], [0.5, 1.0, 0.5]])
+@pytest.mark.parametrize('hall_number', [1, 2, 82, 488, 523])
+def test_count_positions(hall_number, position):
+    symmetry = get_symmetry(hall_number)
+    for extent in [(1, 1, 1), (2, 3, 1)]:
+        sites, _, _ = expand_positions(symmetry.W, symmetry.w, position, extent)
+        assert count_positions(symmetry.W, symmetry.w, position, extent) == len(sites)
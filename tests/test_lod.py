@@ -0,0 +1,102 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import numpy as np
+import pytest
+
+from crysvue import Canvas
+from crysvue.visual.generic import Atoms
+
+
+@pytest.fixture
+def canvas():
+    try:
+        return Canvas(display='offscreen', size=(256, 256))
+    except RuntimeError as e:
+        pytest.skip(str(e))
+
+
+def _add_atoms(canvas):
+    # Two general positions of P -1, so that moving one of them keeps the number of sites
+    atoms = canvas.add_visual(Atoms(positions=np.array([[0.1, 0.2, 0.3], [0.6, 0.55, 0.8]]), sizes=[0.5, 0.7],
+                                    colors=['#ff0000', '#0000ff'], symmetry_str=2, lattice_matrix=4 * np.eye(3),
+                                    extent=(8, 8, 8)))
+    canvas.reset_camera()
+    return atoms
+
+
+def test_zooming_out_lowers_the_level_of_detail(canvas):
+    atoms = _add_atoms(canvas)
+    lod, = canvas.enable_lod(atoms_per_block=32)
+    camera = canvas._canvas.view.camera
+    fit = camera.scale_factor
+    counts = []
+    for zoom in (0.2, 1, 4, 50):
+        camera.scale_factor = fit * zoom
+        canvas.render()
+        counts.append(lod.counts())
+        assert sum(counts[-1]) == len(atoms.positions)
+    full, flat, hidden = np.array(counts).T
+    assert full[0] > 0 and full[-1] == 0
+    assert np.all(np.diff(full) <= 0)
+    # Close up, the atoms outside the view are culled; far away, every atom is too small to draw
+    assert hidden[0] > 0
+    assert flat[1:-1].sum() > 0
+    assert hidden[-1] == len(atoms.positions)
+
+
+def test_slab_reduces_the_drawn_atoms(canvas):
+    atoms = _add_atoms(canvas)
+    lod, = canvas.enable_lod(atoms_per_block=32)
+    canvas.render()
+    full, flat, hidden = lod.counts()
+    lod.set_slab([0, 0, 1], [0, 0, 0], 2.0)
+    canvas.render()
+    slab = lod.counts()
+    assert slab[0] + slab[1] < full + flat
+    assert slab[2] > hidden
+    # Every atom in the slab is still drawn
+    drawn = np.zeros(len(atoms.positions), dtype=bool)
+    drawn[lod.grid.indices(lod.levels != 0)] = True
+    assert np.all(drawn[np.abs(atoms._data['a_position'][:, 2]) <= 1.0])
+    lod.set_clip_planes(None)
+    canvas.render()
+    assert lod.counts() == (full, flat, hidden)
+
+
+def test_detach_restores_the_image(canvas):
+    _add_atoms(canvas)
+    before = canvas.render()
+    lod, = canvas.enable_lod(atoms_per_block=32)
+    canvas._canvas.view.camera.scale_factor *= 4
+    canvas.render()
+    canvas.reset_camera()
+    lod.detach()
+    assert np.array_equal(canvas.render(), before)
+
+
+def test_moved_sites_keep_the_grid_consistent(canvas):
+    atoms = _add_atoms(canvas)
+    lod, = canvas.enable_lod(atoms_per_block=32)
+    canvas.render()
+    grid = lod.grid
+    sites = atoms.set_atom_position(0, [0.35, 0.05, 0.45])
+    assert sites is not None
+    # The grid was updated in place, not rebuilt, and every cell holds exactly the moved sites inside it
+    assert lod.grid is grid
+    assert np.allclose(grid.positions, atoms._data['a_position'])
+    cells = grid.cell_of(grid.positions)
+    lower, upper = grid.bounds
+    for cell in range(grid.n_cells):
+        members = grid.indices([cell])
+        assert np.array_equal(np.sort(members), np.flatnonzero(cells == cell))
+        if len(members):
+            radii = grid.radii[members, np.newaxis]
+            assert np.allclose(lower[cell], (grid.positions[members] - radii).min(axis=0))
+            assert np.allclose(upper[cell], (grid.positions[members] + radii).max(axis=0))
+    canvas.render()
+    assert sum(lod.counts()) == len(atoms.positions)
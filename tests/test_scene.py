@@ -0,0 +1,98 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from crysvue import Canvas
+from crysvue.io.scene import DATASET_KEYS, HEADER_FILE, SCENE_VERSION, load_scene, read_header, save_scene
+from crysvue.visual.generic import Atoms, UnitCell
+from crysvue.visual.vispy.atoms import AtomsVisual
+from crysvue.visual.vispy.unit_cell import UnitCellVisual
+
+LATTICE = np.diag([5.6, 5.6, 5.6])
+
+
+def _atoms(**kwargs):
+    return AtomsVisual([[0, 0, 0], [0.5, 0.5, 0.5]], [0.5, 0.7], ['#ff0000', '#0000ff'], 523, extent=(2, 2, 2),
+                       frac_to_abc=LATTICE, **kwargs)
+
+
+def test_scene_round_trip(tmp_path):
+    atoms = _atoms(center=[0.5, 0.5, 0.5])
+    unit_cell = UnitCellVisual(extent=(2, 2, 2), frac_to_abc=LATTICE, color=(0.2, 0.3, 0.4, 1))
+    save_scene(str(tmp_path), [atoms], [unit_cell])
+    scene = load_scene(str(tmp_path))
+
+    kwargs, = scene['atoms']
+    dataset = atoms.generate_full_dataset(atoms.extent)
+    for key in DATASET_KEYS:
+        assert np.array_equal(kwargs['dataset'][key], dataset[key])
+        assert isinstance(kwargs['dataset'][key].base, np.memmap)
+    assert kwargs['symmetry_str'] == 523 and kwargs['extent'] == (2, 2, 2)
+    assert np.array_equal(kwargs['center'], [0.5, 0.5, 0.5]) and np.array_equal(kwargs['frac_to_abc'], LATTICE)
+
+    # The reopened atoms are not expanded again, and draw the same markers
+    reopened = AtomsVisual(**kwargs)
+    assert reopened.positions is kwargs['dataset']['positions']
+    assert np.array_equal(reopened._data, atoms._data)
+
+    cell_kwargs, = scene['unit_cells']
+    assert np.allclose(cell_kwargs['color'], (0.2, 0.3, 0.4, 1))
+    assert np.array_equal(cell_kwargs['points'], unit_cell.points)
+    assert np.array_equal(cell_kwargs['edges'], unit_cell.edges)
+
+
+def test_mapped_scene_is_copy_on_write(tmp_path):
+    save_scene(str(tmp_path), [_atoms()])
+    positions = load_scene(str(tmp_path))['atoms'][0]['dataset']['positions']
+    saved = positions.copy()
+    positions[:] = -1
+    assert np.array_equal(load_scene(str(tmp_path))['atoms'][0]['dataset']['positions'], saved)
+
+    # Saving again replaces the files, leaving arrays mapped from the old ones intact
+    mapped = load_scene(str(tmp_path))['atoms'][0]['dataset']['positions']
+    other = AtomsVisual([[0.1, 0.2, 0.3]], [0.5], ['#00ff00'], 81, frac_to_abc=LATTICE)
+    save_scene(str(tmp_path), [other])
+    assert np.array_equal(mapped, saved)
+    assert np.array_equal(load_scene(str(tmp_path), mmap_mode=None)['atoms'][0]['dataset']['positions'],
+                          other.positions)
+
+
+def test_read_header_checks_the_format(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_header(str(tmp_path))
+    save_scene(str(tmp_path))
+    assert read_header(str(tmp_path))['version'] == SCENE_VERSION
+    header_path = os.path.join(str(tmp_path), HEADER_FILE)
+    for header, message in (({'format': 'other'}, 'not a crysvue scene'),
+                            ({'format': 'crysvue-scene', 'version': SCENE_VERSION + 1}, 'newer')):
+        with open(header_path, 'w') as f:
+            json.dump(header, f)
+        with pytest.raises(ValueError, match=message):
+            read_header(str(tmp_path))
+
+
+def test_canvas_reopens_scene(tmp_path):
+    try:
+        canvas = Canvas(display='offscreen', size=(64, 64))
+    except RuntimeError as e:
+        pytest.skip(str(e))
+    canvas.add_visual(UnitCell(LATTICE, extent=(2, 2, 2)))
+    canvas.add_visual(Atoms([[0, 0, 0], [0.5, 0.5, 0.5]], [0.5, 0.7], ['#ff0000', '#0000ff'], 523, LATTICE,
+                            extent=(2, 2, 2)))
+    canvas.reset_camera()
+    image = canvas.render()
+    canvas.save_scene(str(tmp_path))
+    canvas.clear()
+    visuals = canvas.load_scene(str(tmp_path))
+    assert [type(visual).__name__ for visual in visuals] == ['UnitCell', 'Atoms']
+    canvas.reset_camera()
+    assert np.array_equal(canvas.render(), image)
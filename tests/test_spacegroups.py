@@ -0,0 +1,73 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import brille
+import numpy as np
+import pytest
+
+from crysvue.logic.spacegroups import (N_HALL_NUMBERS, SpaceGroupSymmetry, find_hall_number, lookup_symmetry,
+                                       spacegroup_setting, spacegroup_settings)
+
+
+@pytest.mark.parametrize('hall_symbol, hall_number', [
+    # Hall symbols which compact to the Hermann-Mauguin symbol of another setting or group
+    ('P 3 2', 438),
+    ('P 6 2', 471),
+    ('P 4 2', 366),
+])
+def test_hall_symbol_takes_precedence(hall_symbol, hall_number):
+    assert lookup_symmetry(hall_symbol).hall_number == hall_number
+    assert spacegroup_setting(hall_number).hall_symbol == hall_symbol
+
+
+def test_spaced_hermann_mauguin_symbol_takes_precedence():
+    # 'P 2' is both the Hall symbol of P 1 1 2 (4) and the Hermann-Mauguin symbol of P 1 2 1 (3); it reads as the
+    # latter, as with find_hall_number
+    assert spacegroup_setting(4).hall_symbol == 'P 2'
+    assert lookup_symmetry('P 2').hall_number == 3
+    assert lookup_symmetry('P  2').hall_number == 3
+    assert find_hall_number(hm='P 2') == 3
+    assert lookup_symmetry('P 2y').hall_number == 3
+
+
+@pytest.mark.parametrize('symbol, hall_number', [
+    (523, 523),
+    ('F m -3 m', 523),
+    ('Fm-3m', 523),
+    ('-F 4 2 3', 523),
+    ('P 21/c', 81),
+    ('P 1 21/n 1', 82),
+    ('P 4_2', 351),
+    ('P42', 351),
+])
+def test_lookup_symmetry(symbol, hall_number):
+    assert lookup_symmetry(symbol).hall_number == hall_number
+
+
+def test_untabulated_symbols():
+    assert lookup_symmetry('x,y,z;-x,-y,-z') is None
+    assert lookup_symmetry('not a group') is None
+
+
+def test_find_hall_number():
+    assert find_hall_number(hall_symbol='-P 2ybc') == 81
+    assert find_hall_number(hm='P 21/c') == 81
+    assert find_hall_number(it_number=227) == 525
+    assert find_hall_number(it_number=227, choice='2') == 526
+    assert list(spacegroup_settings(227)) == [525, 526]
+    with pytest.raises(ValueError):
+        find_hall_number(hm='P 21/c', it_number=14)
+    with pytest.raises(ValueError):
+        find_hall_number(it_number=231)
+
+
+def test_tables_match_brille():
+    for hall_number in range(1, N_HALL_NUMBERS + 1):
+        table = SpaceGroupSymmetry(hall_number)
+        symmetry = brille.Symmetry(hall_number)
+        assert np.array_equal(table.W, np.asarray(symmetry.W))
+        assert np.allclose(table.w, np.asarray(symmetry.w).reshape(-1, 3))
@@ -0,0 +1,136 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import warnings
+
+import numpy as np
+import pytest
+
+from crysvue.logic.spatial import SpatialGrid, frustum_planes, slab_planes
+
+
+def _points(rng, n_points):
+    # The first two points are at the corners of the box and are never moved, so that a grid built from scratch
+    # after a move has the same cells
+    positions = rng.uniform(0, 10, (n_points, 3))
+    positions[:2] = [[0, 0, 0], [10, 10, 10]]
+    return positions, rng.uniform(0.1, 0.5, n_points)
+
+
+def _assert_same_grid(grid: SpatialGrid, points_per_cell: int):
+    fresh = SpatialGrid(grid.positions, grid.radii, points_per_cell=points_per_cell)
+    assert grid.shape == fresh.shape
+    assert np.array_equal(grid.counts, fresh.counts)
+    assert np.array_equal(grid.stops, fresh.stops)
+    # Points may be in another order within a cell, but every cell has the same points and box
+    for cell in np.flatnonzero(fresh.counts):
+        assert np.array_equal(np.sort(grid.indices([cell])), np.sort(fresh.indices([cell])))
+    for updated, built in zip(grid.bounds, fresh.bounds):
+        assert np.array_equal(updated, built)
+    assert np.array_equal(grid.max_radii, fresh.max_radii)
+
+
+def test_random_updates_match_a_fresh_grid():
+    rng = np.random.default_rng(7)
+    positions, radii = _points(rng, 3000)
+    grid = SpatialGrid(positions, radii, points_per_cell=32)
+    assert grid.n_cells > 1
+    for _ in range(20):
+        moved = rng.choice(np.arange(2, len(positions)), size=rng.integers(1, 200), replace=False)
+        new_radii = rng.uniform(0.1, 0.5, len(moved)) if rng.random() < 0.5 else None
+        grid.update(moved, rng.uniform(0, 10, (len(moved), 3)), new_radii)
+        _assert_same_grid(grid, 32)
+
+
+def test_slice_updates_match_a_fresh_grid():
+    rng = np.random.default_rng(11)
+    positions, radii = _points(rng, 2000)
+    grid = SpatialGrid(positions, radii, points_per_cell=32)
+    for start, stop in [(2, 50), (100, 101), (1500, 2000), (2, 2)]:
+        sites = slice(start, stop)
+        grid.update(sites, rng.uniform(0, 10, (stop - start, 3)), rng.uniform(0.1, 0.5, stop - start))
+        _assert_same_grid(grid, 32)
+
+
+def test_points_can_leave_every_cell():
+    rng = np.random.default_rng(3)
+    positions, radii = _points(rng, 1000)
+    grid = SpatialGrid(positions, radii, points_per_cell=16)
+    # Gather every other point in one corner, which empties most of the cells
+    grid.update(np.arange(2, 1000), np.full((998, 3), 9.9))
+    _assert_same_grid(grid, 16)
+    assert (grid.counts > 0).sum() == 2
+
+
+def test_empty_cells_are_finite():
+    # Two clusters far apart leave the cells between them empty, with inverted boxes
+    positions = np.concatenate([np.zeros((300, 3)), np.full((300, 3), 10.0)])
+    grid = SpatialGrid(positions)
+    assert (grid.counts == 0).any()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert np.all(np.isfinite(grid.centers))
+        visible = grid.cull(slab_planes([0, 0, 1], [0, 0, 0], 1.0))
+    assert visible.sum() == 1
+    assert np.array_equal(np.sort(grid.indices(visible)), np.arange(300))
+
+
+def _inside(positions, radii, planes):
+    # Points whose sphere reaches the inside of every plane, with unit normals
+    planes = planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    return np.all(positions @ planes[:, :3].T + planes[:, 3] + radii[:, np.newaxis] >= 0, axis=1)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_slab_cull_keeps_every_point_inside(seed):
+    rng = np.random.default_rng(seed)
+    positions, radii = _points(rng, 5000)
+    grid = SpatialGrid(positions, radii, points_per_cell=64)
+    for _ in range(10):
+        planes = slab_planes(rng.normal(size=3), rng.uniform(0, 10, 3), rng.uniform(0.1, 3))
+        kept = np.zeros(len(positions), dtype=bool)
+        kept[grid.indices(grid.cull(planes))] = True
+        inside = _inside(positions, radii, planes)
+        assert inside.any()
+        assert np.all(kept[inside])
+        # Whole cells are culled, so some points outside the slab are kept but far fewer than all
+        assert kept.sum() < len(positions)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_frustum_cull_keeps_every_point_inside(seed):
+    rng = np.random.default_rng(seed)
+    positions, radii = _points(rng, 5000)
+    grid = SpatialGrid(positions, radii, points_per_cell=64)
+    width, height = 400.0, 300.0
+    # A perspective camera at a random point in front of the box, looking at its centre
+    eye = np.array([5, 5, 5]) + rng.uniform(8, 12) * rng.normal(size=3) / np.sqrt(3)
+    forward = (np.array([5, 5, 5]) - eye) / np.linalg.norm(np.array([5, 5, 5]) - eye)
+    right = np.cross(forward, [0, 0, 1] if abs(forward[2]) < 0.9 else [0, 1, 0])
+    right /= np.linalg.norm(right)
+    up = np.cross(right, forward)
+    focal = rng.uniform(200, 800)
+    # Row-vector matrix from homogeneous scene positions to (x w, y w, -, w) canvas pixels
+    view = np.eye(4)
+    view[:3, :3] = np.stack([right, up, forward], axis=1)
+    view[3, :3] = -eye @ view[:3, :3]
+    project = np.zeros((4, 4))
+    project[0, 0] = focal
+    project[1, 1] = focal
+    project[2, :] = [width / 2, height / 2, 1, 1]
+    matrix = view @ project
+    planes = frustum_planes(matrix, width, height)
+    kept = np.zeros(len(positions), dtype=bool)
+    kept[grid.indices(grid.cull(planes))] = True
+    homogeneous = np.concatenate([positions, np.ones((len(positions), 1))], axis=1) @ matrix
+    depth = homogeneous[:, 3]
+    pixels = homogeneous[:, :2] / depth[:, np.newaxis]
+    # The centres on screen and in front of the camera are a subset of the points inside the planes
+    on_screen = (depth > 0) & np.all((pixels >= 0) & (pixels <= [width, height]), axis=1)
+    assert on_screen.any()
+    assert np.all(kept[on_screen])
+    assert np.all(kept[_inside(positions, radii, planes)])
@@ -0,0 +1,126 @@
+#  SPDX-FileCopyrightText: 2023 easyCrystallography contributors <crystallography@easyscience.software>
+#  SPDX-License-Identifier: BSD-3-Clause
+#  © 2022-2023  Contributors to the easyCore project <https://github.com/easyScience/easyCrystallography>
+
+__author__ = "github.com/wardsimon"
+__version__ = "0.1.0"
+
+import numpy as np
+import pytest
+
+from crysvue import Canvas
+from crysvue.logic.atoms import AtomsLogic
+from crysvue.logic.spins import magnetic_operators
+from crysvue.visual.generic import SpinField
+from crysvue.visual.vispy.spins import SpinFieldVisual
+
+SPINS = [[1.0, 0.0, 0.0], [0.3, -0.5, 2.0]]
+
+
+def _atoms(symmetry=81, extent=(2, 1, 1)) -> AtomsLogic:
+    return AtomsLogic([[0.1, 0.2, 0.3], [0.0, 0.0, 0.0]], [0.3, 0.4], ['red', 'blue'], symmetry, extent=extent)
+
+
+def _reference(atoms: AtomsLogic, spins, time_reversal=None, axial=True) -> np.ndarray:
+    # One site at a time: det(W) tr W v for an axial vector, tr W v for a polar one
+    rotations = np.asarray(atoms.symmetry.W, dtype=float)
+    flags = np.ones(len(rotations)) if time_reversal is None else np.asarray(time_reversal)
+    flags = np.where(flags, -1, 1) if flags.dtype == bool else flags
+    vectors = np.empty((len(atoms.positions), 3))
+    for site, (parent, operator) in enumerate(zip(atoms.parents, atoms.operators)):
+        rotation = rotations[operator] if operator >= 0 else np.eye(3)
+        factor = (np.linalg.det(rotation) if axial else 1) * (flags[operator] if operator >= 0 else 1)
+        vectors[site] = factor * rotation @ np.asarray(spins[parent])
+    return vectors
+
+
+@pytest.mark.parametrize('symmetry', [1, 2, 81, 488, 523])
+@pytest.mark.parametrize('axial', [True, False])
+def test_spin_vectors_match_a_scalar_loop(symmetry, axial):
+    atoms = _atoms(symmetry)
+    vectors = atoms.generate_spin_vectors(SPINS, axial=axial)
+    assert vectors.shape == (len(atoms.positions), 3)
+    assert np.allclose(vectors, _reference(atoms, SPINS, axial=axial))
+    # The given position keeps the given vector
+    assert np.allclose(vectors[atoms.offsets[:-1]], SPINS)
+
+
+def test_axial_and_polar_vectors_differ_under_inversion():
+    atoms = _atoms(2, extent=(1, 1, 1))
+    inverted = atoms.operators == 1
+    assert inverted.any()
+    axial = atoms.generate_spin_vectors(SPINS)
+    polar = atoms.generate_spin_vectors(SPINS, axial=False)
+    assert np.allclose(axial[inverted], -polar[inverted])
+    assert np.allclose(axial[~inverted], polar[~inverted])
+
+
+def test_time_reversal_flags():
+    atoms = _atoms(81)
+    n_ops = len(atoms.symmetry.W)
+    signs = np.where(np.arange(n_ops) % 2, -1, 1)
+    flipped = atoms.generate_spin_vectors(SPINS, time_reversal=signs)
+    assert np.allclose(flipped, _reference(atoms, SPINS, time_reversal=signs))
+    # True/False flags are the same as -1/+1
+    assert np.allclose(atoms.generate_spin_vectors(SPINS, time_reversal=signs < 0), flipped)
+    # Every operator with time reversal flips every vector
+    assert np.allclose(atoms.generate_spin_vectors(SPINS, time_reversal=-np.ones(n_ops)),
+                       -atoms.generate_spin_vectors(SPINS))
+
+
+def test_length_mismatches():
+    atoms = _atoms(81)
+    with pytest.raises(ValueError):
+        atoms.generate_spin_vectors(SPINS[:1])
+    with pytest.raises(ValueError):
+        atoms.generate_spin_vectors(SPINS, time_reversal=[1, -1])
+
+
+def test_magnetic_operators():
+    symmetry, flags = magnetic_operators('x,y,z,+1; -x, -y, -z, -1;x+1/2,-y,z+1/2,+1;-x+1/2,y,-z+1/2,-1')
+    assert symmetry == 'x,y,z;-x,-y,-z;x+1/2,-y,z+1/2;-x+1/2,y,-z+1/2'
+    assert flags.tolist() == [1, -1, 1, -1]
+    # Operators without a time-reversal component are not combined with it
+    symmetry, flags = magnetic_operators('x,y,z;-x,-y,-z,-1')
+    assert symmetry == 'x,y,z;-x,-y,-z'
+    assert flags.tolist() == [1, -1]
+    # The flags follow the operators of the symmetry they were split from
+    atoms = AtomsLogic([[0.1, 0.2, 0.3]], [0.3], ['red'], symmetry, extent=(1, 1, 1))
+    vectors = atoms.generate_spin_vectors(SPINS[:1], time_reversal=flags)
+    assert np.allclose(vectors, _reference(atoms, SPINS[:1], time_reversal=flags))
+
+
+@pytest.mark.parametrize('symbol', ['x,y', 'x,y,z;x,y,z,+1,0', 'x,y,z;'])
+def test_malformed_magnetic_operators(symbol):
+    with pytest.raises(ValueError):
+        magnetic_operators(symbol)
+
+
+@pytest.fixture
+def canvas():
+    try:
+        return Canvas(display='offscreen', size=(64, 64))
+    except RuntimeError as e:
+        pytest.skip(str(e))
+
+
+def test_spin_field_draws_the_generated_vectors(canvas):
+    atoms = _atoms(523, extent=(2, 2, 2))
+    vectors = atoms.generate_spin_vectors(SPINS)
+    field = canvas.add_visual(SpinField(positions=atoms.positions, vectors=vectors, scale=0.2))
+    assert isinstance(field, SpinFieldVisual)
+    assert np.allclose(field.vectors, vectors)
+    canvas.reset_camera()
+    before = canvas.render()
+    # New vectors for the same sites replace the vector buffer, which is uploaded on the next draw
+    flipped = atoms.generate_spin_vectors(SPINS, time_reversal=-np.ones(len(atoms.symmetry.W)))
+    field.set_vectors(flipped)
+    assert field.vectors.shape == (len(atoms.positions), 3)
+    assert field.vectors.dtype == np.float32
+    assert np.allclose(field.vectors, flipped)
+    after = canvas.render()
+    assert field._vector_buf.size == len(atoms.positions)
+    # Arrows colored by direction change color when they are reversed
+    assert not np.array_equal(before, after)
+    with pytest.raises(ValueError):
+        field.set_vectors(flipped[:-1])